@@ -0,0 +1,43 @@
+#!/usr/bin/env bash
+# Enqueue an /internal update or maintenance job and wait for it to finish.
+#
+# Usage: run_update_job.sh "/internal/update/historic?end_date=2026-01-01"
+# Needs RENDER_UPDATE_URL and UPDATE_TOKEN in the environment.
+set -euo pipefail
+
+path="$1"
+poll_seconds="${JOB_POLL_SECONDS:-5}"
+max_polls="${JOB_MAX_POLLS:-180}"
+
+response=$(curl -sS -X POST \
+  -H "X-Update-Token: ${UPDATE_TOKEN}" \
+  "${RENDER_UPDATE_URL}${path}")
+echo "Submitted: ${response}"
+
+job_id=$(echo "${response}" | jq -r '.job_id // empty')
+if [ -z "${job_id}" ]; then
+  echo "No job id returned"
+  exit 1
+fi
+
+for _ in $(seq 1 "${max_polls}"); do
+  sleep "${poll_seconds}"
+  job=$(curl -sS -H "X-Update-Token: ${UPDATE_TOKEN}" \
+    "${RENDER_UPDATE_URL}/internal/jobs/${job_id}")
+  status=$(echo "${job}" | jq -r '.status')
+  echo "Job ${job_id}: ${status}"
+
+  case "${status}" in
+    succeeded)
+      echo "${job}" | jq .
+      exit 0
+      ;;
+    failed)
+      echo "${job}" | jq .
+      exit 1
+      ;;
+  esac
+done
+
+echo "Job ${job_id} did not finish in time"
+exit 1
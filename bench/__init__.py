@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for the lakeprojections backend.
+
+Run individual benchmarks as modules from the repository root, e.g.
+``python -m bench.timestamps``. Each prints a JSON report.
+"""
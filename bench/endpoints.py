@@ -0,0 +1,287 @@
+"""
+End-to-end benchmark: every /api route and every /internal update job.
+
+Generates a synthetic database (bench.synthetic_db), starts the fake HDB
+from tools/fake_hdb.py in-process, then drives main.app through the Flask
+test client:
+
+  1. /internal/db/indexes, as a deploy would.
+  2. Each /internal/update/* job, the hourly backfill and forecast
+     retention against the fake HDB, through the job queue with ?wait=1
+     so each request returns once its job has finished.
+  3. Each /api route, `--repeat` times cold (data caches dropped before
+     every request) and `--repeat` times warm.
+
+The JSON report has p50/p95 latency per route, rows/s per ingest job and
+the peak RSS of the process, so runs can be diffed.
+
+    python -m bench.endpoints --years 5 --vintages 200 --studies 36 --repeat 20
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from bench.synthetic_db import generate
+from tools.fake_hdb import start_fake_hdb
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+UPDATE_TOKEN = "bench"
+
+INGEST_JOBS = (
+    "/internal/update/historic",
+    "/internal/update/historic/daily/requery-7d",
+    "/internal/update/historic/hourly",
+    "/internal/update/forecast/daily",
+    "/internal/update/forecast",
+)
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def _latency_summary(seconds):
+    return {
+        "p50_ms": round(_percentile(seconds, 50) * 1000, 3),
+        "p95_ms": round(_percentile(seconds, 95) * 1000, 3),
+        "max_ms": round(max(seconds) * 1000, 3),
+    }
+
+
+def _peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _count_rows(body):
+    """
+    Rows written by an update job: every *inserted / *updated / *deleted
+    count anywhere in its JSON result.
+    """
+    if isinstance(body, dict):
+        total = 0
+        for key, value in body.items():
+            if isinstance(value, (dict, list)):
+                total += _count_rows(value)
+            elif isinstance(value, int) and key.endswith(("inserted", "updated", "deleted")):
+                total += value
+        return total
+    if isinstance(body, list):
+        return sum(_count_rows(item) for item in body)
+    return 0
+
+
+def _read_cases(app_module, client):
+    """
+    (name, url) for every /api route, with query strings covering each
+    dam, range, format and subpage the dashboard uses.
+    """
+    cases = []
+    for dam in app_module.DAMS:
+        for range_key in app_module.DAILY_RANGE_DAYS:
+            for response_format in app_module.RESPONSE_FORMATS:
+                cases.append((
+                    f"elevation {dam} {range_key} {response_format}",
+                    f"/api/elevation?dam={dam}&range={range_key}&format={response_format}",
+                ))
+                cases.append((
+                    f"release/daily {dam} {range_key} {response_format}",
+                    f"/api/release/daily?dam={dam}&range={range_key}&format={response_format}",
+                ))
+        cases.append((f"elevation {dam} 5y max_points=400", f"/api/elevation?dam={dam}&range=5y&max_points=400"))
+
+    for path in app_module.LAKE_DAILY_METRIC_ROUTES:
+        for range_key in app_module.DAILY_RANGE_DAYS:
+            cases.append((f"{path[len('/api/'):]} {range_key}", f"{path}?range={range_key}"))
+
+    for dam in app_module.HOURLY_DAMS:
+        dates = client.get(f"/api/release/hourly/dates?dam={dam}").get_json()["dates"]
+        cases.append((f"release/hourly/dates {dam}", f"/api/release/hourly/dates?dam={dam}"))
+        if dates:
+            cases.append((f"release/hourly {dam}", f"/api/release/hourly?dam={dam}&date={dates[-1]}"))
+            cases.append((
+                f"release/hourly/rollup {dam} month",
+                f"/api/release/hourly/rollup?dam={dam}&start={dates[0]}&end={dates[-1]}&period=month",
+            ))
+
+        dates = client.get(f"/api/energy/hourly/units/dates?dam={dam}").get_json()["dates"]
+        cases.append((f"energy/hourly/units/dates {dam}", f"/api/energy/hourly/units/dates?dam={dam}"))
+        if dates:
+            cases.append((f"energy/hourly/units {dam}", f"/api/energy/hourly/units?dam={dam}&date={dates[-1]}"))
+            cases.append((
+                f"energy/hourly/units/rollup {dam} day",
+                f"/api/energy/hourly/units/rollup?dam={dam}&start={dates[0]}&end={dates[-1]}&period=day",
+            ))
+
+    months = client.get("/api/24ms/months").get_json()
+    cases.append(("24ms/months", "/api/24ms/months"))
+    if months:
+        for dam in app_module.DAMS:
+            cases.append((f"24ms {dam} elevation", f"/api/24ms?dam={dam}&variable=elevation&month={months[0]}"))
+
+    for lake_slug in app_module.LAKES:
+        for subpage in app_module.SUBPAGES:
+            cases.append((
+                f"dashboard {lake_slug} {subpage}",
+                f"/api/dashboard?lake={lake_slug}&subpage={subpage}&format=columnar",
+            ))
+
+    return cases
+
+
+def _uncovered_api_routes(app_module, cases):
+    covered = {url.split("?", 1)[0] for _, url in cases}
+    return sorted(
+        rule.rule for rule in app_module.app.url_map.iter_rules()
+        if rule.rule.startswith("/api/") and rule.rule not in covered
+    )
+
+
+def _time_request(client, method, url, headers):
+    t0 = time.perf_counter()
+    response = getattr(client, method)(url, headers=headers)
+    elapsed = time.perf_counter() - t0
+    return response, elapsed
+
+
+def run(years=5, hourly_years=1, vintages=200, studies=36, repeat=20, db_path=None,
+        layout="text", accept_encoding="gzip, br"):
+    workdir = None
+    if db_path is None:
+        workdir = tempfile.mkdtemp(prefix="lakeprojections-bench-")
+        db_path = os.path.join(workdir, "bench.db")
+
+    database = generate(db_path, years, hourly_years, vintages, studies)
+
+    fake_hdb, hdb_url = start_fake_hdb()
+
+    # main resolves its DB path, token and HDB URL at import time.
+    os.environ["LAKEPROJECTIONS_DB_PATH"] = db_path
+    os.environ["UPDATE_TOKEN"] = UPDATE_TOKEN
+    os.environ["HDB_BASE_URL"] = hdb_url
+    if "main" in sys.modules:
+        raise RuntimeError("bench.endpoints must import main itself; run it as `python -m bench.endpoints`")
+    import main as app_module
+
+    client = app_module.app.test_client()
+    auth = {"X-Update-Token": UPDATE_TOKEN}
+    report = {
+        "config": {
+            "years": years,
+            "hourly_years": hourly_years,
+            "vintages": vintages,
+            "studies": studies,
+            "repeat": repeat,
+            "layout": layout,
+            "accept_encoding": accept_encoding,
+        },
+        "database": database,
+        "setup": {},
+        "ingest": {},
+        "routes": {},
+    }
+
+    try:
+        if layout != "text":
+            t0 = time.perf_counter()
+            copied = app_module.migrate_time_series_storage(app_module.get_db_connection(), layout)
+            report["setup"]["migrate_storage"] = {
+                "seconds": round(time.perf_counter() - t0, 3),
+                "rows": sum(copied.values()),
+            }
+
+        response, elapsed = _time_request(client, "post", "/internal/db/indexes", auth)
+        report["setup"]["db_indexes"] = {"status": response.status_code, "seconds": round(elapsed, 3)}
+
+        history_end = datetime.strptime(database["history_end"], "%Y-%m-%d")
+        backfill_start = (history_end - timedelta(days=30)).strftime("%Y-%m-%d")
+        jobs = list(INGEST_JOBS) + [
+            f"/internal/backfill?target=historic_hourly&start={backfill_start}&end={database['history_end']}",
+            "/internal/maintenance/forecast-retention",
+        ]
+        for url in jobs:
+            separator = "&" if "?" in url else "?"
+            response, elapsed = _time_request(client, "post", f"{url}{separator}wait=1", auth)
+            body = response.get_json(silent=True) or {}
+            rows = _count_rows(body)
+            report["ingest"][url.split("?", 1)[0]] = {
+                "status": response.status_code,
+                "seconds": round(elapsed, 3),
+                "rows": rows,
+                "rows_per_second": round(rows / elapsed) if elapsed else None,
+            }
+
+        cases = _read_cases(app_module, client)
+        report["uncovered_api_routes"] = _uncovered_api_routes(app_module, cases)
+        headers = {"Accept-Encoding": accept_encoding} if accept_encoding else {}
+
+        for name, url in cases:
+            cold = []
+            warm = []
+            for _ in range(repeat):
+                app_module.invalidate_data_caches()
+                response, elapsed = _time_request(client, "get", url, headers)
+                cold.append(elapsed)
+            for _ in range(repeat):
+                response, elapsed = _time_request(client, "get", url, headers)
+                warm.append(elapsed)
+            report["routes"][name] = {
+                "url": url,
+                "status": response.status_code,
+                "bytes": len(response.get_data()),
+                "content_encoding": response.headers.get("Content-Encoding"),
+                "cold": _latency_summary(cold),
+                "warm": _latency_summary(warm),
+            }
+    finally:
+        fake_hdb.shutdown()
+
+    report["peak_rss_bytes"] = _peak_rss_bytes()
+    if workdir:
+        report["database"]["path"] = None
+    return report
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Route and ingest benchmark on a synthetic database")
+    parser.add_argument("--years", type=float, default=5, help="Years of daily history.")
+    parser.add_argument("--hourly-years", type=float, default=1, help="Years of hourly history.")
+    parser.add_argument("--vintages", type=int, default=200, help="Forecast vintages per forecast table.")
+    parser.add_argument("--studies", type=int, default=36, help="Monthly 24MS studies.")
+    parser.add_argument("--repeat", type=int, default=20, help="Cold and warm requests per route.")
+    parser.add_argument("--db", default=None, help="Keep the generated database at this path.")
+    parser.add_argument("--layout", choices=("text", "epoch"), default="text",
+                        help="Time-series storage layout to benchmark.")
+    parser.add_argument("--accept-encoding", default="gzip, br",
+                        help="Accept-Encoding sent on /api requests ('' for identity).")
+    parser.add_argument("--output", default=None, help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args()
+
+    report = run(
+        args.years, args.hourly_years, args.vintages, args.studies, args.repeat,
+        args.db, args.layout, args.accept_encoding,
+    )
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,71 @@
+"""
+Query-plan regression check on a synthetic database.
+
+Generates a database with bench.synthetic_db, prepares it the way a
+deploy does (/internal/db/indexes), optionally migrates it to the epoch
+layout, then runs main.check_query_plans over every statement in
+main.SQL_STATEMENTS. Prints the JSON report and exits non-zero when any
+statement scans a table or sorts in a temp B-tree outside what
+main.SQL_PLAN_ALLOWED permits. .github/workflows/query-plans.yml runs it
+for both layouts on every push and pull request.
+
+    python -m bench.query_plans --years 5 --vintages 200 --layout epoch
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from bench.synthetic_db import generate
+
+UPDATE_TOKEN = "bench"
+
+
+def run(years=5, hourly_years=1, vintages=200, studies=36, layout="text", db_path=None):
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="lakeprojections-plans-"), "plans.db")
+    database = generate(db_path, years, hourly_years, vintages, studies)
+
+    # main resolves its DB path and token at import time.
+    os.environ["LAKEPROJECTIONS_DB_PATH"] = db_path
+    os.environ["UPDATE_TOKEN"] = UPDATE_TOKEN
+    if "main" in sys.modules:
+        raise RuntimeError("bench.query_plans must import main itself; run it as `python -m bench.query_plans`")
+    import main as app_module
+
+    if layout != "text":
+        app_module.migrate_time_series_storage(app_module.get_db_connection(), layout)
+
+    response = app_module.app.test_client().post("/internal/db/indexes", headers={"X-Update-Token": UPDATE_TOKEN})
+    if response.status_code != 200:
+        raise RuntimeError(f"/internal/db/indexes failed: {response.status_code} {response.get_data(as_text=True)}")
+
+    results = app_module.check_query_plans()
+    return {
+        "layout": app_module.time_series_layout(),
+        "database": {"rows": database["rows"], "size_bytes": database["size_bytes"]},
+        "failing": [result["name"] for result in results if result["failures"]],
+        "results": results,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="EXPLAIN QUERY PLAN check on a synthetic database")
+    parser.add_argument("--years", type=float, default=5, help="Years of daily history.")
+    parser.add_argument("--hourly-years", type=float, default=1, help="Years of hourly history.")
+    parser.add_argument("--vintages", type=int, default=200, help="Forecast vintages per forecast table.")
+    parser.add_argument("--studies", type=int, default=36, help="Monthly 24MS studies.")
+    parser.add_argument("--layout", choices=("text", "epoch"), default="text",
+                        help="Time-series storage layout to check.")
+    parser.add_argument("--db", default=None, help="Keep the generated database at this path.")
+    args = parser.parse_args()
+
+    report = run(args.years, args.hourly_years, args.vintages, args.studies, args.layout, args.db)
+    print(json.dumps(report, indent=2))
+    if report["failing"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,215 @@
+"""
+Synthetic database generator.
+
+Builds a SQLite file with the exact schema of data/old_lakeprojections.db
+(copied from its sqlite_master) filled at a configurable scale: years of
+daily and hourly history, a run of forecast vintages for both forecast
+tables, and monthly 24MS studies. Values come from
+tools/fake_hdb.synthetic_value, so update jobs run against the fake HDB
+line up with the generated history.
+
+History stops --gap-days before today so the update jobs have something
+to fetch when bench.endpoints drives them.
+
+    python -m bench.synthetic_db --out /tmp/bench.db --years 5 --vintages 200 --studies 36
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from tools.fake_hdb import synthetic_value
+
+TEMPLATE_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "old_lakeprojections.db")
+
+# Mirrors main.DAILY_SDIS / main.HOURLY_SDIS; kept here so generating a
+# database does not import the app (which resolves its DB path on import).
+DAILY_SDIS = [1930, 1863, 2070, 2100, 2166, 2071, 2101, 2146, 2072]
+HOURLY_SDIS = [2166, 2146, 14163, 14164, 14165, 14166, 14167, 14168, 14169, 14170, 14171]
+
+REFERENCE_TABLES = ("Reservoirs", "Measures", "sdid_mapping")
+STUDY_SCENARIOS = ("Most", "Min", "Max")
+STUDY_MONTHS = 24
+DAILY_FORECAST_DAYS = 90
+HOURLY_FORECAST_DAYS = 8
+FIRST_MR_ID = 5000
+
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def _copy_schema(conn, template_path):
+    template = sqlite3.connect(template_path)
+    try:
+        statements = [
+            row[0] for row in template.execute(
+                "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' ORDER BY rowid"
+            )
+        ]
+        reference_rows = {
+            table_name: template.execute(f'SELECT * FROM "{table_name}"').fetchall()
+            for table_name in REFERENCE_TABLES
+        }
+    finally:
+        template.close()
+
+    for statement in statements:
+        conn.execute(statement)
+
+    for table_name, rows in reference_rows.items():
+        if rows:
+            placeholders = ",".join(["?"] * len(rows[0]))
+            conn.executemany(f'INSERT INTO "{table_name}" VALUES ({placeholders})', rows)
+
+
+def _daily_history(sdis, first_day, last_day):
+    day = first_day
+    while day <= last_day:
+        stamp = day.strftime(ISO_FORMAT)
+        for sd_id in sdis:
+            yield stamp, sd_id, synthetic_value(sd_id, day)
+        day += timedelta(days=1)
+
+
+def _hourly_history(sdis, first_hour, last_hour):
+    hour = first_hour
+    while hour <= last_hour:
+        stamp = hour.strftime(ISO_FORMAT)
+        for sd_id in sdis:
+            yield stamp, sd_id, synthetic_value(sd_id, hour)
+        hour += timedelta(hours=1)
+
+
+def _forecast_vintages(sdis, last_accessed, vintages, step, horizon):
+    """
+    Forecast rows for `vintages` runs spaced 12 hours apart, newest at
+    last_accessed, each covering `horizon` from the day it was taken.
+    """
+    for index in range(vintages):
+        accessed = last_accessed - timedelta(hours=12 * index)
+        accessed_stamp = accessed.strftime(ISO_FORMAT)
+        start = accessed.replace(hour=0, minute=0, second=0)
+        current = start
+        while current < start + horizon:
+            stamp = current.strftime(ISO_FORMAT)
+            for sd_id in sdis:
+                yield stamp, sd_id, accessed_stamp, synthetic_value(sd_id, current, "M")
+            current += step
+
+
+def _study_runs(first_month, studies):
+    month = first_month
+    mr_id = FIRST_MR_ID
+    for _ in range(studies):
+        for scenario in STUDY_SCENARIOS:
+            yield mr_id, month, scenario
+            mr_id += 1
+        month = (month - timedelta(days=1)).replace(day=1)
+
+
+def _study_rows(sdis, runs):
+    offsets = {"Most": 0.0, "Min": -15.0, "Max": 15.0}
+    for mr_id, month, scenario in runs:
+        current = month
+        for _ in range(STUDY_MONTHS):
+            # 24MS points sit on month ends.
+            next_month = (current + timedelta(days=32)).replace(day=1)
+            point = next_month - timedelta(days=1)
+            stamp = point.strftime(ISO_FORMAT)
+            for sd_id in sdis:
+                yield stamp, sd_id, mr_id, round(synthetic_value(sd_id, point, "M") + offsets[scenario], 2)
+            current = next_month
+
+
+def generate(path, years=5, hourly_years=1, vintages=200, studies=36, gap_days=7,
+             template_path=TEMPLATE_DB_PATH, today=None):
+    """
+    Write a fresh synthetic database to path and return a summary with
+    per-table row counts and timings.
+    """
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    today = today or datetime.now(ZoneInfo("America/Phoenix")).replace(tzinfo=None)
+    today = today.replace(hour=0, minute=0, second=0, microsecond=0)
+    last_day = today - timedelta(days=gap_days)
+    last_accessed = (today - timedelta(days=1)).replace(hour=21, minute=5)
+
+    t0 = time.perf_counter()
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+
+    _copy_schema(conn, template_path)
+
+    conn.executemany(
+        "INSERT INTO historic_daily_data (historic_datetime, sd_id, value) VALUES (?, ?, ?)",
+        _daily_history(DAILY_SDIS, last_day - timedelta(days=round(365.25 * years)), last_day),
+    )
+    conn.executemany(
+        "INSERT INTO historic_hourly_data (historic_datetime, sd_id, value) VALUES (?, ?, ?)",
+        _hourly_history(
+            HOURLY_SDIS,
+            last_day - timedelta(days=round(365.25 * hourly_years)),
+            last_day + timedelta(hours=23),
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO forecasted_daily_data (forecasted_datetime, sd_id, datetime_accessed, value) VALUES (?, ?, ?, ?)",
+        _forecast_vintages(DAILY_SDIS, last_accessed, vintages, timedelta(days=1), timedelta(days=DAILY_FORECAST_DAYS)),
+    )
+    conn.executemany(
+        "INSERT INTO forecasted_hourly_data (forecasted_datetime, sd_id, datetime_accessed, value) VALUES (?, ?, ?, ?)",
+        _forecast_vintages(HOURLY_SDIS, last_accessed, vintages, timedelta(hours=1), timedelta(days=HOURLY_FORECAST_DAYS)),
+    )
+
+    runs = list(_study_runs(today.replace(day=1), studies))
+    conn.executemany(
+        "INSERT INTO mrid_mapping (mr_id, run_name) VALUES (?, ?)",
+        [(mr_id, f"{month.strftime('%B %Y')} 24MS {scenario}") for mr_id, month, scenario in runs],
+    )
+    conn.executemany(
+        "INSERT INTO forecasted_24ms_data (forecasted_datetime, sd_id, mr_id, value) VALUES (?, ?, ?, ?)",
+        _study_rows(DAILY_SDIS, runs),
+    )
+    conn.commit()
+
+    tables = [
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )
+    ]
+    rows = {table_name: conn.execute(f'SELECT COUNT(*) FROM "{table_name}"').fetchone()[0] for table_name in tables}
+    conn.close()
+
+    elapsed = time.perf_counter() - t0
+    total_rows = sum(rows.values())
+    return {
+        "path": path,
+        "history_end": last_day.strftime("%Y-%m-%d"),
+        "rows": rows,
+        "size_bytes": os.path.getsize(path),
+        "generate_seconds": round(elapsed, 3),
+        "rows_per_second": round(total_rows / elapsed) if elapsed else None,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Synthetic lakeprojections database generator")
+    parser.add_argument("--out", required=True, help="Database file to (re)create.")
+    parser.add_argument("--years", type=float, default=5, help="Years of daily history.")
+    parser.add_argument("--hourly-years", type=float, default=1, help="Years of hourly history.")
+    parser.add_argument("--vintages", type=int, default=200, help="Forecast vintages per forecast table.")
+    parser.add_argument("--studies", type=int, default=36, help="Monthly 24MS studies.")
+    parser.add_argument("--gap-days", type=int, default=7, help="Days between the end of history and today.")
+    args = parser.parse_args()
+    print(json.dumps(generate(
+        args.out, args.years, args.hourly_years, args.vintages, args.studies, args.gap_days
+    ), indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,77 @@
+"""
+Micro-benchmark: HDB timestamp conversion.
+
+Compares the original strptime/strftime round trip with main._hdb_time_to_iso,
+both cold (memo cache cleared, every timestamp unique) and on a realistic
+update payload where each hourly timestamp repeats once per SDI.
+
+    python -m bench.timestamps --days 365 --sdis 11
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+import main
+
+
+def _hdb_timestamps(days):
+    start = datetime(2024, 1, 1)
+    stamps = []
+    for hour in range(days * 24):
+        dt = start + timedelta(hours=hour)
+        hour_12 = dt.hour % 12 or 12
+        meridiem = "AM" if dt.hour < 12 else "PM"
+        stamps.append(f"{dt.month}/{dt.day}/{dt.year} {hour_12}:{dt.minute:02d}:{dt.second:02d} {meridiem}")
+    return stamps
+
+
+def _strptime_path(value):
+    dt = datetime.strptime(value, "%m/%d/%Y %I:%M:%S %p")
+    return dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _time_it(convert, values, repeat):
+    best = None
+    for _ in range(repeat):
+        main._hdb_time_to_iso.cache_clear()
+        t0 = time.perf_counter()
+        for value in values:
+            convert(value)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(days=365, sdis=11, repeat=3):
+    unique = _hdb_timestamps(days)
+    payload = unique * sdis
+
+    assert all(_strptime_path(v) == main._hdb_time_to_iso(v) for v in unique)
+
+    results = {}
+    for name, values in (("unique", unique), ("payload", payload)):
+        baseline = _time_it(_strptime_path, values, repeat)
+        fast = _time_it(main._hdb_time_to_iso, values, repeat)
+        results[name] = {
+            "points": len(values),
+            "strptime_seconds": round(baseline, 4),
+            "fast_path_seconds": round(fast, 4),
+            "strptime_points_per_second": round(len(values) / baseline),
+            "fast_path_points_per_second": round(len(values) / fast),
+            "speedup": round(baseline / fast, 1),
+        }
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="HDB timestamp conversion benchmark")
+    parser.add_argument("--days", type=int, default=365, help="Hourly timestamps to generate, in days.")
+    parser.add_argument("--sdis", type=int, default=11, help="Series repeating each timestamp.")
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of repetitions.")
+    args = parser.parse_args()
+    print(json.dumps(run(args.days, args.sdis, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,384 @@
+"""
+Client for the USBR HDB web service (hdb.pl).
+
+Every update job and the backfill talk to HDB through one HdbClient so
+they share pooled keep-alive connections, the same retry policy and the
+same timing metrics. The transport is pluggable: anything with a
+get(url, params, timeout, stream=False, headers=None) method returning a
+requests-style response works, which is how a local stub or
+tools/fake_hdb.py stand in for HDB. headers is only passed for
+conditional requests.
+
+Conditional requests are opt-in per call. The client remembers the ETag
+and Last-Modified HDB sent for a request once the caller confirm()s the
+data is stored, sends them back as If-None-Match / If-Modified-Since
+next time, and reports a 304 as "no new data" (None). Responses without
+validators are simply fetched in full every time.
+"""
+import codecs
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+import requests
+
+DEFAULT_BASE_URL = "https://www.usbr.gov/pn-bin/hdb/hdb.pl"
+
+
+class HdbError(Exception):
+    """Raised when an HDB request still fails after all retries."""
+
+
+@dataclass(frozen=True)
+class HdbRequest:
+    sdis: tuple
+    tstp: str
+    t1: str
+    t2: str
+    table: str = "R"
+    mrid: int = 0
+    svr: str = "lchdb"
+
+    def __post_init__(self):
+        if self.tstp not in ("DY", "HR"):
+            raise ValueError(f"Unsupported tstp: {self.tstp}")
+        if self.table not in ("R", "M"):
+            raise ValueError(f"Unsupported table: {self.table}")
+        if not self.sdis:
+            raise ValueError("At least one SDI is required")
+        object.__setattr__(self, "sdis", tuple(int(sd_id) for sd_id in self.sdis))
+
+    def params(self):
+        return {
+            "svr": self.svr,
+            "sdi": ",".join(str(sd_id) for sd_id in self.sdis),
+            "tstp": self.tstp,
+            "t1": self.t1,
+            "t2": self.t2,
+            "table": self.table,
+            "mrid": self.mrid,
+            "format": "json",
+        }
+
+
+class SessionTransport:
+    """
+    requests-backed transport with one pooled Session per thread, so
+    concurrent backfill workers never share a connection pool.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._local.session = session
+        return session
+
+    def get(self, url, params, timeout, stream=False, headers=None):
+        return self._session().get(url, params=params, timeout=timeout, stream=stream, headers=headers)
+
+
+class HdbClient:
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, transport=None, timeout=60,
+                 retries=2, backoff_seconds=1.0, metrics_size=200, validators_size=256):
+        self.base_url = base_url
+        self.transport = transport or SessionTransport()
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self._metrics = deque(maxlen=metrics_size)
+        self._metrics_lock = threading.Lock()
+        self._validators = OrderedDict()
+        self._pending_validators = {}
+        self._validators_size = validators_size
+        self._validators_lock = threading.Lock()
+
+    def open(self, hdb_request, retries=None, backoff_seconds=None, stream=False, conditional=False):
+        """
+        Return the raw response for hdb_request (body not yet read), or None
+        when a conditional request comes back 304 Not Modified.
+        Retries transport errors and non-2xx statuses with exponential backoff.
+        """
+        retries = self.retries if retries is None else retries
+        backoff_seconds = self.backoff_seconds if backoff_seconds is None else backoff_seconds
+        params = hdb_request.params()
+        key = tuple(sorted(params.items()))
+        extra = {}
+        if conditional:
+            with self._validators_lock:
+                headers = self._validators.get(key)
+            if headers:
+                extra["headers"] = dict(headers)
+
+        t0 = time.perf_counter()
+        last_error = None
+        for attempt in range(retries + 1):
+            if attempt:
+                time.sleep(backoff_seconds * (2 ** (attempt - 1)))
+            try:
+                response = self.transport.get(
+                    self.base_url, params=params, timeout=self.timeout, stream=stream, **extra
+                )
+                response.raise_for_status()
+            except requests.RequestException as e:
+                last_error = e
+                continue
+
+            if getattr(response, "status_code", 200) == 304:
+                if hasattr(response, "close"):
+                    response.close()
+                self._record(hdb_request, attempt + 1, time.perf_counter() - t0, "not_modified")
+                return None
+
+            if conditional:
+                self._hold_validators(key, getattr(response, "headers", None) or {})
+            self._record(hdb_request, attempt + 1, time.perf_counter() - t0, "ok")
+            return response
+
+        self._record(hdb_request, retries + 1, time.perf_counter() - t0, "failed")
+        raise HdbError(f"HDB request failed after {retries + 1} attempt(s): {last_error}")
+
+    def fetch(self, hdb_request, retries=None, backoff_seconds=None, conditional=False):
+        """
+        Fetch and decode the JSON document for hdb_request; None when a
+        conditional request was not modified.
+        """
+        response = self.open(hdb_request, retries=retries, backoff_seconds=backoff_seconds, conditional=conditional)
+        if response is None:
+            return None
+        try:
+            return response.json()
+        except ValueError as e:
+            raise HdbError(f"HDB returned invalid JSON: {e}")
+
+    def stream_points(self, hdb_request, retries=None, backoff_seconds=None, chunk_size=65536, conditional=False):
+        """
+        Open hdb_request and return an iterator of (sdi, t, v) tuples parsed
+        incrementally off the response body, so memory stays flat no matter
+        how many points HDB sends. The request itself is made eagerly, so
+        connection failures raise here rather than on first iteration.
+        None when a conditional request was not modified.
+        """
+        response = self.open(
+            hdb_request, retries=retries, backoff_seconds=backoff_seconds, stream=True, conditional=conditional
+        )
+        if response is None:
+            return None
+
+        iter_content = getattr(response, "iter_content", None)
+        if iter_content is None:
+            # Stub transports may only offer json().
+            return iter_document_points(response.json())
+
+        return _iter_response_points(response, iter_content(chunk_size=chunk_size))
+
+    def confirm(self, hdb_request):
+        """
+        Remember the validators of the last conditional response for
+        hdb_request. Call once its data is committed: until then a retry
+        must not be answered with 304.
+        """
+        key = tuple(sorted(hdb_request.params().items()))
+        with self._validators_lock:
+            headers = self._pending_validators.pop(key, None)
+            if headers is None:
+                return
+            self._validators[key] = headers
+            self._validators.move_to_end(key)
+            while len(self._validators) > self._validators_size:
+                self._validators.popitem(last=False)
+
+    def _hold_validators(self, key, response_headers):
+        headers = {}
+        if response_headers.get("ETag"):
+            headers["If-None-Match"] = response_headers["ETag"]
+        if response_headers.get("Last-Modified"):
+            headers["If-Modified-Since"] = response_headers["Last-Modified"]
+        with self._validators_lock:
+            if headers:
+                self._pending_validators[key] = headers
+            else:
+                # Nothing to revalidate with: forget any older validators too.
+                self._pending_validators.pop(key, None)
+                self._validators.pop(key, None)
+
+    def _record(self, hdb_request, attempts, elapsed_seconds, status):
+        with self._metrics_lock:
+            self._metrics.append({
+                "tstp": hdb_request.tstp,
+                "table": hdb_request.table,
+                "sdi_count": len(hdb_request.sdis),
+                "t1": hdb_request.t1,
+                "t2": hdb_request.t2,
+                "attempts": attempts,
+                "elapsed_seconds": round(elapsed_seconds, 3),
+                "status": status,
+            })
+
+    def recent_metrics(self):
+        with self._metrics_lock:
+            return list(self._metrics)
+
+    def last_metric(self):
+        with self._metrics_lock:
+            return dict(self._metrics[-1]) if self._metrics else None
+
+
+# ==============================
+# STREAMING PARSER
+# ==============================
+
+def iter_document_points(data):
+    """
+    (sdi, t, v) tuples from an already-decoded HDB document.
+    """
+    for series in data.get("Series", []):
+        sdi = series.get("SDI")
+        for point in series.get("Data", []):
+            yield sdi, point.get("t"), point.get("v")
+
+
+def _iter_response_points(response, byte_chunks):
+    decoder = codecs.getincrementaldecoder("utf-8")()
+
+    def text_chunks():
+        for chunk in byte_chunks:
+            if chunk:
+                yield decoder.decode(chunk)
+        yield decoder.decode(b"", final=True)
+
+    try:
+        yield from iter_stream_points(text_chunks())
+    except ValueError as e:
+        raise HdbError(f"HDB returned invalid JSON: {e}")
+    finally:
+        response.close()
+
+
+class _JsonStream:
+    """
+    Just enough of a pull parser to walk HDB's fixed document shape.
+    Small values (keys, scalars, single points) are decoded with
+    json.raw_decode; the buffer only ever holds the unconsumed tail.
+    """
+
+    _WHITESPACE = " \t\r\n"
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._exhausted = False
+
+    def _fill(self):
+        for chunk in self._chunks:
+            if chunk:
+                self._buf = self._buf[self._pos:] + chunk
+                self._pos = 0
+                return True
+        self._exhausted = True
+        return False
+
+    def peek(self):
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in self._WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if self._exhausted or not self._fill():
+                return None
+
+    def expect(self, *chars):
+        char = self.peek()
+        if char not in chars:
+            raise ValueError(f"expected one of {chars!r}, found {char!r}")
+        self._pos += 1
+        return char
+
+    def value(self):
+        if self.peek() is None:
+            raise ValueError("unexpected end of document")
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._exhausted or not self._fill():
+                    raise
+                continue
+            # A number that ends exactly at the buffer edge may continue in
+            # the next chunk, so only trust it once more input is seen.
+            if end == len(self._buf) and not self._exhausted and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def members(self):
+        """
+        Walk an object: yields each key with the stream positioned at its
+        value. The caller must consume the value before resuming.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.expect(",", "}") == "}":
+                return
+
+    def elements(self):
+        """
+        Walk an array: yields once per element, positioned at it.
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield
+            if self.expect(",", "]") == "]":
+                return
+
+
+def iter_stream_points(text_chunks):
+    """
+    (sdi, t, v) tuples from an HDB JSON document supplied as text chunks.
+    Points that arrive before their series' SDI are held until it is seen.
+    """
+    stream = _JsonStream(text_chunks)
+
+    for key in stream.members():
+        if key != "Series":
+            stream.value()
+            continue
+
+        for _ in stream.elements():
+            sdi = None
+            pending = []
+            for series_key in stream.members():
+                if series_key == "SDI":
+                    sdi = stream.value()
+                    for t, v in pending:
+                        yield sdi, t, v
+                    pending = []
+                elif series_key == "Data":
+                    for _ in stream.elements():
+                        point = stream.value()
+                        if sdi is None:
+                            pending.append((point.get("t"), point.get("v")))
+                        else:
+                            yield sdi, point.get("t"), point.get("v")
+                else:
+                    stream.value()
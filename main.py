@@ -1,12 +1,24 @@
 from flask import Flask, jsonify, request
 import sqlite3
 import os
-import requests
 import time
 import re
-from datetime import datetime, timedelta
-from flask import render_template, abort, redirect, url_for
+import gzip
+import json
+import hashlib
+import threading
+import click
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from collections import OrderedDict, deque
+from types import MappingProxyType
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from flask import render_template, abort, redirect, url_for, g, has_request_context
 from zoneinfo import ZoneInfo
+from hdb_client import HdbClient, HdbRequest, iter_document_points
 
 app = Flask(__name__)
 print("MAIN.PY LOADED")
@@ -39,6 +51,25 @@ def _resolve_db_path():
 DB_PATH = _resolve_db_path()
 print("DB PATH EXISTS:", os.path.exists(DB_PATH))
 UPDATE_TOKEN = os.environ.get("UPDATE_TOKEN")
+HDB_BASE_URL = os.environ.get("HDB_BASE_URL", "https://www.usbr.gov/pn-bin/hdb/hdb.pl")
+
+hdb_client = HdbClient(base_url=HDB_BASE_URL)
+
+# SDIs requested from HDB by the daily and hourly update jobs.
+DAILY_SDIS = [1930, 1863, 2070, 2100, 2166, 2071, 2101, 2146, 2072]
+HOURLY_SDIS = [2166, 2146, 14163, 14164, 14165, 14166, 14167, 14168, 14169, 14170, 14171]
+INGEST_BATCH_SIZE = int(os.environ.get("LAKEPROJECTIONS_INGEST_BATCH_SIZE", "5000"))
+STITCHED_CACHE_MAX_ENTRIES = int(os.environ.get("LAKEPROJECTIONS_STITCHED_CACHE_SIZE", "64"))
+
+# Forecast vintage retention: keep every run for keep_all_days, then the
+# newest run per day until keep_daily_days, then the newest run per ISO
+# week until keep_weekly_days. Older runs are deleted.
+FORECAST_RETENTION_DEFAULTS = {
+    "keep_all_days": int(os.environ.get("LAKEPROJECTIONS_RETENTION_KEEP_ALL_DAYS", "7")),
+    "keep_daily_days": int(os.environ.get("LAKEPROJECTIONS_RETENTION_KEEP_DAILY_DAYS", "60")),
+    "keep_weekly_days": int(os.environ.get("LAKEPROJECTIONS_RETENTION_KEEP_WEEKLY_DAYS", "730")),
+    "batch_size": int(os.environ.get("LAKEPROJECTIONS_RETENTION_BATCH_SIZE", "5000")),
+}
 
 LAKES = {
     "lake-mead": {"dam": "hoover", "lake_name": "Lake Mead", "dam_name": "Hoover Dam"},
@@ -101,6 +132,56 @@ def _parse_db_datetime(value):
     return datetime.fromisoformat(value)
 
 
+def _hdb_time_fields(value):
+    """
+    Split "M/D/YYYY H:MM:SS AM" into ints, or None if it is not exactly that shape.
+    """
+    parts = value.split(" ")
+    if len(parts) != 3 or parts[2] not in ("AM", "PM"):
+        return None
+
+    date_fields = parts[0].split("/")
+    time_fields = parts[1].split(":")
+    if len(date_fields) != 3 or len(time_fields) != 3:
+        return None
+
+    raw_fields = date_fields + time_fields
+    max_widths = (2, 2, 4, 2, 2, 2)
+    for raw, max_width in zip(raw_fields, max_widths):
+        if not (raw.isascii() and raw.isdigit() and 0 < len(raw) <= max_width):
+            return None
+    if len(date_fields[2]) != 4:
+        return None
+
+    return [int(raw) for raw in raw_fields] + [parts[2]]
+
+
+@lru_cache(maxsize=65536)
+def _hdb_time_to_iso(value):
+    """
+    Convert an HDB timestamp ("2/19/2026 1:00:00 PM") to our ISO layout.
+    Hand-rolled for the one format HDB emits and memoized, because every SDI
+    in a response repeats the same timestamps. Anything unusual goes through
+    strptime, which raises ValueError exactly as before.
+    """
+    fields = _hdb_time_fields(value)
+    if fields is not None:
+        month, day, year, hour, minute, second, meridiem = fields
+        if not (1 <= month <= 12 and 1 <= day <= 31 and 1 <= hour <= 12
+                and minute <= 59 and second <= 59):
+            fields = None
+
+    if fields is None:
+        return datetime.strptime(value, "%m/%d/%Y %I:%M:%S %p").strftime("%Y-%m-%dT%H:%M:%S")
+
+    if day > 28:
+        # Rejects 2/30 and friends the same way strptime would.
+        datetime(year, month, day)
+
+    hour = hour % 12 + (12 if meridiem == "PM" else 0)
+    return f"{year:04d}-{month:02d}-{day:02d}T{hour:02d}:{minute:02d}:{second:02d}"
+
+
 def _az_today_start_naive():
     """
     Return Arizona "today at 00:00:00" as a naive datetime so it aligns
@@ -110,34 +191,112 @@ def _az_today_start_naive():
     return datetime.combine(az_now.date(), datetime.min.time())
 
 
-def _upsert_historic_value(cursor, table_name, datetime_col, iso_dt, sd_id, value):
+def _iter_hdb_rows(points, stats, valid_sdids=None, log_skips=False):
     """
-    Keep historic rows in sync with BOR source values.
-    We update existing points first, then insert when missing.
+    Turn HDB (sdi, t, v) points into (iso_dt, sd_id, value) rows.
+    Points with a blank or unparseable value are counted in stats["skipped"];
+    series outside valid_sdids (when given) are ignored entirely.
     """
-    cursor.execute(
-        f"""
-        UPDATE {table_name}
-        SET value = ?
-        WHERE {datetime_col} = ?
-          AND sd_id = ?
-        """,
-        (value, iso_dt, sd_id),
-    )
+    for sdi, t, raw_value in points:
+        sd_id = int(sdi)
+        if valid_sdids is not None and sd_id not in valid_sdids:
+            continue
+        try:
+            iso_dt = _hdb_time_to_iso(t)
+            if raw_value in (None, ""):
+                raise ValueError("blank value")
+            yield iso_dt, sd_id, float(raw_value)
+        except Exception as e:
+            if log_skips:
+                print("Row skipped due to error:", e)
+            stats["skipped"] += 1
 
-    if cursor.rowcount:
-        return "updated"
 
-    cursor.execute(
-        f"""
-        INSERT INTO {table_name}
-        ({datetime_col}, sd_id, value)
-        VALUES (?, ?, ?)
-        """,
-        (iso_dt, sd_id, value),
-    )
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _bulk_upsert_historic(cursor, table_name, rows):
+    """
+    Keep historic rows in sync with BOR source values in one executemany.
+    Returns (inserted, updated); a point counts as updated when its key
+    already existed, either in the table or earlier in this batch.
+    """
+    if not rows:
+        return 0, 0
+
+    rows = [(_ts_param(iso_dt), sd_id, value) for iso_dt, sd_id, value in rows]
+
+    bounds = {}
+    for stored_dt, sd_id, _ in rows:
+        low, high = bounds.get(sd_id, (stored_dt, stored_dt))
+        bounds[sd_id] = (min(low, stored_dt), max(high, stored_dt))
+
+    seen = set()
+    for sd_id, (low, high) in bounds.items():
+        cursor.execute(_sql("historic.existing_keys", table_name), (sd_id, low, high))
+        seen.update((sd_id, row[0]) for row in cursor.fetchall())
+
+    inserted = 0
+    for stored_dt, sd_id, _ in rows:
+        if (sd_id, stored_dt) not in seen:
+            seen.add((sd_id, stored_dt))
+            inserted += 1
+
+    cursor.executemany(_sql("historic.upsert", table_name), rows)
+
+    return inserted, len(rows) - inserted
+
+
+def _bulk_insert_forecast(cursor, table_name, datetime_accessed, rows):
+    """
+    Append one batch of a forecast vintage, one executemany per sd_id so
+    rowcount gives exact per-sd_id counts for the forecast_vintages pointer.
+    Returns (inserted, inserted_by_sdid).
+    """
+    stored_accessed = _ts_param(datetime_accessed)
+    rows_by_sdid = {}
+    for iso_dt, sd_id, value in rows:
+        rows_by_sdid.setdefault(sd_id, []).append((_ts_param(iso_dt), sd_id, stored_accessed, value))
+
+    inserted_by_sdid = {}
+    for sd_id, sdid_rows in rows_by_sdid.items():
+        cursor.executemany(_sql("forecast.insert", table_name), sdid_rows)
+        inserted_by_sdid[sd_id] = max(cursor.rowcount, 0)
+
+    return sum(inserted_by_sdid.values()), inserted_by_sdid
+
 
-    return "inserted"
+def _stream_upsert_historic(cursor, table_name, rows, batch_size=INGEST_BATCH_SIZE):
+    """
+    Feed a row iterator through _bulk_upsert_historic in fixed-size batches,
+    so ingest memory does not grow with the requested range.
+    """
+    inserted = 0
+    updated = 0
+    for batch in _batched(rows, batch_size):
+        batch_inserted, batch_updated = _bulk_upsert_historic(cursor, table_name, batch)
+        inserted += batch_inserted
+        updated += batch_updated
+    return inserted, updated
+
+
+def _stream_insert_forecast(cursor, table_name, datetime_accessed, rows, batch_size=INGEST_BATCH_SIZE):
+    inserted = 0
+    inserted_by_sdid = {}
+    for batch in _batched(rows, batch_size):
+        batch_inserted, batch_by_sdid = _bulk_insert_forecast(cursor, table_name, datetime_accessed, batch)
+        inserted += batch_inserted
+        for sd_id, count in batch_by_sdid.items():
+            inserted_by_sdid[sd_id] = inserted_by_sdid.get(sd_id, 0) + count
+    return inserted, inserted_by_sdid
 
 def _parse_24ms_month_label(month_label):
     """
@@ -180,314 +339,2710 @@ def _parse_24ms_month_label(month_label):
 
 
 # ==============================
-# DATABASE
+# REQUEST METRICS
 # ==============================
+# Per-route latency and response-size histograms, cache hit/miss counters
+# and per-statement SQLite timings (execute plus fetch, via _TimedCursor on
+# every thread connection), served in Prometheus text format by
+# /internal/metrics. Statements slower than SLOW_QUERY_SECONDS are counted
+# by statement and route, printed, and kept with their parameters in a
+# short ring buffer served as JSON by /internal/metrics/slow-queries;
+# parameters never become metric labels.
+# Counters are per process; each gunicorn worker reports its own.
+
+METRICS_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRICS_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+METRICS_SQL_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+SLOW_QUERY_SECONDS = float(os.environ.get("LAKEPROJECTIONS_SLOW_QUERY_MS", "100")) / 1000
+SLOW_QUERY_LOG_SIZE = int(os.environ.get("LAKEPROJECTIONS_SLOW_QUERY_LOG_SIZE", "50"))
+# Distinct statements timed individually; any beyond this share "other".
+SQL_METRICS_MAX_STATEMENTS = int(os.environ.get("LAKEPROJECTIONS_SQL_METRICS_MAX_STATEMENTS", "300"))
+
+_metrics_lock = threading.Lock()
+_metrics = {
+    "request_seconds": {},      # (endpoint, method, status) -> histogram
+    "response_bytes": {},       # endpoint -> histogram
+    "request_sql": {},          # endpoint -> [seconds, statements]
+    "sql_seconds": {},          # statement -> histogram
+    "cache": {},                # (cache, "hit" | "miss") -> count
+    "slow_queries": {},         # (statement, endpoint) -> count
+}
+_slow_queries = deque(maxlen=SLOW_QUERY_LOG_SIZE)
 
-def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
 
-# ==============================
-# DATABASE ADD INDEX
-# ==============================
+def _observe(family, key, buckets, value):
+    # Caller holds _metrics_lock. counts[i] is the non-cumulative count
+    # for buckets[i]; the last slot is +Inf.
+    histogram = family.get(key)
+    if histogram is None:
+        histogram = family[key] = {"buckets": buckets, "counts": [0] * (len(buckets) + 1), "sum": 0.0}
+    histogram["counts"][bisect_left(buckets, value)] += 1
+    histogram["sum"] += value
 
-def ensure_indexes(conn):
+
+def _record_cache_lookup(cache_name, hit):
+    key = (cache_name, "hit" if hit else "miss")
+    with _metrics_lock:
+        _metrics["cache"][key] = _metrics["cache"].get(key, 0) + 1
+
+
+def _metrics_endpoint():
     """
-    Create indexes for faster time-series reads.
-    Safe to run repeatedly because we use IF NOT EXISTS.
+    Route template of the current request ("/api/release/hourly"), so the
+    label set stays bounded; None outside a request (background jobs).
     """
-    conn.executescript("""
-    -- =========================
-    -- HISTORIC DAILY
-    -- =========================
-    CREATE INDEX IF NOT EXISTS idx_historic_daily_dt
-        ON historic_daily_data (historic_datetime);
+    if not has_request_context():
+        return None
+    rule = request.url_rule
+    return rule.rule if rule is not None else "unmatched"
+
+
+@lru_cache(maxsize=1024)
+def _statement_label(sql):
+    return " ".join(sql.split())
+
+
+def _format_query_parameters(parameters):
+    text = parameters if isinstance(parameters, str) else repr(parameters)
+    return text if len(text) <= 500 else text[:497] + "..."
+
+
+def _record_query(sql, parameters, elapsed):
+    statement = _statement_label(sql)
+    endpoint = _metrics_endpoint()
+    if endpoint is not None:
+        g.sql_seconds = g.get("sql_seconds", 0.0) + elapsed
+        g.sql_statements = g.get("sql_statements", 0) + 1
+
+    slow = elapsed >= SLOW_QUERY_SECONDS
+    with _metrics_lock:
+        family = _metrics["sql_seconds"]
+        label = statement
+        if statement not in family and len(family) >= SQL_METRICS_MAX_STATEMENTS:
+            label = "other"
+        _observe(family, label, METRICS_SQL_BUCKETS, elapsed)
+        if slow:
+            key = (label, endpoint or "")
+            _metrics["slow_queries"][key] = _metrics["slow_queries"].get(key, 0) + 1
+
+    if slow:
+        params = _format_query_parameters(parameters)
+        _slow_queries.append({
+            "statement": statement,
+            "params": params,
+            "endpoint": endpoint or "",
+            "at": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S"),
+            "seconds": round(elapsed, 6),
+        })
+        print(f"Slow query ({elapsed * 1000:.1f} ms, {endpoint or 'background'}): {statement} params={params}")
 
-    CREATE INDEX IF NOT EXISTS idx_historic_daily_sdid_dt
-        ON historic_daily_data (sd_id, historic_datetime);
 
-    -- =========================
-    -- HISTORIC HOURLY
-    -- =========================
-    CREATE INDEX IF NOT EXISTS idx_historic_hourly_dt
-        ON historic_hourly_data (historic_datetime);
+class _TimedCursor(sqlite3.Cursor):
+    """
+    Cursor that reports each statement to the metrics. A statement's time
+    runs from execute() through fetchall()/fetchone() or the end of
+    iteration; statements without result rows are recorded at once.
+    """
 
-    CREATE INDEX IF NOT EXISTS idx_historic_hourly_sdid_dt
-        ON historic_hourly_data (sd_id, historic_datetime);
+    _pending = None
 
-    -- =========================
-    -- FORECASTED DAILY
-    -- =========================
-    CREATE INDEX IF NOT EXISTS idx_forecasted_daily_dt
-        ON forecasted_daily_data (forecasted_datetime);
+    def _finish(self):
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            _record_query(*pending)
 
-    CREATE INDEX IF NOT EXISTS idx_forecasted_daily_sdid_dt
-        ON forecasted_daily_data (sd_id, forecasted_datetime);
+    def _timed_fetch(self, fetch):
+        t0 = time.perf_counter()
+        try:
+            return fetch()
+        finally:
+            if self._pending is not None:
+                self._pending[2] += time.perf_counter() - t0
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        t0 = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        except Exception:
+            _record_query(sql, parameters, time.perf_counter() - t0)
+            raise
+        self._pending = [sql, parameters, time.perf_counter() - t0]
+        if self.description is None:
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        t0 = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record_query(sql, f"executemany rowcount={self.rowcount}", time.perf_counter() - t0)
 
-    CREATE INDEX IF NOT EXISTS idx_forecasted_daily_accessed
-        ON forecasted_daily_data (datetime_accessed);
+    def executescript(self, sql_script):
+        self._finish()
+        t0 = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            _record_query(sql_script, "script", time.perf_counter() - t0)
 
-    -- =========================
-    -- FORECASTED HOURLY
-    -- =========================
-    CREATE INDEX IF NOT EXISTS idx_forecasted_hourly_dt
-        ON forecasted_hourly_data (forecasted_datetime);
+    def fetchall(self):
+        rows = self._timed_fetch(super().fetchall)
+        self._finish()
+        return rows
 
-    CREATE INDEX IF NOT EXISTS idx_forecasted_hourly_sdid_dt
-        ON forecasted_hourly_data (sd_id, forecasted_datetime);
+    def fetchone(self):
+        row = self._timed_fetch(super().fetchone)
+        self._finish()
+        return row
 
-    CREATE INDEX IF NOT EXISTS idx_forecasted_hourly_accessed
-        ON forecasted_hourly_data (datetime_accessed);
+    def __next__(self):
+        try:
+            return self._timed_fetch(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+
+
+@app.before_request
+def _start_request_metrics():
+    # Registered ahead of every other hook so the timing covers them,
+    # including revalidations answered before the route runs.
+    g.metrics_started = time.perf_counter()
+
+
+@app.after_request
+def _record_request_metrics(response):
+    # after_request hooks run in reverse order, so this one runs last and
+    # sees the final (compressed) body.
+    started = g.pop("metrics_started", None)
+    if started is None:
+        return response
+
+    elapsed = time.perf_counter() - started
+    endpoint = _metrics_endpoint()
+    size = response.content_length
+    with _metrics_lock:
+        _observe(
+            _metrics["request_seconds"], (endpoint, request.method, str(response.status_code)),
+            METRICS_LATENCY_BUCKETS, elapsed,
+        )
+        if size is not None:
+            _observe(_metrics["response_bytes"], endpoint, METRICS_SIZE_BUCKETS, size)
+        sql = _metrics["request_sql"].setdefault(endpoint, [0.0, 0])
+        sql[0] += g.get("sql_seconds", 0.0)
+        sql[1] += g.get("sql_statements", 0)
+    return response
+
+
+def _prometheus_labels(**labels):
+    escaped = (
+        f'{name}="' + str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') + '"'
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _prometheus_histogram(lines, name, help_text, family, label_names):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, histogram in sorted(family.items(), key=lambda item: repr(item[0])):
+        values = key if isinstance(key, tuple) else (key,)
+        labels = dict(zip(label_names, values))
+        cumulative = 0
+        for le, count in zip(histogram["buckets"] + ("+Inf",), histogram["counts"]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_prometheus_labels(**labels, le=le)} {cumulative}")
+        lines.append(f"{name}_sum{_prometheus_labels(**labels)} {histogram['sum']:.6f}")
+        lines.append(f"{name}_count{_prometheus_labels(**labels)} {cumulative}")
+
+
+def render_prometheus_metrics():
+    with _metrics_lock:
+        snapshot = {
+            name: {key: dict(value, counts=list(value["counts"])) for key, value in family.items()}
+            for name, family in _metrics.items()
+            if name in ("request_seconds", "response_bytes", "sql_seconds")
+        }
+        request_sql = {endpoint: list(totals) for endpoint, totals in _metrics["request_sql"].items()}
+        cache = dict(_metrics["cache"])
+        slow_counts = dict(_metrics["slow_queries"])
+
+    lines = []
+    _prometheus_histogram(
+        lines, "lakeprojections_http_request_duration_seconds", "Request latency by route.",
+        snapshot["request_seconds"], ("endpoint", "method", "status"),
+    )
+    _prometheus_histogram(
+        lines, "lakeprojections_http_response_size_bytes", "Response body size (after compression) by route.",
+        snapshot["response_bytes"], ("endpoint",),
+    )
 
-    -- =========================
-    -- FORECASTED 24-MONTH STUDY
-    -- =========================
-    CREATE INDEX IF NOT EXISTS idx_forecasted_24ms_mrid_sdid_dt
-        ON forecasted_24ms_data (mr_id, sd_id, forecasted_datetime);
+    lines.append("# HELP lakeprojections_http_request_sql_seconds_total SQLite time spent inside requests, by route.")
+    lines.append("# TYPE lakeprojections_http_request_sql_seconds_total counter")
+    for endpoint, (seconds, _) in sorted(request_sql.items()):
+        lines.append(f"lakeprojections_http_request_sql_seconds_total{_prometheus_labels(endpoint=endpoint)} {seconds:.6f}")
+    lines.append("# HELP lakeprojections_http_request_sql_statements_total SQLite statements run inside requests, by route.")
+    lines.append("# TYPE lakeprojections_http_request_sql_statements_total counter")
+    for endpoint, (_, statements) in sorted(request_sql.items()):
+        lines.append(f"lakeprojections_http_request_sql_statements_total{_prometheus_labels(endpoint=endpoint)} {statements}")
+
+    lines.append("# HELP lakeprojections_cache_lookups_total In-process cache lookups by cache and result.")
+    lines.append("# TYPE lakeprojections_cache_lookups_total counter")
+    for (cache_name, result), count in sorted(cache.items()):
+        lines.append(f"lakeprojections_cache_lookups_total{_prometheus_labels(cache=cache_name, result=result)} {count}")
+
+    _prometheus_histogram(
+        lines, "lakeprojections_sqlite_query_duration_seconds", "SQLite statement time, execute through fetch.",
+        snapshot["sql_seconds"], ("statement",),
+    )
 
-    CREATE INDEX IF NOT EXISTS idx_forecasted_24ms_dt
-        ON forecasted_24ms_data (forecasted_datetime);
-    """)
+    lines.append(
+        f"# HELP lakeprojections_sqlite_slow_queries_total Statements slower than {SLOW_QUERY_SECONDS:g}s, "
+        "by statement and route."
+    )
+    lines.append("# TYPE lakeprojections_sqlite_slow_queries_total counter")
+    for (statement, endpoint), count in sorted(slow_counts.items()):
+        labels = _prometheus_labels(statement=statement, endpoint=endpoint)
+        lines.append(f"lakeprojections_sqlite_slow_queries_total{labels} {count}")
 
-# ==============================
-# SECURITY CHECK
-# ==============================
+    return "\n".join(lines) + "\n"
+
+
+@app.route("/internal/metrics", methods=["GET"])
+def internal_metrics():
+    if not authorize(request):
+        return jsonify({"error": "Unauthorized"}), 403
+
+    return app.response_class(render_prometheus_metrics(), mimetype="text/plain; version=0.0.4")
 
-def authorize(req):
-    token = req.headers.get("X-Update-Token")
-    return token == UPDATE_TOKEN
+
+@app.route("/internal/metrics/slow-queries", methods=["GET"])
+def internal_slow_queries():
+    if not authorize(request):
+        return jsonify({"error": "Unauthorized"}), 403
+
+    return jsonify({
+        "threshold_seconds": SLOW_QUERY_SECONDS,
+        "slow_queries": list(_slow_queries),
+    })
 
 
 # ==============================
-# HEALTH
+# DATABASE
 # ==============================
 
-@app.route("/")
-def home():
-    return render_template("home.html", **_page_context("home"))
+SQLITE_JOURNAL_MODE = os.environ.get("LAKEPROJECTIONS_SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_CACHE_KIB = int(os.environ.get("LAKEPROJECTIONS_SQLITE_CACHE_KIB", "32768"))
+SQLITE_MMAP_BYTES = int(os.environ.get("LAKEPROJECTIONS_SQLITE_MMAP_BYTES", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_SECONDS = float(os.environ.get("LAKEPROJECTIONS_SQLITE_BUSY_TIMEOUT", "30"))
 
+# The job queue gets its own file: lease and heartbeat writes must not move
+# the data file's signature, which _current_data_version() reads as new data.
+JOBS_DB_PATH = os.environ.get("LAKEPROJECTIONS_JOBS_DB_PATH") or f"{DB_PATH}-jobs.db"
 
-@app.route("/<lake_slug>")
-def lake_overview(lake_slug):
-    return lake_subpage(lake_slug, "overview")
+_thread_connections = threading.local()
 
 
-@app.route("/<lake_slug>/<subpage>")
-def lake_subpage(lake_slug, subpage):
-    lake_slug = (lake_slug or "").lower().strip()
-    subpage = (subpage or "").lower().strip()
+class _ThreadConnection(sqlite3.Connection):
+    """
+    A connection that lives as long as its thread.
+    close() only ends any open transaction, so call sites keep their
+    open/use/close shape while the handle (and its page cache and mmap)
+    is reused by the next caller on the same thread.
+    Every cursor, including the execute() shortcuts, is a _TimedCursor.
+    """
 
-    if subpage in LEGACY_SUBPAGES:
-        return redirect(
-            url_for("lake_subpage", lake_slug=lake_slug, subpage=LEGACY_SUBPAGES[subpage]),
-            code=301,
-        )
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
 
-    lake_data = LAKES.get(lake_slug)
+    def cursor(self, factory=None):
+        return super().cursor(factory or _TimedCursor)
 
-    if not lake_data and lake_slug in DAM_TO_LAKE_SLUG and subpage in SUBPAGES:
-        return redirect(
-            url_for("lake_subpage", lake_slug=DAM_TO_LAKE_SLUG[lake_slug], subpage=subpage),
-            code=301,
-        )
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
 
-    if not lake_data or subpage not in SUBPAGES:
-        abort(404)
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
 
-    dam = lake_data["dam"]
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
 
-    return render_template(
-        "dashboard.html",
-        dam=dam,
-        lake_slug=lake_slug,
-        lake_name=lake_data["lake_name"],
-        dam_name=lake_data["dam_name"],
-        subpage=subpage,
-        dam_label=DAMS[dam],
-        subpage_label=SUBPAGES[subpage],
-        **_page_context("dam", dam=dam, subpage=subpage),
-    )
-@app.route("/health")
-def health():
-    return "OK", 200
 
-@app.route("/internal/db/indexes", methods=["POST"])
-def create_db_indexes():
-    if not authorize(request):
-        return jsonify({"error": "Unauthorized"}), 403
+def _open_connection(readonly):
+    if readonly:
+        uri = f"{Path(DB_PATH).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(
+            uri, uri=True, timeout=SQLITE_BUSY_TIMEOUT_SECONDS, factory=_ThreadConnection
+        )
+    else:
+        conn = sqlite3.connect(DB_PATH, timeout=SQLITE_BUSY_TIMEOUT_SECONDS, factory=_ThreadConnection)
+        # journal_mode is stored in the DB file; WAL lets readers keep going
+        # while an update job holds the write lock.
+        conn.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KIB}")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.row_factory = sqlite3.Row
+    return conn
 
-    t0 = time.time()
 
-    conn = get_db_connection()
-    try:
-        ensure_indexes(conn)
-        conn.commit()
-    finally:
-        conn.close()
+def get_db_connection(readonly=False):
+    """
+    Return this thread's long-lived connection, opening it on first use.
+    Read paths pass readonly=True to get a separate mode=ro handle.
+    """
+    slot = "readonly" if readonly else "readwrite"
+    conn = getattr(_thread_connections, slot, None)
+    if conn is None:
+        conn = _open_connection(readonly)
+        setattr(_thread_connections, slot, conn)
+    return conn
 
-    return jsonify({
-        "status": "indexes ensured",
-        "elapsed_seconds": round(time.time() - t0, 3)
-    })
 
-#API elevation
+def get_jobs_connection():
+    """
+    Return this thread's long-lived connection to the job queue database
+    (JOBS_DB_PATH), opening it on first use.
+    """
+    conn = getattr(_thread_connections, "jobs", None)
+    if conn is None:
+        conn = sqlite3.connect(JOBS_DB_PATH, timeout=SQLITE_BUSY_TIMEOUT_SECONDS, factory=_ThreadConnection)
+        conn.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        _thread_connections.jobs = conn
+    return conn
 
-@app.route("/api/elevation", methods=["GET"])
-def api_elevation():
+
+@app.teardown_appcontext
+def _release_db_connections(exc):
+    # Never let a request leave a transaction open on a reused connection.
+    for slot in ("readonly", "readwrite", "jobs"):
+        conn = getattr(_thread_connections, slot, None)
+        if conn is not None:
+            conn.close()
+
+def ensure_core_schema(conn):
     """
-    Returns merged historic + forecast daily elevation for a dam.
-    Range options:
-      30d (MTD), 90d (3M), 365d (YTD), 5y
+    Create the core tables with the production layout when they are missing,
+    so a fresh database file can be seeded by the backfill.
     """
+    conn.executescript("""
+    CREATE TABLE IF NOT EXISTS "Reservoirs" (
+        "reservoir_id"	INTEGER,
+        "reservoir_name"	TEXT NOT NULL UNIQUE,
+        "reservoir_dam"	TEXT NOT NULL UNIQUE,
+        PRIMARY KEY("reservoir_id")
+    );
+
+    CREATE TABLE IF NOT EXISTS "Measures" (
+        "measure_id"	INTEGER,
+        "measure_name"	TEXT NOT NULL UNIQUE,
+        "measure_units"	TEXT NOT NULL UNIQUE,
+        PRIMARY KEY("measure_id")
+    );
+
+    CREATE TABLE IF NOT EXISTS "sdid_mapping" (
+        "sd_id"	INTEGER,
+        "measure_id"	INTEGER NOT NULL,
+        "reservoir_id"	INTEGER NOT NULL,
+        "sdid_name"	TEXT,
+        PRIMARY KEY("sd_id"),
+        FOREIGN KEY("measure_id") REFERENCES "Measures"("measure_id"),
+        FOREIGN KEY("reservoir_id") REFERENCES "Reservoirs"("reservoir_id")
+    );
+
+    CREATE TABLE IF NOT EXISTS "mrid_mapping" (
+        "mr_id"	INTEGER,
+        "run_name"	TEXT NOT NULL UNIQUE,
+        PRIMARY KEY("mr_id")
+    );
+
+    CREATE TABLE IF NOT EXISTS "forecasted_24ms_data" (
+        "forecasted_datetime"	TEXT NOT NULL,
+        "sd_id"	INTEGER NOT NULL,
+        "mr_id"	INTEGER NOT NULL,
+        "value"	REAL NOT NULL,
+        PRIMARY KEY("forecasted_datetime","sd_id","mr_id"),
+        FOREIGN KEY("mr_id") REFERENCES "mrid_mapping"("mr_id"),
+        FOREIGN KEY("sd_id") REFERENCES "sdid_mapping"("sd_id")
+    );
+    """)
 
-    dam = (request.args.get("dam") or "hoover").lower().strip()
-    range_key = (request.args.get("range") or "30d").lower().strip()
+    layout = time_series_layout()
+    for table_name in TIME_SERIES_TABLES:
+        conn.execute(_time_series_table_ddl(table_name, layout))
 
-    dam_to_sdid = {
-        "hoover": 1930,
-        "davis": 2100,
-        "parker": 2101
-    }
+# ==============================
+# TIME-SERIES STORAGE LAYOUT
+# ==============================
 
-    range_days = {
-        "30d": 30,
-        "90d": 90,
-        "365d": 365,
-        "5y": 1825
-    }
+# The four time-series tables exist in one of two layouts with the same
+# table and column names:
+#   "text"  - ISO timestamp strings (the original layout).
+#   "epoch" - integer seconds since 1970-01-01 of the AZ wall-clock time,
+#             in WITHOUT ROWID tables clustered on sd_id first.
+# Queries bind timestamps through _ts_param and select them through
+# _ts_sql, so API output is ISO text either way. Convert an existing
+# database with `flask --app main migrate-storage`.
+TIME_SERIES_LAYOUTS = ("text", "epoch")
+
+TIME_SERIES_TABLES = {
+    "historic_daily_data": {
+        "time_columns": ("historic_datetime",),
+        "text_key": ("sd_id", "historic_datetime"),
+        "epoch_key": ("sd_id", "historic_datetime"),
+    },
+    "historic_hourly_data": {
+        "time_columns": ("historic_datetime",),
+        "text_key": ("historic_datetime", "sd_id"),
+        "epoch_key": ("sd_id", "historic_datetime"),
+    },
+    "forecasted_daily_data": {
+        "time_columns": ("forecasted_datetime", "datetime_accessed"),
+        "text_key": ("forecasted_datetime", "sd_id", "datetime_accessed"),
+        "epoch_key": ("sd_id", "datetime_accessed", "forecasted_datetime"),
+    },
+    "forecasted_hourly_data": {
+        "time_columns": ("forecasted_datetime", "datetime_accessed"),
+        "text_key": ("forecasted_datetime", "sd_id", "datetime_accessed"),
+        "epoch_key": ("sd_id", "datetime_accessed", "forecasted_datetime"),
+    },
+}
 
-    if dam not in dam_to_sdid:
-        return jsonify({"error": "Invalid dam"}), 400
-    if range_key not in range_days:
-        return jsonify({"error": "Invalid range"}), 400
+_EPOCH_START = datetime(1970, 1, 1)
+_time_series_layout = None
 
-    sd_id = dam_to_sdid[dam]
-    days_back = range_days[range_key]
 
-    payload = _build_daily_stitched_payload(sd_id, days_back)
-    if "error" in payload:
-        return jsonify(payload), 400
+def _time_series_table_ddl(table_name, layout, create_name=None):
+    spec = TIME_SERIES_TABLES[table_name]
+    time_type = "INTEGER" if layout == "epoch" else "TEXT"
 
-    return jsonify({
-        "dam": dam,
-        "range": range_key,
-        **payload
-    })
+    # Column order matches the original tables: primary timestamp, sd_id,
+    # then datetime_accessed for forecasts.
+    columns = [f'"{spec["time_columns"][0]}"\t{time_type} NOT NULL', '"sd_id"\tINTEGER NOT NULL']
+    columns += [f'"{column}"\t{time_type} NOT NULL' for column in spec["time_columns"][1:]]
+    columns.append('"value"\tREAL NOT NULL')
 
+    column_sql = ",\n        ".join(columns)
+    key = ",".join(f'"{column}"' for column in spec[f"{layout}_key"])
+    suffix = " WITHOUT ROWID" if layout == "epoch" else ""
 
-def _build_daily_stitched_payload(sd_id, days_back):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    return f"""
+    CREATE TABLE IF NOT EXISTS "{create_name or table_name}" (
+        {column_sql},
+        PRIMARY KEY({key}),
+        FOREIGN KEY("sd_id") REFERENCES "sdid_mapping"("sd_id")
+    ){suffix};
+    """
 
-    az_today_start = _az_today_start_naive()
-    az_today_start_iso = az_today_start.strftime("%Y-%m-%dT%H:%M:%S")
 
-    cursor.execute("""
-        SELECT MAX(historic_datetime)
-        FROM historic_daily_data
-        WHERE sd_id = ?
-          AND historic_datetime < ?
-    """, (sd_id, az_today_start_iso))
-    cutover = cursor.fetchone()[0]
+def _detect_time_series_layout(conn):
+    row = conn.execute("""
+        SELECT type
+        FROM pragma_table_info('historic_daily_data')
+        WHERE name = 'historic_datetime'
+    """).fetchone()
+    return "epoch" if row and row[0].upper() == "INTEGER" else "text"
 
-    if not cutover:
-        conn.close()
-        return {"error": "No historic data found"}
 
-    cutover_dt = _parse_db_datetime(cutover)
-    start_dt = cutover_dt - timedelta(days=days_back)
-    start_iso = start_dt.strftime("%Y-%m-%dT%H:%M:%S")
+def time_series_layout():
+    """
+    Layout of the time-series tables, detected once per process.
+    A missing database counts as "text", which is what ensure_core_schema creates.
+    """
+    global _time_series_layout
+    if _time_series_layout is None:
+        if os.path.exists(DB_PATH):
+            _time_series_layout = _detect_time_series_layout(get_db_connection(readonly=True))
+        else:
+            _time_series_layout = "text"
+    return _time_series_layout
 
-    cursor.execute("""
-        SELECT historic_datetime, value
-        FROM historic_daily_data
+
+@lru_cache(maxsize=65536)
+def _iso_to_epoch(value):
+    # fromisoformat accepts both the "T" and the legacy " " separator.
+    return int((datetime.fromisoformat(value) - _EPOCH_START).total_seconds())
+
+
+def _ts_param(value):
+    """
+    Convert an ISO timestamp string to the stored form for binding.
+    """
+    if value is None or time_series_layout() == "text":
+        return value
+    return _iso_to_epoch(value)
+
+
+def _ts_sql(expression):
+    """
+    SQL that renders a stored timestamp expression as ISO text.
+    """
+    if time_series_layout() == "text":
+        return expression
+    return f"strftime('%Y-%m-%dT%H:%M:%S', {expression}, 'unixepoch')"
+
+
+def _ts_date_sql(column):
+    """
+    SQL for the YYYY-MM-DD part of a stored timestamp column.
+    """
+    if time_series_layout() == "text":
+        return f"substr({column}, 1, 10)"
+    return f"date({column}, 'unixepoch')"
+
+
+def _time_series_conversion_sql(column, target_layout):
+    if target_layout == "epoch":
+        # strftime('%s') reads the wall-clock value as UTC, matching _iso_to_epoch.
+        return f"CAST(strftime('%s', {column}) AS INTEGER)"
+    return f"strftime('%Y-%m-%dT%H:%M:%S', {column}, 'unixepoch')"
+
+
+def migrate_time_series_storage(conn, target_layout):
+    """
+    Rewrite the four time-series tables into target_layout in one
+    transaction. Rows whose timestamps collide after normalisation
+    (legacy "YYYY-MM-DD HH:MM:SS" next to the "T" form) keep the value of
+    the "T" row, which is what the ingest paths write.
+    Returns {table_name: rows_copied}.
+    """
+    global _time_series_layout
+
+    if target_layout not in TIME_SERIES_LAYOUTS:
+        raise ValueError(f"Unsupported layout: {target_layout}")
+
+    current_layout = _detect_time_series_layout(conn)
+    if current_layout == target_layout:
+        return {}
+
+    copied = {}
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for table_name, spec in TIME_SERIES_TABLES.items():
+            index_names = [
+                row[0] for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                    (table_name,),
+                ).fetchall()
+            ]
+            for index_name in index_names:
+                conn.execute(f'DROP INDEX "{index_name}"')
+
+            staging_name = f"{table_name}__migrating"
+            conn.execute(f'DROP TABLE IF EXISTS "{staging_name}"')
+            conn.execute(_time_series_table_ddl(table_name, target_layout, create_name=staging_name))
+
+            columns = list(spec["time_columns"]) + ["sd_id", "value"]
+            select_list = [
+                _time_series_conversion_sql(column, target_layout) if column in spec["time_columns"] else column
+                for column in columns
+            ]
+            key = ", ".join(spec[f"{target_layout}_key"])
+            conn.execute(f"""
+                INSERT INTO "{staging_name}" ({", ".join(columns)})
+                SELECT {", ".join(select_list)}
+                FROM "{table_name}"
+                WHERE 1
+                ORDER BY {", ".join(spec["time_columns"])}
+                ON CONFLICT({key}) DO UPDATE SET value = excluded.value
+            """)
+            copied[table_name] = conn.execute(f'SELECT COUNT(*) FROM "{staging_name}"').fetchone()[0]
+
+            conn.execute(f'DROP TABLE "{table_name}"')
+            conn.execute(f'ALTER TABLE "{staging_name}" RENAME TO "{table_name}"')
+
+        _record_table_update(conn, *TIME_SERIES_TABLES)
+
+        # The pointer table stays ISO text in both layouts; normalise any
+        # legacy separators so it still matches what _ts_sql renders.
+        if conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'forecast_vintages'"
+        ).fetchone():
+            conn.execute("""
+                UPDATE forecast_vintages
+                SET latest_accessed = strftime('%Y-%m-%dT%H:%M:%S', latest_accessed)
+                WHERE strftime('%Y-%m-%dT%H:%M:%S', latest_accessed) IS NOT NULL
+            """)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    _time_series_layout = target_layout
+    ensure_indexes(conn)
+    conn.commit()
+    return copied
+
+
+@app.cli.command("migrate-storage")
+@click.option("--to", "target_layout", type=click.Choice(TIME_SERIES_LAYOUTS), default="epoch", show_default=True)
+@click.option("--vacuum/--no-vacuum", default=True, show_default=True,
+              help="VACUUM afterwards to hand the freed pages back to the filesystem.")
+def migrate_storage_command(target_layout, vacuum):
+    """Convert the time-series tables between the text and epoch layouts.
+
+    Stop the web service first: running processes detect the layout once.
+    """
+    conn = get_db_connection()
+    size_before = os.path.getsize(DB_PATH)
+    t0 = time.time()
+
+    copied = migrate_time_series_storage(conn, target_layout)
+    if not copied:
+        click.echo(f"Already using the {target_layout} layout.")
+        return
+
+    invalidate_data_caches()
+    _refresh_response_snapshots()
+
+    if vacuum:
+        conn.execute("VACUUM")
+        # Fold the WAL back in so the file size below is meaningful.
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    click.echo(json.dumps({
+        "layout": target_layout,
+        "rows_copied": copied,
+        "size_before_bytes": size_before,
+        "size_after_bytes": os.path.getsize(DB_PATH),
+        "elapsed_seconds": round(time.time() - t0, 3),
+    }, indent=2))
+
+# ==============================
+# SQL REGISTRY
+# ==============================
+# Every statement the routes, update jobs, maintenance and job queue run,
+# by name. Text is built per call because timestamp expressions depend on
+# the storage layout and IN lists on how many ids are bound; "examples"
+# are the argument sets `flask check-query-plans` explains each one with.
+# Schema DDL, PRAGMAs and the one-off layout migration stay inline.
+
+
+def _sql_statement(build, *examples):
+    return {"build": build, "examples": examples or ((),)}
+
+
+def _sql_placeholders(count):
+    return ",".join(["?"] * count)
+
+
+def _sql(name, *args):
+    return SQL_STATEMENTS[name]["build"](*args)
+
+
+def _hourly_rollup_sql(period, sdi_count, source="hourly_daily_rollup"):
+    return f"""
+        SELECT sd_id,
+               {ROLLUP_PERIOD_SQL[period]} AS period_start,
+               SUM(hours) AS hours,
+               MIN(min_value) AS min_value,
+               MAX(max_value) AS max_value,
+               SUM(sum_value) AS sum_value
+        FROM {source}
+        WHERE sd_id IN ({_sql_placeholders(sdi_count)})
+          AND date >= ?
+          AND date <= ?
+        GROUP BY sd_id, period_start
+        ORDER BY sd_id ASC, period_start ASC
+    """
+
+
+_HISTORIC_TABLE_EXAMPLES = (("historic_daily_data",), ("historic_hourly_data",))
+_FORECAST_TABLE_EXAMPLES = (("forecasted_daily_data",), ("forecasted_hourly_data",))
+
+SQL_STATEMENTS = {
+    # ---- ingest
+    "historic.existing_keys": _sql_statement(lambda table_name: f"""
+        SELECT historic_datetime
+        FROM {table_name}
         WHERE sd_id = ?
           AND historic_datetime >= ?
           AND historic_datetime <= ?
+    """, *_HISTORIC_TABLE_EXAMPLES),
+    "historic.upsert": _sql_statement(lambda table_name: f"""
+        INSERT INTO {table_name}
+        (historic_datetime, sd_id, value)
+        VALUES (?, ?, ?)
+        ON CONFLICT(sd_id, historic_datetime) DO UPDATE SET value = excluded.value
+    """, *_HISTORIC_TABLE_EXAMPLES),
+    "historic.max_datetime": _sql_statement(
+        lambda table_name: f"SELECT {_ts_sql('MAX(historic_datetime)')} FROM {table_name}",
+        *_HISTORIC_TABLE_EXAMPLES,
+    ),
+    "historic_daily.delete_range": _sql_statement(lambda: """
+        DELETE FROM historic_daily_data
+        WHERE historic_datetime >= ?
+          AND historic_datetime <= ?
+    """),
+    "forecast.insert": _sql_statement(lambda table_name: f"""
+        INSERT OR IGNORE INTO {table_name}
+        (forecasted_datetime, sd_id, datetime_accessed, value)
+        VALUES (?, ?, ?, ?)
+    """, *_FORECAST_TABLE_EXAMPLES),
+    "forecast.max_forecasted_for_vintage": _sql_statement(
+        lambda table_name: f"SELECT {_ts_sql('MAX(forecasted_datetime)')} FROM {table_name} WHERE datetime_accessed = ?",
+        *_FORECAST_TABLE_EXAMPLES,
+    ),
+    "sdid_mapping.ids": _sql_statement(lambda: "SELECT sd_id FROM sdid_mapping"),
+    "sdid_mapping.registry": _sql_statement(lambda: """
+        SELECT sdid_mapping.sd_id, sdid_mapping.sdid_name,
+               Reservoirs.reservoir_dam, Measures.measure_name
+        FROM sdid_mapping
+        JOIN Reservoirs ON Reservoirs.reservoir_id = sdid_mapping.reservoir_id
+        JOIN Measures ON Measures.measure_id = sdid_mapping.measure_id
+        ORDER BY sdid_mapping.sd_id
+    """),
+
+    # ---- forecast_vintages
+    "forecast_vintages.seeded": _sql_statement(
+        lambda: "SELECT 1 FROM forecast_vintages WHERE table_name = ? LIMIT 1"
+    ),
+    "forecast_vintages.seed": _sql_statement(lambda table_name: f"""
+        INSERT OR IGNORE INTO forecast_vintages
+        (table_name, sd_id, latest_accessed, row_count)
+        SELECT ?, f.sd_id, {_ts_sql("f.datetime_accessed")}, COUNT(*)
+        FROM {table_name} f
+        JOIN (
+            SELECT sd_id, MAX(datetime_accessed) AS latest
+            FROM {table_name}
+            GROUP BY sd_id
+        ) m
+          ON m.sd_id = f.sd_id
+         AND m.latest = f.datetime_accessed
+        GROUP BY f.sd_id
+    """, *_FORECAST_TABLE_EXAMPLES),
+    "forecast_vintages.record": _sql_statement(lambda: """
+        INSERT INTO forecast_vintages (table_name, sd_id, latest_accessed, row_count)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(table_name, sd_id) DO UPDATE SET
+            latest_accessed = excluded.latest_accessed,
+            row_count = excluded.row_count
+        WHERE excluded.latest_accessed >= forecast_vintages.latest_accessed
+    """),
+    "forecast_vintages.latest": _sql_statement(lambda sdi_count: f"""
+        SELECT MAX(latest_accessed)
+        FROM forecast_vintages
+        WHERE table_name = ?
+          AND sd_id IN ({_sql_placeholders(sdi_count)})
+    """, (1,), (5,)),
+    "forecast_vintages.latest_for_table": _sql_statement(
+        lambda: "SELECT MAX(latest_accessed) FROM forecast_vintages WHERE table_name = ?"
+    ),
+    "forecast_vintages.for_table": _sql_statement(
+        lambda: "SELECT latest_accessed FROM forecast_vintages WHERE table_name = ?"
+    ),
+    "forecast.latest_accessed_scan": _sql_statement(lambda table_name, sdi_count: f"""
+        SELECT {_ts_sql("MAX(datetime_accessed)")}
+        FROM {table_name}
+        WHERE sd_id IN ({_sql_placeholders(sdi_count)})
+    """, ("forecasted_daily_data", 1), ("forecasted_hourly_data", 5)),
+
+    # ---- hourly_daily_rollup
+    "hourly_rollup.exists": _sql_statement(lambda: "SELECT 1 FROM hourly_daily_rollup LIMIT 1"),
+    "hourly_rollup.seed": _sql_statement(lambda: f"""
+        INSERT OR REPLACE INTO hourly_daily_rollup
+        (sd_id, date, hours, min_value, max_value, sum_value)
+        SELECT sd_id, {_ts_date_sql("historic_datetime")} AS day,
+               COUNT(value), MIN(value), MAX(value), SUM(value)
+        FROM historic_hourly_data
+        GROUP BY sd_id, day
+    """),
+    # Bare YYYY-MM-DD bounds also cover legacy "YYYY-MM-DD HH:MM:SS" text rows.
+    "hourly_rollup.record": _sql_statement(lambda: """
+        INSERT OR REPLACE INTO hourly_daily_rollup
+        (sd_id, date, hours, min_value, max_value, sum_value)
+        SELECT ?, ?, COUNT(value), MIN(value), MAX(value), SUM(value)
+        FROM historic_hourly_data
+        WHERE sd_id = ?
+          AND historic_datetime >= ?
           AND historic_datetime < ?
-        ORDER BY historic_datetime ASC
-    """, (sd_id, start_iso, cutover, az_today_start_iso))
-    historic_rows = cursor.fetchall()
+        HAVING COUNT(*) > 0
+    """),
+    "hourly_rollup.by_period": _sql_statement(
+        _hourly_rollup_sql,
+        ("day", 1), ("week", 1), ("month", 1), ("day", 5), ("month", 5),
+    ),
+    # Fresh DB that has not seen an hourly update job yet.
+    "hourly_rollup.by_period_unrolled": _sql_statement(lambda period, sdi_count: _hourly_rollup_sql(
+        period, sdi_count, source=f"""(
+            SELECT sd_id, {_ts_date_sql("historic_datetime")} AS date,
+                   COUNT(value) AS hours, MIN(value) AS min_value,
+                   MAX(value) AS max_value, SUM(value) AS sum_value
+            FROM historic_hourly_data
+            GROUP BY sd_id, date
+        )""",
+    ), ("day", 1), ("month", 5)),
+
+    # ---- hourly_available_dates
+    "hourly_dates.exists": _sql_statement(lambda: "SELECT 1 FROM hourly_available_dates LIMIT 1"),
+    # "WHERE 1" keeps SQLite from parsing ON CONFLICT as part of the SELECT.
+    "hourly_dates.seed_flag": _sql_statement(lambda table_name: f"""
+        INSERT INTO hourly_available_dates (sd_id, date, {HOURLY_DATE_FLAGS[table_name]})
+        SELECT DISTINCT sd_id, {_ts_date_sql(HOURLY_DATE_COLUMNS[table_name])}, 1
+        FROM {table_name}
+        WHERE 1
+        ON CONFLICT(sd_id, date) DO UPDATE SET {HOURLY_DATE_FLAGS[table_name]} = 1
+    """, ("historic_hourly_data",), ("forecasted_hourly_data",)),
+    "hourly_dates.record": _sql_statement(lambda table_name: f"""
+        INSERT INTO hourly_available_dates (sd_id, date, {HOURLY_DATE_FLAGS[table_name]})
+        VALUES (?, ?, 1)
+        ON CONFLICT(sd_id, date) DO UPDATE SET {HOURLY_DATE_FLAGS[table_name]} = 1
+    """, ("historic_hourly_data",), ("forecasted_hourly_data",)),
+    "hourly_dates.clear_flag": _sql_statement(
+        lambda table_name: f"UPDATE hourly_available_dates SET {HOURLY_DATE_FLAGS[table_name]} = 0",
+        ("historic_hourly_data",), ("forecasted_hourly_data",),
+    ),
+    "hourly_dates.prune": _sql_statement(
+        lambda: "DELETE FROM hourly_available_dates WHERE has_historic = 0 AND has_forecast = 0"
+    ),
+    # Rows come back in key order; callers merge days across sd_ids.
+    "hourly_dates.by_sdid": _sql_statement(lambda sdi_count: f"""
+        SELECT date AS dt
+        FROM hourly_available_dates
+        WHERE sd_id IN ({_sql_placeholders(sdi_count)})
+    """, (1,), (5,)),
+    # Fresh DB that has not seen an hourly update job yet.
+    "hourly_dates.scan": _sql_statement(lambda sdi_count: f"""
+        SELECT DISTINCT {_ts_date_sql("historic_datetime")} AS dt
+        FROM historic_hourly_data
+        WHERE sd_id IN ({_sql_placeholders(sdi_count)})
+        UNION
+        SELECT DISTINCT {_ts_date_sql("forecasted_datetime")} AS dt
+        FROM forecasted_hourly_data
+        WHERE sd_id IN ({_sql_placeholders(sdi_count)})
+        ORDER BY dt ASC
+    """, (1,), (5,)),
+
+    # ---- table_versions / response_snapshots
+    "table_versions.record": _sql_statement(lambda: """
+        INSERT INTO table_versions (table_name, updated_at)
+        VALUES (?, ?)
+        ON CONFLICT(table_name) DO UPDATE SET updated_at = excluded.updated_at
+    """),
+    "table_versions.all": _sql_statement(lambda: "SELECT table_name, updated_at FROM table_versions"),
+    "table_versions.get": _sql_statement(lambda: "SELECT updated_at FROM table_versions WHERE table_name = ?"),
+    "table_fingerprints.all": _sql_statement(lambda: "SELECT table_name, fingerprint FROM table_fingerprints"),
+    "table_fingerprints.record": _sql_statement(lambda: """
+        INSERT OR REPLACE INTO table_fingerprints (table_name, fingerprint) VALUES (?, ?)
+    """),
+    "external_tables.fingerprint": _sql_statement(
+        lambda table_name: f"SELECT MAX(rowid), COUNT(*) FROM {table_name}",
+        ("forecasted_24ms_data",), ("mrid_mapping",), ("sdid_mapping",),
+    ),
+    "snapshots.clear": _sql_statement(lambda: "DELETE FROM response_snapshots"),
+    "snapshots.insert": _sql_statement(lambda: """
+        INSERT INTO response_snapshots
+        (snapshot_key, az_date, body, gzip_body, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    """),
+    "snapshots.for_date": _sql_statement(lambda: """
+        SELECT snapshot_key, body, gzip_body
+        FROM response_snapshots
+        WHERE az_date = ?
+    """),
+
+    # ---- daily series (/api/elevation, /api/release/daily, lake daily routes)
+    # ORDER BY names the table column: the bare name would resolve to the
+    # text alias and, in the epoch layout, sort in a temp B-tree.
+    "daily.cutover": _sql_statement(lambda: f"""
+        SELECT {_ts_sql("MAX(historic_datetime)")}
+        FROM historic_daily_data
+        WHERE sd_id = ?
+          AND historic_datetime < ?
+    """),
+    "daily.history": _sql_statement(lambda: f"""
+        SELECT {_ts_sql("historic_datetime")} AS historic_datetime, value
+        FROM historic_daily_data
+        WHERE sd_id = ?
+          AND historic_datetime >= ?
+          AND historic_datetime <= ?
+          AND historic_datetime < ?
+        ORDER BY historic_daily_data.historic_datetime ASC
+    """),
+    "daily.forecast": _sql_statement(lambda: f"""
+        SELECT {_ts_sql("forecasted_datetime")} AS forecasted_datetime, value
+        FROM forecasted_daily_data
+        WHERE sd_id = ?
+          AND datetime_accessed = ?
+          AND forecasted_datetime > ?
+        ORDER BY forecasted_daily_data.forecasted_datetime ASC
+    """),
+    "daily.point_at_or_before": _sql_statement(lambda: f"""
+        SELECT {_ts_sql("historic_datetime")} AS historic_datetime, value
+        FROM historic_daily_data
+        WHERE sd_id = ?
+          AND historic_datetime <= ?
+        ORDER BY historic_daily_data.historic_datetime DESC
+        LIMIT 1
+    """),
+
+    # ---- hourly series (/api/release/hourly, /api/energy/hourly/units)
+    "hourly.release_historic": _sql_statement(lambda: f"""
+        SELECT {_ts_sql("historic_datetime")} AS historic_datetime, value
+        FROM historic_hourly_data
+        WHERE sd_id = ?
+          AND historic_datetime >= ?
+          AND historic_datetime <= ?
+        ORDER BY historic_hourly_data.historic_datetime ASC
+    """),
+    "hourly.release_forecast": _sql_statement(lambda: f"""
+        SELECT {_ts_sql("forecasted_datetime")} AS forecasted_datetime, value
+        FROM forecasted_hourly_data
+        WHERE sd_id = ?
+          AND datetime_accessed = ?
+          AND forecasted_datetime >= ?
+          AND forecasted_datetime <= ?
+        ORDER BY forecasted_hourly_data.forecasted_datetime ASC
+    """),
+    "hourly.units_historic": _sql_statement(lambda sdi_count: f"""
+        SELECT sd_id, {_ts_sql("historic_datetime")} AS historic_datetime, value
+        FROM historic_hourly_data
+        WHERE sd_id IN ({_sql_placeholders(sdi_count)})
+          AND historic_datetime >= ?
+          AND historic_datetime <= ?
+        ORDER BY sd_id ASC, historic_hourly_data.historic_datetime ASC
+    """, (4,), (5,)),
+    "hourly.units_forecast": _sql_statement(lambda sdi_count: f"""
+        SELECT sd_id, {_ts_sql("forecasted_datetime")} AS forecasted_datetime, value
+        FROM forecasted_hourly_data
+        WHERE sd_id IN ({_sql_placeholders(sdi_count)})
+          AND datetime_accessed = ?
+          AND forecasted_datetime >= ?
+          AND forecasted_datetime <= ?
+        ORDER BY sd_id ASC, forecasted_hourly_data.forecasted_datetime ASC
+    """, (4,), (5,)),
+
+    # ---- 24-Month Study
+    "study_runs.uncataloged": _sql_statement(lambda: """
+        SELECT mr_id, run_name
+        FROM mrid_mapping
+        WHERE mr_id NOT IN (SELECT mr_id FROM study_runs)
+    """),
+    "study_runs.orphaned": _sql_statement(lambda: """
+        SELECT 1 FROM study_runs
+        WHERE mr_id NOT IN (SELECT mr_id FROM mrid_mapping)
+        LIMIT 1
+    """),
+    "study_runs.insert": _sql_statement(lambda: """
+        INSERT OR REPLACE INTO study_runs (mr_id, study_month, scenario) VALUES (?, ?, ?)
+    """),
+    "study_runs.prune": _sql_statement(lambda: """
+        DELETE FROM study_runs
+        WHERE mr_id NOT IN (SELECT mr_id FROM mrid_mapping)
+    """),
+    "24ms.months": _sql_statement(lambda: """
+        SELECT DISTINCT study_month
+        FROM study_runs
+        WHERE study_month IS NOT NULL
+        ORDER BY study_month DESC
+    """),
+    "24ms.runs_for_month": _sql_statement(lambda: """
+        SELECT mr_id, scenario
+        FROM study_runs
+        WHERE study_month = ?
+    """),
+    "24ms.data": _sql_statement(lambda mr_count: f"""
+        SELECT forecasted_datetime, value, mr_id
+        FROM forecasted_24ms_data
+        WHERE sd_id = ?
+        AND mr_id IN ({_sql_placeholders(mr_count)})
+        ORDER BY forecasted_datetime
+    """, (3,)),
+
+    # ---- forecast retention
+    "retention.vintages": _sql_statement(lambda table_name: f"""
+        SELECT {_ts_sql("datetime_accessed")}
+        FROM (SELECT DISTINCT datetime_accessed FROM {table_name})
+    """, *_FORECAST_TABLE_EXAMPLES),
+    # Compact tables are WITHOUT ROWID, so batch on the primary key there.
+    "retention.delete_batch": _sql_statement(lambda table_name: (
+        f"""
+        DELETE FROM {table_name}
+        WHERE (sd_id, datetime_accessed, forecasted_datetime) IN (
+            SELECT sd_id, datetime_accessed, forecasted_datetime
+            FROM {table_name}
+            WHERE datetime_accessed = ?
+            LIMIT ?
+        )
+        """ if time_series_layout() == "epoch" else f"""
+        DELETE FROM {table_name}
+        WHERE rowid IN (
+            SELECT rowid
+            FROM {table_name}
+            WHERE datetime_accessed = ?
+            LIMIT ?
+        )
+        """
+    ), *_FORECAST_TABLE_EXAMPLES),
+
+    # ---- background jobs
+    "jobs.insert": _sql_statement(lambda: """
+        INSERT INTO jobs (job_type, params, status, created_at)
+        VALUES (?, ?, 'queued', ?)
+    """),
+    # A worker that died mid-job must not wedge the queue: its heartbeat stops.
+    "jobs.fail_stale": _sql_statement(lambda: """
+        UPDATE jobs
+        SET status = 'failed', finished_at = ?, error = 'abandoned: worker stopped before finishing'
+        WHERE status = 'running'
+          AND COALESCE(heartbeat_at, started_at) < ?
+    """),
+    "jobs.any_running": _sql_statement(lambda: "SELECT 1 FROM jobs WHERE status = 'running' LIMIT 1"),
+    "jobs.next_queued": _sql_statement(lambda: """
+        SELECT job_id, job_type, params
+        FROM jobs
+        WHERE status = 'queued'
+        ORDER BY job_id ASC
+        LIMIT 1
+    """),
+    "jobs.start": _sql_statement(lambda: """
+        UPDATE jobs
+        SET status = 'running', started_at = ?, heartbeat_at = started_at, worker = ?
+        WHERE job_id = ?
+    """),
+    "jobs.heartbeat": _sql_statement(lambda: """
+        UPDATE jobs
+        SET heartbeat_at = ?
+        WHERE job_id = ? AND status = 'running'
+    """),
+    "jobs.finish": _sql_statement(lambda: """
+        UPDATE jobs
+        SET status = ?, finished_at = ?, elapsed_seconds = ?,
+            http_status = ?, result = ?, error = ?
+        WHERE job_id = ?
+    """),
+    "jobs.get": _sql_statement(lambda: "SELECT * FROM jobs WHERE job_id = ?"),
+    "jobs.status": _sql_statement(lambda: "SELECT status, http_status, result, error FROM jobs WHERE job_id = ?"),
+}
+
+# Plan lines (by prefix) each statement may show without failing the
+# check, and why. Anything else that scans a table or sorts in a temp
+# B-tree is a regression.
+SQL_PLAN_ALLOWED = {
+    "sdid_mapping.ids": (("SCAN",), "reference table of a few dozen rows"),
+    "sdid_mapping.registry": (("SCAN",), "reference table of a few dozen rows, read at startup and after jobs"),
+    "forecast_vintages.seed": (("SCAN", "USE TEMP B-TREE"), "one-time seed of the pointer table"),
+    "hourly_rollup.exists": (("SCAN",), "LIMIT 1 probe"),
+    "hourly_rollup.seed": (("SCAN", "USE TEMP B-TREE"), "one-time seed of the rollup table"),
+    "hourly_rollup.by_period": (
+        ("USE TEMP B-TREE FOR GROUP BY",), "weeks/months are grouped from one row per day in range",
+    ),
+    "hourly_rollup.by_period_unrolled": (("USE TEMP B-TREE",), "fallback before hourly_daily_rollup exists"),
+    "hourly_dates.exists": (("SCAN",), "LIMIT 1 probe"),
+    "hourly_dates.seed_flag": (("SCAN", "USE TEMP B-TREE"), "seed, and rebuild after retention deletes"),
+    "hourly_dates.clear_flag": (("SCAN",), "rebuild after retention deletes"),
+    "hourly_dates.prune": (("SCAN",), "rebuild after retention deletes"),
+    "hourly_dates.scan": (("USE TEMP B-TREE",), "fallback before hourly_available_dates exists"),
+    "table_versions.all": (("SCAN",), "one row per data table"),
+    "table_fingerprints.all": (("SCAN",), "one row per externally loaded table"),
+    "external_tables.fingerprint": (("SCAN",), "counts rows at startup and after jobs"),
+    "snapshots.for_date": (("SCAN",), "holds one day of snapshots"),
+    "study_runs.uncataloged": (("SCAN",), "a few hundred runs, synced at startup and after jobs"),
+    "study_runs.orphaned": (("SCAN",), "a few hundred runs, checked at startup"),
+    "study_runs.prune": (("SCAN",), "only runs when mrid_mapping lost runs"),
+    "24ms.data": (("USE TEMP B-TREE FOR ORDER BY",), "sorts one study: a few runs of 24 monthly points"),
+    "retention.vintages": (("SCAN",), "one index pass per retention run"),
+}
+
+
+def _query_plan_problems(plan):
+    """
+    Plan lines that scan a stored table or sort in a temp B-tree. Scans of
+    subqueries materialized within the same plan are fine.
+    """
+    derived = set()
+    for detail in plan:
+        match = re.match(r"(?:MATERIALIZE|CO-ROUTINE) (\S+)", detail)
+        if match:
+            derived.add(match.group(1))
+
+    problems = []
+    for detail in plan:
+        match = re.match(r"SCAN (\S+)", detail)
+        if "TEMP B-TREE" in detail or (match and match.group(1) not in derived | {"CONSTANT"}):
+            problems.append(detail)
+    return problems
+
+
+def check_query_plans():
+    """
+    EXPLAIN QUERY PLAN every registered statement with each of its example
+    arguments. Returns one result per (name, args): the plan, the problem
+    lines SQL_PLAN_ALLOWED does not cover in "failures", and the allowance
+    reason when it covered any.
+    """
+    # Fresh connections: EXPLAIN neither reloads a schema that changed
+    # under an open connection nor bypasses its statement cache.
+    conn = sqlite3.connect(f"{Path(DB_PATH).resolve().as_uri()}?mode=ro", uri=True)
+    jobs_conn = sqlite3.connect(f"{Path(JOBS_DB_PATH).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        return _explain_registered_statements(conn, jobs_conn)
+    finally:
+        conn.close()
+        jobs_conn.close()
+
+
+def _explain_registered_statements(conn, jobs_conn):
+    results = []
+    for name, statement in SQL_STATEMENTS.items():
+        allowed_prefixes, reason = SQL_PLAN_ALLOWED.get(name, ((), None))
+        # The jobs.* statements run against the job queue database.
+        target = jobs_conn if name.startswith("jobs.") else conn
+        for args in statement["examples"]:
+            sql = statement["build"](*args)
+            try:
+                # Every statement binds positionally and no literal holds a "?".
+                rows = target.execute(f"EXPLAIN QUERY PLAN {sql}", [None] * sql.count("?")).fetchall()
+            except sqlite3.Error as e:
+                plan, problems, failures = [], [], [f"error: {e}"]
+            else:
+                plan = [row[3] for row in rows]
+                problems = _query_plan_problems(plan)
+                failures = [detail for detail in problems if not detail.startswith(allowed_prefixes)]
+            results.append({
+                "name": name,
+                "args": list(args),
+                "plan": plan,
+                "failures": failures,
+                "allowed": reason if len(problems) > len(failures) else None,
+            })
+    return results
+
+
+@app.cli.command("check-query-plans")
+@click.option("--json", "as_json", is_flag=True, help="Print every plan as JSON.")
+def check_query_plans_command(as_json):
+    """EXPLAIN every registered statement; fail on full scans or temp B-tree sorts.
+
+    Run against a database that has been through /internal/db/indexes, so
+    the derived tables, indexes and job queue database exist.
+    """
+    results = check_query_plans()
+    failing = [result for result in results if result["failures"]]
+
+    if as_json:
+        click.echo(json.dumps({"layout": time_series_layout(), "results": results}, indent=2))
+    else:
+        for result in results:
+            label = result["name"] + (f" {tuple(result['args'])}" if result["args"] else "")
+            if result["failures"]:
+                click.echo(f"FAIL     {label}")
+                for detail in result["failures"]:
+                    click.echo(f"           {detail}")
+            elif result["allowed"]:
+                click.echo(f"allowed  {label}: {result['allowed']}")
+            else:
+                click.echo(f"ok       {label}")
+        click.echo(f"{len(results)} plans checked, {len(failing)} failing")
+
+    if failing:
+        raise SystemExit(1)
+
+# ==============================
+# DATABASE ADD INDEX
+# ==============================
+
+def ensure_indexes(conn):
+    """
+    Create indexes for faster time-series reads.
+    Safe to run repeatedly because we use IF NOT EXISTS.
+    """
+    if time_series_layout() == "epoch":
+        _ensure_epoch_indexes(conn)
+    else:
+        _ensure_text_indexes(conn)
+
+    conn.executescript("""
+    -- =========================
+    -- FORECASTED 24-MONTH STUDY
+    -- =========================
+    CREATE INDEX IF NOT EXISTS idx_forecasted_24ms_mrid_sdid_dt
+        ON forecasted_24ms_data (mr_id, sd_id, forecasted_datetime);
+
+    CREATE INDEX IF NOT EXISTS idx_forecasted_24ms_dt
+        ON forecasted_24ms_data (forecasted_datetime);
+    """)
+
+
+def _ensure_epoch_indexes(conn):
+    # The compact tables are already clustered on sd_id, so only lookups
+    # that cut across sd_ids need a secondary index.
+    conn.executescript("""
+    CREATE INDEX IF NOT EXISTS idx_historic_daily_dt
+        ON historic_daily_data (historic_datetime);
+
+    CREATE INDEX IF NOT EXISTS idx_historic_hourly_dt
+        ON historic_hourly_data (historic_datetime);
+
+    CREATE INDEX IF NOT EXISTS idx_forecasted_daily_accessed
+        ON forecasted_daily_data (datetime_accessed);
+
+    CREATE INDEX IF NOT EXISTS idx_forecasted_hourly_accessed
+        ON forecasted_hourly_data (datetime_accessed);
+    """)
+
+
+def _ensure_text_indexes(conn):
+    conn.executescript("""
+    -- =========================
+    -- HISTORIC DAILY
+    -- =========================
+    CREATE INDEX IF NOT EXISTS idx_historic_daily_dt
+        ON historic_daily_data (historic_datetime);
+
+    CREATE INDEX IF NOT EXISTS idx_historic_daily_sdid_dt
+        ON historic_daily_data (sd_id, historic_datetime);
+
+    -- =========================
+    -- HISTORIC HOURLY
+    -- =========================
+    CREATE INDEX IF NOT EXISTS idx_historic_hourly_dt
+        ON historic_hourly_data (historic_datetime);
+
+    CREATE INDEX IF NOT EXISTS idx_historic_hourly_sdid_dt
+        ON historic_hourly_data (sd_id, historic_datetime);
+
+    -- =========================
+    -- FORECASTED DAILY
+    -- =========================
+    CREATE INDEX IF NOT EXISTS idx_forecasted_daily_dt
+        ON forecasted_daily_data (forecasted_datetime);
+
+    CREATE INDEX IF NOT EXISTS idx_forecasted_daily_sdid_dt
+        ON forecasted_daily_data (sd_id, forecasted_datetime);
+
+    CREATE INDEX IF NOT EXISTS idx_forecasted_daily_accessed
+        ON forecasted_daily_data (datetime_accessed);
+
+    -- =========================
+    -- FORECASTED HOURLY
+    -- =========================
+    CREATE INDEX IF NOT EXISTS idx_forecasted_hourly_dt
+        ON forecasted_hourly_data (forecasted_datetime);
+
+    CREATE INDEX IF NOT EXISTS idx_forecasted_hourly_sdid_dt
+        ON forecasted_hourly_data (sd_id, forecasted_datetime);
+
+    CREATE INDEX IF NOT EXISTS idx_forecasted_hourly_accessed
+        ON forecasted_hourly_data (datetime_accessed);
+    """)
+
+# ==============================
+# DATABASE FORECAST VINTAGES
+# ==============================
+
+FORECAST_TABLES = ("forecasted_daily_data", "forecasted_hourly_data")
+
+
+def ensure_forecast_vintages(conn):
+    """
+    Create the forecast_vintages pointer table and seed it from the
+    forecast tables the first time. Seeding is the only full scan; after
+    that the update jobs keep it current inside their own transaction.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS forecast_vintages (
+            table_name TEXT NOT NULL,
+            sd_id INTEGER NOT NULL,
+            latest_accessed TEXT NOT NULL,
+            row_count INTEGER NOT NULL,
+            PRIMARY KEY (table_name, sd_id)
+        )
+    """)
+
+    for table_name in FORECAST_TABLES:
+        seeded = conn.execute(_sql("forecast_vintages.seeded"), (table_name,)).fetchone()
+        if seeded:
+            continue
+
+        conn.execute(_sql("forecast_vintages.seed", table_name), (table_name,))
+
+
+def _record_forecast_vintage(cursor, table_name, datetime_accessed, counts_by_sdid):
+    """
+    Point each sd_id that received rows in this run at the new vintage.
+    Must be called before the ingest transaction commits.
+    """
+    cursor.executemany(_sql("forecast_vintages.record"), [
+        (table_name, sd_id, datetime_accessed, count)
+        for sd_id, count in counts_by_sdid.items()
+        if count
+    ])
+
+
+def _latest_forecast_accessed(cursor, table_name, sd_ids):
+    """
+    Newest datetime_accessed across sd_ids via the pointer table.
+    Falls back to scanning the forecast table when the pointer is missing
+    (fresh DB that has not seen an update job yet).
+    """
+    try:
+        cursor.execute(_sql("forecast_vintages.latest", len(sd_ids)), [table_name] + list(sd_ids))
+        latest_accessed = cursor.fetchone()[0]
+    except sqlite3.OperationalError:
+        latest_accessed = None
+
+    if latest_accessed:
+        return latest_accessed
+
+    cursor.execute(_sql("forecast.latest_accessed_scan", table_name, len(sd_ids)), list(sd_ids))
+    return cursor.fetchone()[0]
+
+# ==============================
+# DATABASE HOURLY ROLLUPS
+# ==============================
+# hourly_daily_rollup holds per-sd_id, per-day aggregates of
+# historic_hourly_data so multi-day hourly views read one row per day.
+# Weekly and monthly views are grouped from it at query time.
+
+def ensure_hourly_rollups(conn):
+    """
+    Create hourly_daily_rollup and seed it from historic_hourly_data the
+    first time. Seeding is the only full scan; after that the hourly
+    ingest jobs keep it current inside their own transaction.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS hourly_daily_rollup (
+            sd_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            hours INTEGER NOT NULL,
+            min_value REAL,
+            max_value REAL,
+            sum_value REAL,
+            PRIMARY KEY (sd_id, date)
+        ) WITHOUT ROWID
+    """)
+
+    seeded = conn.execute(_sql("hourly_rollup.exists")).fetchone()
+    if seeded:
+        return
+
+    conn.execute(_sql("hourly_rollup.seed"))
+
+
+def _track_hourly_days(rows, days_by_sdid):
+    """
+    Pass (iso_dt, sd_id, value) rows through, noting which days of which
+    sd_id they touch for _record_hourly_rollups.
+    """
+    for row in rows:
+        days_by_sdid.setdefault(row[1], set()).add(row[0][:10])
+        yield row
+
+
+def _record_hourly_rollups(cursor, days_by_sdid):
+    """
+    Recompute the rollup rows for the touched days. Must be called before
+    the ingest transaction commits.
+    """
+    params = []
+    for sd_id, days in days_by_sdid.items():
+        for day in days:
+            next_day = (datetime.strptime(day, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+            params.append((sd_id, day, sd_id, _ts_param(day), _ts_param(next_day)))
+
+    cursor.executemany(_sql("hourly_rollup.record"), params)
+
+# ==============================
+# DATABASE HOURLY DATE INDEX
+# ==============================
+# hourly_available_dates lists the days each hourly sd_id has historic
+# and/or forecast rows, so the hourly date pickers never scan the hourly
+# tables.
+
+HOURLY_DATE_FLAGS = {
+    "historic_hourly_data": "has_historic",
+    "forecasted_hourly_data": "has_forecast",
+}
+
+HOURLY_DATE_COLUMNS = {
+    "historic_hourly_data": "historic_datetime",
+    "forecasted_hourly_data": "forecasted_datetime",
+}
+
+
+def ensure_hourly_available_dates(conn):
+    """
+    Create hourly_available_dates and seed it from the hourly tables the
+    first time. Seeding is the only full scan; after that the hourly
+    ingest jobs keep it current inside their own transaction.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS hourly_available_dates (
+            sd_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            has_historic INTEGER NOT NULL DEFAULT 0,
+            has_forecast INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (sd_id, date)
+        ) WITHOUT ROWID
+    """)
+
+    seeded = conn.execute(_sql("hourly_dates.exists")).fetchone()
+    if seeded:
+        return
+
+    for table_name in HOURLY_DATE_FLAGS:
+        _seed_hourly_date_flag(conn, table_name)
+
+
+def _seed_hourly_date_flag(conn, table_name):
+    conn.execute(_sql("hourly_dates.seed_flag", table_name))
+
+
+def _record_hourly_dates(cursor, table_name, days_by_sdid):
+    """
+    Flag the days that just received rows in table_name. Must be called
+    before the ingest transaction commits.
+    """
+    cursor.executemany(_sql("hourly_dates.record", table_name), [(sd_id, day) for sd_id, days in days_by_sdid.items() for day in days])
+
+
+def _rebuild_hourly_date_flag(conn, table_name):
+    """
+    Recompute one flag from scratch after rows were deleted from table_name.
+    """
+    conn.execute(_sql("hourly_dates.clear_flag", table_name))
+    _seed_hourly_date_flag(conn, table_name)
+    conn.execute(_sql("hourly_dates.prune"))
+
+
+def _query_hourly_dates(sd_ids):
+    """
+    Sorted YYYY-MM-DD days on which any of sd_ids has hourly data, cached
+    per data version. Falls back to scanning the hourly tables when the
+    index table has not been created yet.
+    """
+    cache_key = ("hourly_dates", tuple(sd_ids))
+    version = _current_data_version()
+
+    dates = _stitched_cache_get(cache_key)
+    if dates is not None:
+        return dates
+
+    conn = get_db_connection(readonly=True)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(_sql("hourly_dates.by_sdid", len(sd_ids)), list(sd_ids))
+    except sqlite3.OperationalError:
+        cursor.execute(_sql("hourly_dates.scan", len(sd_ids)), list(sd_ids) + list(sd_ids))
+
+    rows = cursor.fetchall()
+    conn.close()
+
+    dates = sorted({row["dt"] for row in rows if row["dt"]})
+    _stitched_cache_put(cache_key, version, dates)
+    return dates
+
+# ==============================
+# DATABASE STUDY RUNS
+# ==============================
+# study_runs catalogs mrid_mapping by study month (YYYY-MM-01) and
+# scenario, parsed once per run with the rules the 24MS endpoints used to
+# apply to run names on every request. Runs that are not 24MS studies get
+# a NULL month, so every mr_id is parsed exactly once. mrid_mapping is
+# loaded outside this app; refresh_external_tables() syncs the catalog at
+# startup, after every job and on /internal/db/indexes. The 24MS routes
+# only read it.
+
+STUDY_SCENARIOS = ("Min", "Most", "Max")
+
+
+def ensure_study_runs(conn):
+    """
+    Create study_runs and catalog any runs it does not have yet. A change
+    is recorded in table_versions; the caller commits.
+    Returns (runs added, runs removed).
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS study_runs (
+            mr_id INTEGER PRIMARY KEY,
+            study_month TEXT,
+            scenario TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_study_runs_month ON study_runs (study_month)")
+    added, removed = sync_study_runs(conn)
+    if added or removed:
+        _record_table_update(conn.cursor(), "study_runs")
+        print(f"study_runs synced: {added} added, {removed} removed")
+    return added, removed
+
+
+def _study_run_row(mr_id, run_name):
+    """
+    (mr_id, study_month, scenario) for one mrid_mapping row. The month is
+    the label in front of " 24MS"; the scenario the first of Min/Most/Max
+    found in the name. "24MS" matches in any case, as LIKE did.
+    """
+    study_month = None
+    scenario = None
+    upper_name = run_name.upper()
+    if "24MS" in upper_name:
+        month_label = run_name[:upper_name.find(" 24MS")] if " 24MS" in upper_name else ""
+        parsed = _parse_24ms_month_label(month_label)
+        if parsed:
+            study_month = parsed.strftime("%Y-%m-01")
+        scenario = next((name for name in STUDY_SCENARIOS if name in run_name), None)
+    return mr_id, study_month, scenario
+
+
+def sync_study_runs(conn):
+    rows = conn.execute(_sql("study_runs.uncataloged")).fetchall()
+    conn.executemany(_sql("study_runs.insert"), [_study_run_row(row["mr_id"], row["run_name"]) for row in rows])
+    removed = conn.execute(_sql("study_runs.prune")).rowcount
+    return len(rows), removed
+
+# ==============================
+# DATA VERSIONS
+# ==============================
+# table_versions records when each data table last changed, written inside
+# the same transaction as the change. The HTTP validators on /api routes
+# are derived from it.
+# EXTERNAL_TABLES are loaded into the database outside this app, so no
+# write of ours stamps them. ensure_external_table_versions() keeps a
+# (MAX(rowid), COUNT(*)) fingerprint of each in table_fingerprints and
+# stamps table_versions when it moves; it runs at startup, after every
+# job and on /internal/db/indexes.
+
+EXTERNAL_TABLES = ("forecasted_24ms_data", "mrid_mapping", "sdid_mapping")
+
+def ensure_table_versions(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            updated_at TEXT NOT NULL
+        )
+    """)
+
+
+def _record_table_update(cursor, *table_names):
+    """
+    Mark table_names as changed now. Must be called before the
+    transaction that changed them commits.
+    """
+    ensure_table_versions(cursor)
+    updated_at = datetime.utcnow().isoformat(timespec="microseconds")
+    cursor.executemany(_sql("table_versions.record"), [(table_name, updated_at) for table_name in table_names])
+
+
+def _external_table_fingerprints(conn):
+    fingerprints = {}
+    for table_name in EXTERNAL_TABLES:
+        try:
+            max_rowid, count = conn.execute(_sql("external_tables.fingerprint", table_name)).fetchone()
+        except sqlite3.OperationalError:
+            continue
+        fingerprints[table_name] = f"{max_rowid}:{count}"
+    return fingerprints
+
+
+def _stored_table_fingerprints(conn):
+    try:
+        return {row[0]: row[1] for row in conn.execute(_sql("table_fingerprints.all")).fetchall()}
+    except sqlite3.OperationalError:
+        return {}
+
+
+def ensure_external_table_versions(conn):
+    """
+    Stamp table_versions for every external table whose fingerprint moved
+    since the last check. Returns the stamped table names; the caller commits.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS table_fingerprints (
+            table_name TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL
+        )
+    """)
+    stored = _stored_table_fingerprints(conn)
+    changed = {
+        table_name: fingerprint
+        for table_name, fingerprint in _external_table_fingerprints(conn).items()
+        if stored.get(table_name) != fingerprint
+    }
+    if changed:
+        conn.executemany(_sql("table_fingerprints.record"), list(changed.items()))
+        _record_table_update(conn.cursor(), *changed)
+    return sorted(changed)
+
+# ==============================
+# STITCHED SERIES CACHE
+# ==============================
+
+_stitched_cache = OrderedDict()
+_stitched_cache_lock = threading.Lock()
+_data_generation = 0
+
+
+def _db_file_signature():
+    """
+    Cheap cross-worker change marker for the database.
+    Commits from another gunicorn worker touch the DB (or its WAL) file,
+    so the mtime/size pair changes even though our in-process counter does not.
+    """
+    signature = []
+    for path in (DB_PATH, f"{DB_PATH}-wal"):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            signature.append(None)
+            continue
+        signature.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def _current_data_version():
+    return (_data_generation, _db_file_signature())
+
+
+def invalidate_data_caches():
+    """
+    Drop every cached payload. Called by the /internal/update/* handlers
+    right after they commit so the next read sees the new rows.
+    """
+    global _data_generation
+    with _stitched_cache_lock:
+        _data_generation += 1
+        _stitched_cache.clear()
+
+
+def _stitched_cache_get(key):
+    # Keys are tuples; all but the stitched payloads lead with their kind.
+    cache_name = key[0] if isinstance(key[0], str) else "stitched"
+    with _stitched_cache_lock:
+        entry = _stitched_cache.get(key)
+        if entry is None:
+            payload = None
+        else:
+            version, payload = entry
+            if version != _current_data_version():
+                del _stitched_cache[key]
+                payload = None
+            else:
+                _stitched_cache.move_to_end(key)
+    _record_cache_lookup(cache_name, payload is not None)
+    return payload
+
+
+def _stitched_cache_put(key, version, payload):
+    if STITCHED_CACHE_MAX_ENTRIES <= 0:
+        return
+    with _stitched_cache_lock:
+        _stitched_cache[key] = (version, payload)
+        _stitched_cache.move_to_end(key)
+        while len(_stitched_cache) > STITCHED_CACHE_MAX_ENTRIES:
+            _stitched_cache.popitem(last=False)
+
+# ==============================
+# SDID REGISTRY
+# ==============================
+# (dam, metric) and (dam, unit) -> sd_id. SDID_CONFIG and UNIT_SDID_CONFIG
+# are authoritative: sdid_mapping (joined to Reservoirs/Measures) is
+# cross-checked against them and disagreements are logged, never applied.
+# The database only contributes unit lists for dams the config has none
+# for; metrics come from the config alone, since they decide which
+# ?variable= values the routes accept.
+# Loaded once at startup and rebuilt by reload_sdid_registry() after each
+# job and /internal/db/indexes. A reload that finds a different mapping
+# stamps table_versions, which tells the other workers to rebuild theirs.
+
+SDID_CONFIG = {
+    "hoover": {"elevation": 1930, "release": 1863, "energy": 2070},
+    "davis": {"elevation": 2100, "release": 2166, "energy": 2071},
+    "parker": {"elevation": 2101, "release": 2146, "energy": 2072},
+}
+
+# dam -> ((sd_id, unit number), ...) for the per-unit generation series.
+UNIT_SDID_CONFIG = {
+    "davis": ((14163, 1), (14164, 2), (14165, 3), (14166, 4), (14167, 5)),
+    "parker": ((14168, 1), (14169, 2), (14170, 3), (14171, 4)),
+}
+
+_UNIT_NAME_RE = re.compile(r"\bUNIT\s*-?\s*(\d+)\b", re.IGNORECASE)
+
+
+class SdidRegistry:
+    """
+    Immutable sd_id lookups. A reload builds a new instance and swaps it
+    in, so a request never sees a half-built registry. version is the
+    table_versions stamp of sdid_mapping it was built at.
+    """
+
+    __slots__ = ("version", "source", "_metrics", "_units", "_unit_sd_ids")
+
+    def __init__(self, metrics, units, version, source):
+        self.version = version
+        self.source = source
+        self._metrics = MappingProxyType({dam: MappingProxyType(dict(by_metric)) for dam, by_metric in metrics.items()})
+        self._units = MappingProxyType({dam: tuple(dam_units) for dam, dam_units in units.items()})
+        self._unit_sd_ids = MappingProxyType({
+            (dam, unit["unit"]): unit["sd_id"] for dam, dam_units in units.items() for unit in dam_units
+        })
+
+    @property
+    def dams(self):
+        return self._metrics.keys()
+
+    def sd_id(self, dam, metric):
+        return self._metrics.get(dam, {}).get(metric)
+
+    def unit_sd_id(self, dam, unit):
+        return self._unit_sd_ids.get((dam, unit.upper()))
+
+    def units(self, dam):
+        """{"sd_id", "unit", "unit_number"} per generating unit, by unit number."""
+        return [dict(unit) for unit in self._units.get(dam, ())]
+
+    def same_mapping(self, other):
+        return self._metrics == other._metrics and self._units == other._units
+
+
+def _unit_entry(dam, sd_id, unit_number):
+    return {"sd_id": sd_id, "unit": f"{dam[0].upper()}{unit_number}", "unit_number": unit_number}
+
+
+def _config_units():
+    return {
+        dam: [_unit_entry(dam, sd_id, unit_number) for sd_id, unit_number in config_units]
+        for dam, config_units in UNIT_SDID_CONFIG.items()
+    }
+
+
+def _sdid_mapping_stamp(conn):
+    try:
+        row = conn.execute(_sql("table_versions.get"), ("sdid_mapping",)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def _build_sdid_registry(conn):
+    units = _config_units()
+    try:
+        rows = conn.execute(_sql("sdid_mapping.registry")).fetchall()
+    except sqlite3.OperationalError as e:
+        print("SDID registry using config only:", e)
+        return SdidRegistry(SDID_CONFIG, units, _sdid_mapping_stamp(conn), "config")
+
+    conflicts = []
+    db_units = {}
+    for row in rows:
+        dam = str(row["reservoir_dam"]).strip().lower()
+        sd_id = int(row["sd_id"])
+        unit_match = _UNIT_NAME_RE.search(row["sdid_name"] or "")
+        if unit_match:
+            db_units.setdefault(dam, []).append(_unit_entry(dam, sd_id, int(unit_match.group(1))))
+            continue
+
+        metric = str(row["measure_name"]).strip().lower()
+        configured = SDID_CONFIG.get(dam, {}).get(metric)
+        if configured is None:
+            conflicts.append(f"{dam}/{metric}: sdid_mapping has {sd_id}, config has no such metric")
+        elif configured != sd_id:
+            conflicts.append(f"{dam}/{metric}: sdid_mapping has {sd_id}, config has {configured}")
+
+    for dam, dam_units in db_units.items():
+        dam_units.sort(key=lambda unit: unit["unit_number"])
+        if dam not in units:
+            units[dam] = dam_units
+        elif dam_units != units[dam]:
+            conflicts.append(f"{dam} units: sdid_mapping has {[unit['sd_id'] for unit in dam_units]}, "
+                             f"config has {[unit['sd_id'] for unit in units[dam]]}")
+
+    for conflict in conflicts:
+        print("SDID registry keeps config for", conflict)
+
+    return SdidRegistry(SDID_CONFIG, units, _sdid_mapping_stamp(conn), "sdid_mapping")
+
+
+def _load_sdid_registry():
+    """
+    Build the registry on a private connection that is closed again, so a
+    load at import leaves nothing open for gunicorn to fork.
+    """
+    if not os.path.exists(DB_PATH):
+        return SdidRegistry(SDID_CONFIG, _config_units(), None, "config")
+
+    try:
+        conn = sqlite3.connect(f"{Path(DB_PATH).resolve().as_uri()}?mode=ro", uri=True)
+    except sqlite3.Error as e:
+        print("SDID registry using config only:", e)
+        return SdidRegistry(SDID_CONFIG, _config_units(), None, "config")
+    conn.row_factory = sqlite3.Row
+    try:
+        return _build_sdid_registry(conn)
+    finally:
+        conn.close()
+
+
+def refresh_external_tables(conn):
+    """
+    Catch up with tables loaded outside this app: stamp the ones that
+    changed, catalog new study runs and reload the registry. Runs after
+    every job and on /internal/db/indexes; the caller commits.
+    """
+    ensure_external_table_versions(conn)
+    ensure_study_runs(conn)
+    reload_sdid_registry(conn)
+
+
+def _sync_external_tables_at_startup():
+    """
+    Stamp external tables and catalog study runs loaded while no process
+    was running. Uses private connections, closed again before gunicorn
+    forks; the write connection is only opened when something is behind.
+    """
+    if not os.path.exists(DB_PATH):
+        return
+
+    try:
+        conn = sqlite3.connect(f"{Path(DB_PATH).resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            stale = bool(
+                _external_table_fingerprints(conn) != _stored_table_fingerprints(conn)
+                or conn.execute(_sql("study_runs.uncataloged")).fetchone()
+                or conn.execute(_sql("study_runs.orphaned")).fetchone()
+            )
+        except sqlite3.OperationalError:
+            stale = True
+        finally:
+            conn.close()
+
+        if stale:
+            conn = sqlite3.connect(DB_PATH, timeout=SQLITE_BUSY_TIMEOUT_SECONDS)
+            conn.row_factory = sqlite3.Row
+            try:
+                ensure_external_table_versions(conn)
+                ensure_study_runs(conn)
+                conn.commit()
+            finally:
+                conn.close()
+    except sqlite3.Error as e:
+        print("External tables not synced at startup:", e)
+
+
+# Startup: stamp and catalog the externally loaded tables, then build the
+# registry from them.
+_sync_external_tables_at_startup()
+_sdid_registry = _load_sdid_registry()
+
+
+def reload_sdid_registry(conn):
+    """
+    Rebuild from conn after an ingest or maintenance run. A changed
+    mapping is stamped in table_versions; the caller commits.
+    """
+    global _sdid_registry
+    registry = _build_sdid_registry(conn)
+    if not registry.same_mapping(_sdid_registry):
+        _record_table_update(conn.cursor(), "sdid_mapping")
+        registry = SdidRegistry(registry._metrics, registry._units, _sdid_mapping_stamp(conn), registry.source)
+        print("SDID registry reloaded: mapping changed")
+    _sdid_registry = registry
+    return registry
+
+
+def sdid_registry():
+    """
+    The current registry, rebuilt only when another worker stamped a newer
+    sdid_mapping version (read with the HTTP validators, per data version).
+    """
+    global _sdid_registry
+    registry = _sdid_registry
+    if _table_versions().get("sdid_mapping") != registry.version:
+        registry = _sdid_registry = _load_sdid_registry()
+    return registry
+
+# ==============================
+# RESPONSE SNAPSHOTS
+# ==============================
+# Finished JSON bodies (plain + gzip) for the fixed set of dashboard
+# requests, materialized by the daily update jobs into response_snapshots.
+# They live in the DB so a fresh deploy serves them without rebuilding.
+
+_snapshot_memory = {"version": None, "entries": {}}
+_snapshot_lock = threading.Lock()
+
+
+def ensure_snapshot_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS response_snapshots (
+            snapshot_key TEXT PRIMARY KEY,
+            az_date TEXT NOT NULL,
+            body BLOB NOT NULL,
+            gzip_body BLOB NOT NULL,
+            created_at TEXT NOT NULL
+        )
+    """)
+
+
+def _snapshot_key(path, **params):
+    if not params:
+        return path
+    return path + "?" + "&".join(f"{name}={params[name]}" for name in sorted(params))
+
+
+def _snapshot_bodies():
+    """
+    Yield (snapshot_key, body_dict) for every response the dashboard asks for.
+    Error bodies are skipped so those requests fall through to the live path.
+    """
+    for range_key in DAILY_RANGE_DAYS:
+        for dam in DAMS:
+            body, status = _elevation_response_body(dam, range_key)
+            if status == 200:
+                yield _snapshot_key("/api/elevation", dam=dam, range=range_key), body
+
+        for dam in DAMS:
+            body, status = _release_daily_response_body(dam, range_key)
+            if status == 200:
+                yield _snapshot_key("/api/release/daily", dam=dam, range=range_key), body
+
+        for path, (metric_name, dam) in LAKE_DAILY_METRIC_ROUTES.items():
+            body, status = _daily_metric_response_body(metric_name, dam, range_key)
+            if status == 200:
+                yield _snapshot_key(path, range=range_key), body
+
+    yield _snapshot_key("/api/24ms/months"), _query_24ms_months()
+
+
+def _serialize_json_body(body):
+    # Same bytes jsonify() would produce for this body.
+    return f"{app.json.dumps(body, separators=(',', ':'))}\n".encode("utf-8")
+
+
+def materialize_response_snapshots():
+    """
+    Rebuild every snapshot for the current AZ date in one transaction.
+    Returns the number of snapshots written.
+    """
+    az_date = _az_today_start_naive().date().isoformat()
+    created_at = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")
+
+    rows = []
+    for key, body in _snapshot_bodies():
+        raw = _serialize_json_body(body)
+        rows.append((key, az_date, raw, gzip.compress(raw, mtime=0), created_at))
+
+    conn = get_db_connection()
+    try:
+        ensure_snapshot_table(conn)
+        conn.execute(_sql("snapshots.clear"))
+        conn.executemany(_sql("snapshots.insert"), rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+    with _snapshot_lock:
+        _snapshot_memory["version"] = None
+
+    return len(rows)
+
+
+def _refresh_response_snapshots():
+    """
+    Update-handler hook: a snapshot failure must not fail the ingest itself,
+    the read routes simply fall back to building responses live.
+    """
+    try:
+        written = materialize_response_snapshots()
+    except Exception as e:
+        print("Snapshot materialization failed:", e)
+        return None
+
+    print("Snapshots written:", written)
+    return written
+
+
+def _load_snapshots(version):
+    az_date = _az_today_start_naive().date().isoformat()
+    entries = {}
+
+    conn = get_db_connection(readonly=True)
+    try:
+        rows = conn.execute(_sql("snapshots.for_date"), (az_date,)).fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    finally:
+        conn.close()
+
+    for row in rows:
+        entries[row["snapshot_key"]] = (bytes(row["body"]), bytes(row["gzip_body"]))
+
+    _snapshot_memory["version"] = version
+    _snapshot_memory["entries"] = entries
+
+
+def _snapshot_response(key):
+    """
+    Serve a stored snapshot for key, or None to fall through to the live path.
+    Snapshots are reloaded from the DB only when the data version or AZ date moves.
+    """
+    version = (_current_data_version(), _az_today_start_naive().date())
+
+    with _snapshot_lock:
+        if _snapshot_memory["version"] != version:
+            _load_snapshots(version)
+        entry = _snapshot_memory["entries"].get(key)
+
+    _record_cache_lookup("snapshot", entry is not None)
+    if entry is None:
+        return None
+
+    body, gzip_body = entry
+    encoding = _negotiate_encoding()
+    if encoding == "gzip":
+        response = app.response_class(gzip_body, mimetype="application/json")
+    elif encoding == "br":
+        response = app.response_class(_cached_compressed_body(body, "br"), mimetype="application/json")
+    else:
+        response = app.response_class(body, mimetype="application/json")
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
+
+# ==============================
+# RESPONSE COMPRESSION
+# ==============================
+# JSON responses above COMPRESS_MIN_BYTES are compressed with the best
+# encoding the client accepts (brotli when the optional `brotli` package is
+# installed, otherwise gzip). Compressed bytes are cached by body digest,
+# so identical payloads are only compressed once. Static assets are
+# compressed once at startup and served from memory.
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.environ.get("LAKEPROJECTIONS_COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_CACHE_MAX_ENTRIES = int(os.environ.get("LAKEPROJECTIONS_COMPRESS_CACHE_SIZE", "256"))
+PRECOMPRESSED_STATIC_EXTENSIONS = (".js", ".css", ".svg", ".json", ".txt", ".html")
+
+_compressed_cache = OrderedDict()
+_compressed_cache_lock = threading.Lock()
+
+
+def _negotiate_encoding():
+    """
+    "br", "gzip" or None for the current request, honouring q-values.
+    """
+    accepted = request.accept_encodings
+    candidates = [("gzip", accepted["gzip"])]
+    if brotli is not None:
+        # Listed first so brotli wins a tie.
+        candidates.insert(0, ("br", accepted["br"]))
+
+    encoding, quality = max(candidates, key=lambda candidate: candidate[1])
+    return encoding if quality > 0 else None
+
+
+def _compress_body(body, encoding, level=None):
+    if encoding == "br":
+        return brotli.compress(body, quality=5 if level is None else level)
+    return gzip.compress(body, compresslevel=6 if level is None else level, mtime=0)
+
+
+def _cached_compressed_body(body, encoding):
+    key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+
+    with _compressed_cache_lock:
+        compressed = _compressed_cache.get(key)
+        if compressed is not None:
+            _compressed_cache.move_to_end(key)
+    _record_cache_lookup("compressed", compressed is not None)
+    if compressed is not None:
+        return compressed
+
+    compressed = _compress_body(body, encoding)
+
+    if COMPRESS_CACHE_MAX_ENTRIES > 0:
+        with _compressed_cache_lock:
+            _compressed_cache[key] = compressed
+            while len(_compressed_cache) > COMPRESS_CACHE_MAX_ENTRIES:
+                _compressed_cache.popitem(last=False)
+    return compressed
+
+
+@app.after_request
+def _compress_json_response(response):
+    if (
+        response.mimetype != "application/json"
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.status_code in (204, 304)
+    ):
+        return response
+
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = _negotiate_encoding()
+    if encoding is None:
+        return response
+
+    response.set_data(_cached_compressed_body(body, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def _precompress_static_assets():
+    """
+    {filename: {"mtime": ..., "gzip": bytes, "br": bytes}} for every text
+    asset under static/, built once with the slowest (smallest) settings.
+    """
+    variants = {}
+    static_root = Path(app.static_folder)
+    for path in sorted(static_root.rglob("*")):
+        if not path.is_file() or path.suffix not in PRECOMPRESSED_STATIC_EXTENSIONS:
+            continue
+
+        raw = path.read_bytes()
+        if len(raw) < COMPRESS_MIN_BYTES:
+            continue
+
+        entry = {"mtime": path.stat().st_mtime, "gzip": _compress_body(raw, "gzip", level=9)}
+        if brotli is not None:
+            entry["br"] = _compress_body(raw, "br", level=11)
+        variants[path.relative_to(static_root).as_posix()] = entry
+    return variants
+
+
+_static_variants = _precompress_static_assets()
+
+
+@app.endpoint("static")
+def static_asset(filename):
+    """
+    Flask's static view, but answering from the precompressed variants
+    when the client accepts them.
+    """
+    response = app.send_static_file(filename)
+    entry = _static_variants.get(filename)
+    if entry is None or response.status_code != 200:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = _negotiate_encoding()
+    if encoding not in entry:
+        return response
+
+    # A variant built from an older copy of the file must not be served.
+    if os.stat(os.path.join(app.static_folder, filename)).st_mtime != entry["mtime"]:
+        return response
+
+    # Swap the file stream for the precompressed bytes.
+    response.close()
+    response.direct_passthrough = False
+    response.set_data(entry[encoding])
+    response.headers["Content-Encoding"] = encoding
+
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+    return response.make_conditional(request)
+
+# ==============================
+# SECURITY CHECK
+# ==============================
+
+def authorize(req):
+    token = req.headers.get("X-Update-Token")
+    return token == UPDATE_TOKEN
+
+
+# ==============================
+# HEALTH
+# ==============================
+
+@app.route("/")
+def home():
+    return render_template("home.html", **_page_context("home"))
+
+
+@app.route("/<lake_slug>")
+def lake_overview(lake_slug):
+    return lake_subpage(lake_slug, "overview")
+
+
+@app.route("/<lake_slug>/<subpage>")
+def lake_subpage(lake_slug, subpage):
+    lake_slug = (lake_slug or "").lower().strip()
+    subpage = (subpage or "").lower().strip()
+
+    if subpage in LEGACY_SUBPAGES:
+        return redirect(
+            url_for("lake_subpage", lake_slug=lake_slug, subpage=LEGACY_SUBPAGES[subpage]),
+            code=301,
+        )
+
+    lake_data = LAKES.get(lake_slug)
+
+    if not lake_data and lake_slug in DAM_TO_LAKE_SLUG and subpage in SUBPAGES:
+        return redirect(
+            url_for("lake_subpage", lake_slug=DAM_TO_LAKE_SLUG[lake_slug], subpage=subpage),
+            code=301,
+        )
+
+    if not lake_data or subpage not in SUBPAGES:
+        abort(404)
+
+    dam = lake_data["dam"]
+
+    return render_template(
+        "dashboard.html",
+        dam=dam,
+        lake_slug=lake_slug,
+        lake_name=lake_data["lake_name"],
+        dam_name=lake_data["dam_name"],
+        subpage=subpage,
+        dam_label=DAMS[dam],
+        subpage_label=SUBPAGES[subpage],
+        **_page_context("dam", dam=dam, subpage=subpage),
+    )
+@app.route("/health")
+def health():
+    return "OK", 200
 
-    last_year_target_dt = cutover_dt - timedelta(days=365)
-    last_year_target_iso = last_year_target_dt.strftime("%Y-%m-%dT%H:%M:%S")
-    cursor.execute("""
-        SELECT historic_datetime, value
-        FROM historic_daily_data
-        WHERE sd_id = ?
-          AND historic_datetime <= ?
-        ORDER BY historic_datetime DESC
-        LIMIT 1
-    """, (sd_id, last_year_target_iso))
-    last_year_row = cursor.fetchone()
+@app.route("/internal/db/indexes", methods=["POST"])
+def create_db_indexes():
+    if not authorize(request):
+        return jsonify({"error": "Unauthorized"}), 403
 
-    last_hist_value = historic_rows[-1]["value"] if historic_rows else None
+    t0 = time.time()
 
-    cursor.execute("""
-        SELECT MAX(datetime_accessed)
-        FROM forecasted_daily_data
-        WHERE sd_id = ?
-    """, (sd_id,))
-    latest_accessed = cursor.fetchone()[0]
+    conn = get_db_connection()
+    try:
+        ensure_indexes(conn)
+        ensure_table_versions(conn)
+        ensure_snapshot_table(conn)
+        ensure_forecast_vintages(conn)
+        ensure_hourly_rollups(conn)
+        ensure_hourly_available_dates(conn)
+        refresh_external_tables(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+    jobs_conn = get_jobs_connection()
+    try:
+        ensure_jobs_table(jobs_conn)
+        jobs_conn.commit()
+    finally:
+        jobs_conn.close()
+
+    return jsonify({
+        "status": "indexes ensured",
+        "elapsed_seconds": round(time.time() - t0, 3)
+    })
+
+DAILY_RANGE_DAYS = {
+    "30d": 30,
+    "90d": 90,
+    "365d": 365,
+    "5y": 1825
+}
+
+DAILY_FULL_RANGE_DAYS = max(DAILY_RANGE_DAYS.values())
+
+# Chart endpoints accept ?format=columnar for parallel arrays instead of
+# one {"t", "v"} object per point.
+RESPONSE_FORMATS = ("rows", "columnar")
+
+
+def _response_format():
+    """
+    The requested ?format=, or None when it is not one we serve.
+    """
+    response_format = (request.args.get("format") or "rows").lower().strip()
+    return response_format if response_format in RESPONSE_FORMATS else None
+
+
+def _columnar_series(points):
+    """
+    Parallel t/v arrays for a list of {"t", "v"} points. Evenly spaced
+    series (every daily range, most hourly days) collapse further to
+    start + step_seconds + v.
+    """
+    times = [point["t"] for point in points]
+    values = [point["v"] for point in points]
+
+    if len(times) >= 2:
+        parsed = [datetime.fromisoformat(t) for t in times]
+        step = parsed[1] - parsed[0]
+        if step > timedelta(0) and all(b - a == step for a, b in zip(parsed, parsed[1:])):
+            return {
+                "start": parsed[0].strftime("%Y-%m-%dT%H:%M:%S"),
+                "step_seconds": int(step.total_seconds()),
+                "v": values,
+            }
+
+    return {"t": times, "v": values}
+
+
+def _columnar_series_by_sdid(points):
+    """
+    Per-sd_id columnar series for hourly unit rows sorted by sd_id.
+    """
+    grouped = OrderedDict()
+    for point in points:
+        grouped.setdefault(point["sd_id"], []).append(point)
+    return [{"sd_id": sd_id, **_columnar_series(rows)} for sd_id, rows in grouped.items()]
+
+
+# Chart endpoints accept ?max_points=N to thin every returned series to at
+# most N points server-side. Absent (or 0) means full resolution.
+MAX_POINTS_MIN = 4
+
+
+def _max_points():
+    """
+    The requested ?max_points= (0 when absent), or None when it is not a
+    whole number >= MAX_POINTS_MIN.
+    """
+    raw = (request.args.get("max_points") or "").strip()
+    if not raw or raw == "0":
+        return 0
+    if not raw.isdigit() or int(raw) < MAX_POINTS_MIN:
+        return None
+    return int(raw)
+
+
+def _downsample_points(points, max_points):
+    """
+    Largest-Triangle-Three-Buckets over a list of {"t", "v"} points.
+    The first and last points are always kept (for historic the last one
+    is the cutover), and so are the series minimum and maximum: a bucket
+    holding either extreme keeps it instead of its triangle winner.
+    Null values never win a bucket unless the whole bucket is null.
+    """
+    n = len(points)
+    if not max_points or n <= max_points:
+        return points
+
+    nan = float("nan")
+    xs = array("d", (_iso_to_epoch(point["t"]) for point in points))
+    ys = array("d", (nan if point["v"] is None else point["v"] for point in points))
+
+    valid = [i for i in range(n) if ys[i] == ys[i]]
+    pinned = set()
+    if valid:
+        pinned.add(min(valid, key=ys.__getitem__))
+        pinned.add(max(valid, key=ys.__getitem__))
+
+    def bucket_bounds(threshold):
+        size = (n - 2) / (threshold - 2)
+        return [(int(b * size) + 1, int((b + 1) * size) + 1) for b in range(threshold - 2)]
+
+    threshold = max_points
+    buckets = bucket_bounds(threshold)
+    interior = [i for i in pinned if 0 < i < n - 1]
+    if len(interior) == 2 and any(start <= min(interior) and max(interior) < end for start, end in buckets):
+        # Both extremes share a bucket; give up one bucket so keeping
+        # both still stays within max_points.
+        threshold -= 1
+        buckets = bucket_bounds(threshold)
+
+    selected = [0]
+    a = 0
+    for b, (start, end) in enumerate(buckets):
+        next_start, next_end = buckets[b + 1] if b + 1 < len(buckets) else (n - 1, n)
+        keep = sorted(i for i in pinned if start <= i < end)
+        if keep:
+            selected.extend(keep)
+            a = keep[-1]
+            continue
+
+        xa, ya = xs[a], ys[a]
+        next_ys = [y for y in ys[next_start:next_end] if y == y]
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(next_ys) / len(next_ys) if next_ys else ya
+        # A null anchor (or null neighbourhood) falls back to the flat line
+        # through whatever real value is nearest.
+        if ya != ya:
+            ya = avg_y
+        if ya != ya:
+            ya = avg_y = 0.0
+
+        best, best_area = start, -1.0
+        for i in range(start, end):
+            area = abs((xa - avg_x) * (ys[i] - ya) - (xa - xs[i]) * (avg_y - ya))
+            if area > best_area:
+                best, best_area = i, area
+        selected.append(best)
+        a = best
+
+    selected.append(n - 1)
+    return [points[i] for i in selected]
+
+
+def _downsample_points_by_sdid(points, max_points):
+    """
+    _downsample_points applied per sd_id to hourly unit rows sorted by sd_id.
+    """
+    if not max_points:
+        return points
+    grouped = OrderedDict()
+    for point in points:
+        grouped.setdefault(point["sd_id"], []).append(point)
+    return [point for rows in grouped.values() for point in _downsample_points(rows, max_points)]
+
+
+#API elevation
+
+@app.route("/api/elevation", methods=["GET"])
+def api_elevation():
+    """
+    Returns merged historic + forecast daily elevation for a dam.
+    Range options:
+      30d (MTD), 90d (3M), 365d (YTD), 5y
+    """
+
+    dam = (request.args.get("dam") or "hoover").lower().strip()
+    range_key = (request.args.get("range") or "30d").lower().strip()
+
+    if sdid_registry().sd_id(dam, "elevation") is None:
+        return jsonify({"error": "Invalid dam"}), 400
+    if range_key not in DAILY_RANGE_DAYS:
+        return jsonify({"error": "Invalid range"}), 400
+
+    response_format = _response_format()
+    if response_format is None:
+        return jsonify({"error": "Invalid format"}), 400
+
+    max_points = _max_points()
+    if max_points is None:
+        return jsonify({"error": "Invalid max_points"}), 400
+
+    if response_format == "rows" and not max_points:
+        snapshot = _snapshot_response(_snapshot_key("/api/elevation", dam=dam, range=range_key))
+        if snapshot is not None:
+            return snapshot
+
+    body, status = _elevation_response_body(dam, range_key, response_format, max_points)
+    return jsonify(body), status
+
+
+def _elevation_response_body(dam, range_key, response_format="rows", max_points=0):
+    payload = _build_daily_stitched_payload(
+        sdid_registry().sd_id(dam, "elevation"), DAILY_RANGE_DAYS[range_key], response_format, max_points
+    )
+    if "error" in payload:
+        return payload, 400
+
+    return {
+        "dam": dam,
+        "range": range_key,
+        **payload
+    }, 200
+
+
+def _build_daily_stitched_payload(sd_id, days_back, response_format="rows", max_points=0):
+    """
+    Cached front door for the stitched daily series.
+    Entries are keyed on the AZ date because the cutover moves at midnight,
+    and dropped whenever the data version changes. Row payloads are sliced
+    out of the per-sd_id series from _daily_series; downsampled and columnar
+    payloads are derived from (and cached next to) the full row payload.
+    """
+    az_today_start = _az_today_start_naive()
+    cache_key = (sd_id, days_back, az_today_start.date().isoformat(), response_format, max_points)
+    version = _current_data_version()
+
+    payload = _stitched_cache_get(cache_key)
+    if payload is not None:
+        return payload
+
+    if response_format == "columnar":
+        payload = _build_daily_stitched_payload(sd_id, days_back, max_points=max_points)
+        if "error" not in payload:
+            payload = {
+                **payload,
+                "format": "columnar",
+                "historic": _columnar_series(payload["historic"]),
+                "forecast": _columnar_series(payload["forecast"]),
+            }
+    elif max_points:
+        payload = _build_daily_stitched_payload(sd_id, days_back)
+        if "error" not in payload:
+            payload = {
+                **payload,
+                "historic": _downsample_points(payload["historic"], max_points),
+                "forecast": _downsample_points(payload["forecast"], max_points),
+            }
+    else:
+        series = _daily_series(sd_id, az_today_start)
+        if series is None:
+            return {"error": "No historic data found"}
+        payload = _slice_daily_series(series, days_back)
+
+    if "error" not in payload:
+        _stitched_cache_put(cache_key, version, payload)
+    return payload
+
+
+def _daily_series(sd_id, az_today_start):
+    """
+    The widest-range historic window of sd_id plus its latest forecast,
+    loaded once per AZ date and data version. Every range and the
+    last-year point are binary-search slices of it.
+    Returns None when the series has no historic data.
+    """
+    cache_key = ("series", sd_id, az_today_start.date().isoformat())
+    version = _current_data_version()
+
+    series = _stitched_cache_get(cache_key)
+    if series is None:
+        series = _query_daily_series(sd_id, az_today_start)
+        if series is None:
+            return None
+        _stitched_cache_put(cache_key, version, series)
+    return series
+
+
+def _query_daily_series(sd_id, az_today_start):
+    conn = get_db_connection(readonly=True)
+    cursor = conn.cursor()
+
+    az_today_start_iso = az_today_start.strftime("%Y-%m-%dT%H:%M:%S")
+
+    cursor.execute(_sql("daily.cutover"), (sd_id, _ts_param(az_today_start_iso)))
+    cutover = cursor.fetchone()[0]
+
+    if not cutover:
+        conn.close()
+        return None
+
+    start_dt = _parse_db_datetime(cutover) - timedelta(days=DAILY_FULL_RANGE_DAYS)
+    start_iso = start_dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+    cursor.execute(
+        _sql("daily.history"),
+        (sd_id, _ts_param(start_iso), _ts_param(cutover), _ts_param(az_today_start_iso)),
+    )
+    historic_rows = cursor.fetchall()
+
+    latest_accessed = _latest_forecast_accessed(cursor, "forecasted_daily_data", [sd_id])
 
     forecast_rows = []
     if latest_accessed:
-        cursor.execute("""
-            SELECT forecasted_datetime, value
-            FROM forecasted_daily_data
-            WHERE sd_id = ?
-              AND datetime_accessed = ?
-              AND forecasted_datetime > ?
-            ORDER BY forecasted_datetime ASC
-        """, (sd_id, latest_accessed, cutover))
+        cursor.execute(_sql("daily.forecast"), (sd_id, _ts_param(latest_accessed), _ts_param(cutover)))
         forecast_rows = cursor.fetchall()
 
     conn.close()
 
     historic = [{"t": r["historic_datetime"], "v": r["value"]} for r in historic_rows]
-    forecast = [{"t": r["forecasted_datetime"], "v": r["value"]} for r in forecast_rows]
 
     return {
+        "sd_id": sd_id,
         "cutover": cutover,
         "as_of": latest_accessed,
+        # Bind-form timestamps in scan order, so bisect agrees with the
+        # comparisons SQLite would make against the stored column.
+        "historic_keys": [_ts_param(point["t"]) for point in historic],
+        "historic": historic,
+        "forecast": [{"t": r["forecasted_datetime"], "v": r["value"]} for r in forecast_rows],
+    }
+
+
+def _slice_daily_series(series, days_back):
+    cutover = series["cutover"]
+    cutover_dt = _parse_db_datetime(cutover)
+    keys = series["historic_keys"]
+
+    start_iso = (cutover_dt - timedelta(days=days_back)).strftime("%Y-%m-%dT%H:%M:%S")
+    historic = series["historic"][bisect_left(keys, _ts_param(start_iso)):]
+
+    last_year_iso = (cutover_dt - timedelta(days=365)).strftime("%Y-%m-%dT%H:%M:%S")
+    last_year_index = bisect_right(keys, _ts_param(last_year_iso)) - 1
+    if last_year_index >= 0:
+        last_year_point = series["historic"][last_year_index]
+    else:
+        last_year_point = _query_daily_point_at_or_before(series["sd_id"], last_year_iso)
+
+    return {
+        "cutover": cutover,
+        "as_of": series["as_of"],
         "historic": historic,
-        "forecast": forecast,
-        "last_year_historic": {
-            "t": last_year_row["historic_datetime"],
-            "v": last_year_row["value"]
-        } if last_year_row else None,
+        "forecast": series["forecast"],
+        "last_year_historic": last_year_point,
         "last_historic": {
             "t": cutover,
-            "v": last_hist_value
+            "v": historic[-1]["v"] if historic else None
         }
     }
 
 
-def _api_daily_metric(metric_name, sd_id):
+def _query_daily_point_at_or_before(sd_id, iso):
+    """
+    Only reached when the in-memory window holds nothing that old,
+    i.e. the series has a multi-year gap before the last-year target.
+    """
+    conn = get_db_connection(readonly=True)
+    cursor = conn.cursor()
+
+    cursor.execute(_sql("daily.point_at_or_before"), (sd_id, _ts_param(iso)))
+    row = cursor.fetchone()
+    conn.close()
+
+    if not row:
+        return None
+    return {"t": row["historic_datetime"], "v": row["value"]}
+
+
+def _api_daily_metric(metric_name, dam):
     range_key = (request.args.get("range") or "30d").lower().strip()
-    range_days = {
-        "30d": 30,
-        "90d": 90,
-        "365d": 365,
-        "5y": 1825
-    }
 
-    if range_key not in range_days:
+    if range_key not in DAILY_RANGE_DAYS:
         return jsonify({"error": "Invalid range"}), 400
 
-    payload = _build_daily_stitched_payload(sd_id, range_days[range_key])
+    response_format = _response_format()
+    if response_format is None:
+        return jsonify({"error": "Invalid format"}), 400
+
+    max_points = _max_points()
+    if max_points is None:
+        return jsonify({"error": "Invalid max_points"}), 400
+
+    if response_format == "rows" and not max_points:
+        snapshot = _snapshot_response(_snapshot_key(request.path, range=range_key))
+        if snapshot is not None:
+            return snapshot
+
+    body, status = _daily_metric_response_body(metric_name, dam, range_key, response_format, max_points)
+    return jsonify(body), status
+
+
+def _daily_metric_response_body(metric_name, dam, range_key, response_format="rows", max_points=0):
+    payload = _build_daily_stitched_payload(
+        sdid_registry().sd_id(dam, metric_name), DAILY_RANGE_DAYS[range_key], response_format, max_points
+    )
     if "error" in payload:
-        return jsonify(payload), 400
+        return payload, 400
 
-    return jsonify({
+    return {
         "metric": metric_name,
         "data_granularity": "daily",
         "historic_source_table": "historic_daily_data",
         "forecast_source_table": "forecasted_daily_data",
         "range": range_key,
         **payload
-    })
+    }, 200
 
 
 @app.route("/api/release/daily", methods=["GET"])
@@ -498,31 +3053,40 @@ def api_release_daily_by_dam():
     """
 
     dam = (request.args.get("dam") or "").lower().strip()
-    dam_to_sdid = {
-        "hoover": 1863,
-        "davis": 2166,
-        "parker": 2146
-    }
 
-    if dam not in dam_to_sdid:
+    if sdid_registry().sd_id(dam, "release") is None:
         return jsonify({"error": "Invalid dam"}), 400
 
     range_key = (request.args.get("range") or "30d").lower().strip()
-    range_days = {
-        "30d": 30,
-        "90d": 90,
-        "365d": 365,
-        "5y": 1825
-    }
 
-    if range_key not in range_days:
+    if range_key not in DAILY_RANGE_DAYS:
         return jsonify({"error": "Invalid range"}), 400
 
-    payload = _build_daily_stitched_payload(dam_to_sdid[dam], range_days[range_key])
+    response_format = _response_format()
+    if response_format is None:
+        return jsonify({"error": "Invalid format"}), 400
+
+    max_points = _max_points()
+    if max_points is None:
+        return jsonify({"error": "Invalid max_points"}), 400
+
+    if response_format == "rows" and not max_points:
+        snapshot = _snapshot_response(_snapshot_key("/api/release/daily", dam=dam, range=range_key))
+        if snapshot is not None:
+            return snapshot
+
+    body, status = _release_daily_response_body(dam, range_key, response_format, max_points)
+    return jsonify(body), status
+
+
+def _release_daily_response_body(dam, range_key, response_format="rows", max_points=0):
+    payload = _build_daily_stitched_payload(
+        sdid_registry().sd_id(dam, "release"), DAILY_RANGE_DAYS[range_key], response_format, max_points
+    )
     if "error" in payload:
-        return jsonify(payload), 400
+        return payload, 400
 
-    return jsonify({
+    return {
         "dam": dam,
         "metric": "release",
         "data_granularity": "daily",
@@ -530,67 +3094,58 @@ def api_release_daily_by_dam():
         "forecast_source_table": "forecasted_daily_data",
         "range": range_key,
         **payload
-    })
+    }, 200
+
+
+# Lake-scoped daily endpoints: path -> (metric name, dam)
+LAKE_DAILY_METRIC_ROUTES = {
+    "/api/lake-mead/releases": ("release", "hoover"),
+    "/api/lake-mohave/releases": ("release", "davis"),
+    "/api/lake-havasu/releases": ("release", "parker"),
+    "/api/lake-mead/energy": ("energy", "hoover"),
+}
 
 
 @app.route("/api/lake-mead/releases", methods=["GET"])
 def api_lake_mead_releases():
-    return _api_daily_metric("release", 1863)
+    return _api_daily_metric(*LAKE_DAILY_METRIC_ROUTES["/api/lake-mead/releases"])
 
 
 @app.route("/api/lake-mohave/releases", methods=["GET"])
 def api_lake_mohave_releases():
-    return _api_daily_metric("release", 2166)
+    return _api_daily_metric(*LAKE_DAILY_METRIC_ROUTES["/api/lake-mohave/releases"])
 
 
 @app.route("/api/lake-havasu/releases", methods=["GET"])
 def api_lake_havasu_releases():
-    return _api_daily_metric("release", 2146)
+    return _api_daily_metric(*LAKE_DAILY_METRIC_ROUTES["/api/lake-havasu/releases"])
 
 
 @app.route("/api/lake-mead/energy", methods=["GET"])
 def api_lake_mead_energy():
-    return _api_daily_metric("energy", 2070)
+    return _api_daily_metric(*LAKE_DAILY_METRIC_ROUTES["/api/lake-mead/energy"])
+
+
+# API release hourly for Chart 3 (Davis/Parker). The same dams have the
+# per-unit energy series behind Chart 4.
+HOURLY_DAMS = ("davis", "parker")
 
 
-# API release hourly for Chart 3 (Davis/Parker)
 @app.route("/api/release/hourly/dates", methods=["GET"])
 def api_release_hourly_dates():
     dam = (request.args.get("dam") or "").lower().strip()
 
-    dam_to_sdid = {
-        "davis": 2166,
-        "parker": 2146
-    }
-
-    if dam not in dam_to_sdid:
+    if dam not in HOURLY_DAMS:
         return jsonify({"error": "Chart 3 is only available for Davis and Parker"}), 400
 
-    sd_id = dam_to_sdid[dam]
-
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT DISTINCT substr(historic_datetime, 1, 10) AS dt
-        FROM historic_hourly_data
-        WHERE sd_id = ?
-        UNION
-        SELECT DISTINCT substr(forecasted_datetime, 1, 10) AS dt
-        FROM forecasted_hourly_data
-        WHERE sd_id = ?
-        ORDER BY dt ASC
-    """, (sd_id, sd_id))
-
-    rows = cursor.fetchall()
-    conn.close()
+    return jsonify(_release_hourly_dates_body(dam))
 
-    dates = [row["dt"] for row in rows if row["dt"]]
 
-    return jsonify({
+def _release_hourly_dates_body(dam):
+    return {
         "dam": dam,
-        "dates": dates
-    })
+        "dates": _query_hourly_dates([sdid_registry().sd_id(dam, "release")])
+    }
 
 
 @app.route("/api/release/hourly", methods=["GET"])
@@ -598,52 +3153,42 @@ def api_release_hourly():
     dam = (request.args.get("dam") or "").lower().strip()
     selected_date = (request.args.get("date") or "").strip()
 
-    dam_to_sdid = {
-        "davis": 2166,
-        "parker": 2146
-    }
-
-    if dam not in dam_to_sdid:
+    if dam not in HOURLY_DAMS:
         return jsonify({"error": "Chart 3 is only available for Davis and Parker"}), 400
 
     if not re.match(r"^\d{4}-\d{2}-\d{2}$", selected_date):
         return jsonify({"error": "date must be YYYY-MM-DD"}), 400
 
-    sd_id = dam_to_sdid[dam]
+    response_format = _response_format()
+    if response_format is None:
+        return jsonify({"error": "Invalid format"}), 400
+
+    max_points = _max_points()
+    if max_points is None:
+        return jsonify({"error": "Invalid max_points"}), 400
+
+    return jsonify(_release_hourly_response_body(dam, selected_date, response_format, max_points))
+
+
+def _release_hourly_response_body(dam, selected_date, response_format="rows", max_points=0):
+    sd_id = sdid_registry().sd_id(dam, "release")
     day_start = f"{selected_date}T00:00:00"
     day_end = f"{selected_date}T23:59:59"
 
-    conn = get_db_connection()
+    conn = get_db_connection(readonly=True)
     cursor = conn.cursor()
 
-    cursor.execute("""
-        SELECT MAX(datetime_accessed)
-        FROM forecasted_hourly_data
-        WHERE sd_id = ?
-    """, (sd_id,))
-    latest_accessed = cursor.fetchone()[0]
+    latest_accessed = _latest_forecast_accessed(cursor, "forecasted_hourly_data", [sd_id])
 
-    cursor.execute("""
-        SELECT historic_datetime, value
-        FROM historic_hourly_data
-        WHERE sd_id = ?
-          AND historic_datetime >= ?
-          AND historic_datetime <= ?
-        ORDER BY historic_datetime ASC
-    """, (sd_id, day_start, day_end))
+    cursor.execute(_sql("hourly.release_historic"), (sd_id, _ts_param(day_start), _ts_param(day_end)))
     historic_rows = cursor.fetchall()
 
     forecast_rows = []
     if latest_accessed:
-        cursor.execute("""
-            SELECT forecasted_datetime, value
-            FROM forecasted_hourly_data
-            WHERE sd_id = ?
-              AND datetime_accessed = ?
-              AND forecasted_datetime >= ?
-              AND forecasted_datetime <= ?
-            ORDER BY forecasted_datetime ASC
-        """, (sd_id, latest_accessed, day_start, day_end))
+        cursor.execute(
+            _sql("hourly.release_forecast"),
+            (sd_id, _ts_param(latest_accessed), _ts_param(day_start), _ts_param(day_end)),
+        )
         forecast_rows = cursor.fetchall()
 
     conn.close()
@@ -666,145 +3211,48 @@ def api_release_hourly():
         for row in forecast_rows
     ]
 
-    return jsonify({
+    historic = _downsample_points(historic, max_points)
+    forecast = _downsample_points(forecast, max_points)
+
+    if response_format == "columnar":
+        # hour is implied by t, so columnar drops it.
+        return {
+            "dam": dam,
+            "date": selected_date,
+            "as_of": latest_accessed,
+            "format": "columnar",
+            "historic": _columnar_series(historic),
+            "forecast": _columnar_series(forecast)
+        }
+
+    return {
         "dam": dam,
         "date": selected_date,
         "as_of": latest_accessed,
         "historic": historic,
         "forecast": forecast
-    })
-
-
-def _find_existing_column(columns, candidates):
-    for candidate in candidates:
-        if candidate in columns:
-            return candidate
-    return None
-
-
-CHART4_UNIT_CONFIG = {
-    "davis": [
-        {"sd_id": 14163, "unit": "D1", "unit_number": 1},
-        {"sd_id": 14164, "unit": "D2", "unit_number": 2},
-        {"sd_id": 14165, "unit": "D3", "unit_number": 3},
-        {"sd_id": 14166, "unit": "D4", "unit_number": 4},
-        {"sd_id": 14167, "unit": "D5", "unit_number": 5},
-    ],
-    "parker": [
-        {"sd_id": 14168, "unit": "P1", "unit_number": 1},
-        {"sd_id": 14169, "unit": "P2", "unit_number": 2},
-        {"sd_id": 14170, "unit": "P3", "unit_number": 3},
-        {"sd_id": 14171, "unit": "P4", "unit_number": 4},
-    ],
-}
-
-
-def _get_energy_unit_rows(cursor, dam):
-    fallback_units = [dict(unit) for unit in CHART4_UNIT_CONFIG.get(dam, [])]
-
-    cursor.execute("PRAGMA table_info(sdid_mapping)")
-    mapping_columns = [row[1] for row in cursor.fetchall()]
-
-    if not mapping_columns:
-        return fallback_units
-
-    id_col = _find_existing_column(mapping_columns, ["sd_id", "sdi", "sdid", "id"])
-    label_col = _find_existing_column(mapping_columns, [
-        "unit", "unit_name", "label", "name", "series_name", "sdi_name", "description"
-    ])
-    dam_col = _find_existing_column(mapping_columns, ["dam", "dam_name", "reservoir", "location", "site"])
-
-    if not id_col or not label_col:
-        return fallback_units
-
-    dam_prefix = "P" if dam == "parker" else "D"
-    dam_name_like = "Parker" if dam == "parker" else "Davis"
-
-    where_clauses = [
-        "(" + " OR ".join([
-            f"UPPER({label_col}) GLOB ?",
-            f"UPPER({label_col}) LIKE ?",
-            f"UPPER({label_col}) LIKE ?"
-        ]) + ")"
-    ]
-    params = [
-        f"{dam_prefix}[0-9]*",
-        f"%{dam_name_like.upper()}%UNIT%",
-        f"%{dam_prefix}%UNIT%"
-    ]
-
-    if dam_col:
-        where_clauses.append(f"UPPER({dam_col}) LIKE ?")
-        params.append(f"%{dam_name_like.upper()}%")
-
-    query = f"""
-        SELECT {id_col} AS sd_id, {label_col} AS unit_label
-        FROM sdid_mapping
-        WHERE {' AND '.join(where_clauses)}
-    """
-
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
-
-    units = []
-    for row in rows:
-        label = str(row["unit_label"] or "").strip().upper()
-        match = re.search(rf"\b{dam_prefix}\s*-?\s*(\d+)\b", label)
-        if not match:
-            match = re.search(rf"\b{dam_name_like.upper()}\s+UNIT\s*-?\s*(\d+)\b", label)
-        if not match:
-            continue
-        units.append({
-            "sd_id": int(row["sd_id"]),
-            "unit": f"{dam_prefix}{int(match.group(1))}",
-            "unit_number": int(match.group(1))
-        })
-
-    if not units:
-        return fallback_units
-
-    units.sort(key=lambda u: u["unit_number"])
-    return units
+    }
 
 
 @app.route("/api/energy/hourly/units/dates", methods=["GET"])
 def api_energy_hourly_unit_dates():
     dam = (request.args.get("dam") or "").lower().strip()
 
-    if dam not in ["davis", "parker"]:
+    if dam not in HOURLY_DAMS:
         return jsonify({"error": "Chart 4 is only available for Davis and Parker"}), 400
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    unit_rows = _get_energy_unit_rows(cursor, dam)
-    if not unit_rows:
-        conn.close()
-        return jsonify({"dam": dam, "dates": []})
-
-    sd_ids = [row["sd_id"] for row in unit_rows]
-    placeholders = ",".join(["?"] * len(sd_ids))
-
-    cursor.execute(f"""
-        SELECT DISTINCT substr(historic_datetime, 1, 10) AS dt
-        FROM historic_hourly_data
-        WHERE sd_id IN ({placeholders})
-        UNION
-        SELECT DISTINCT substr(forecasted_datetime, 1, 10) AS dt
-        FROM forecasted_hourly_data
-        WHERE sd_id IN ({placeholders})
-        ORDER BY dt ASC
-    """, sd_ids + sd_ids)
+    return jsonify(_energy_unit_dates_body(dam))
 
-    rows = cursor.fetchall()
-    conn.close()
 
-    dates = [row["dt"] for row in rows if row["dt"]]
+def _energy_unit_dates_body(dam):
+    unit_rows = sdid_registry().units(dam)
+    if not unit_rows:
+        return {"dam": dam, "dates": []}
 
-    return jsonify({
+    return {
         "dam": dam,
-        "dates": dates
-    })
+        "dates": _query_hourly_dates([row["sd_id"] for row in unit_rows])
+    }
 
 
 @app.route("/api/energy/hourly/units", methods=["GET"])
@@ -812,60 +3260,56 @@ def api_energy_hourly_units():
     dam = (request.args.get("dam") or "").lower().strip()
     selected_date = (request.args.get("date") or "").strip()
 
-    if dam not in ["davis", "parker"]:
+    if dam not in HOURLY_DAMS:
         return jsonify({"error": "Chart 4 is only available for Davis and Parker"}), 400
 
     if not re.match(r"^\d{4}-\d{2}-\d{2}$", selected_date):
         return jsonify({"error": "date must be YYYY-MM-DD"}), 400
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    response_format = _response_format()
+    if response_format is None:
+        return jsonify({"error": "Invalid format"}), 400
 
-    unit_rows = _get_energy_unit_rows(cursor, dam)
+    max_points = _max_points()
+    if max_points is None:
+        return jsonify({"error": "Invalid max_points"}), 400
+
+    return jsonify(_energy_units_response_body(dam, selected_date, response_format, max_points))
+
+
+def _energy_units_response_body(dam, selected_date, response_format="rows", max_points=0):
+    unit_rows = sdid_registry().units(dam)
     if not unit_rows:
-        conn.close()
-        return jsonify({
+        return {
             "dam": dam,
             "date": selected_date,
             "as_of": None,
             "units": [],
             "historic": [],
             "forecast": []
-        })
+        }
 
     sd_ids = [row["sd_id"] for row in unit_rows]
-    placeholders = ",".join(["?"] * len(sd_ids))
     day_start = f"{selected_date}T00:00:00"
     day_end = f"{selected_date}T23:59:59"
 
-    cursor.execute(f"""
-        SELECT MAX(datetime_accessed)
-        FROM forecasted_hourly_data
-        WHERE sd_id IN ({placeholders})
-    """, sd_ids)
-    latest_accessed = cursor.fetchone()[0]
+    conn = get_db_connection(readonly=True)
+    cursor = conn.cursor()
 
-    cursor.execute(f"""
-        SELECT sd_id, historic_datetime, value
-        FROM historic_hourly_data
-        WHERE sd_id IN ({placeholders})
-          AND historic_datetime >= ?
-          AND historic_datetime <= ?
-        ORDER BY sd_id ASC, historic_datetime ASC
-    """, sd_ids + [day_start, day_end])
+    latest_accessed = _latest_forecast_accessed(cursor, "forecasted_hourly_data", sd_ids)
+
+    cursor.execute(
+        _sql("hourly.units_historic", len(sd_ids)),
+        sd_ids + [_ts_param(day_start), _ts_param(day_end)],
+    )
     historic_rows = cursor.fetchall()
 
     forecast_rows = []
     if latest_accessed:
-        cursor.execute(f"""
-            SELECT sd_id, forecasted_datetime, value
-            FROM forecasted_hourly_data
-            WHERE sd_id IN ({placeholders})
-              AND datetime_accessed = ?
-              AND forecasted_datetime >= ?
-              AND forecasted_datetime <= ?
-            ORDER BY sd_id ASC, forecasted_datetime ASC
-        """, sd_ids + [latest_accessed, day_start, day_end])
+        cursor.execute(
+            _sql("hourly.units_forecast", len(sd_ids)),
+            sd_ids + [_ts_param(latest_accessed), _ts_param(day_start), _ts_param(day_end)],
+        )
         forecast_rows = cursor.fetchall()
 
     conn.close()
@@ -890,67 +3334,204 @@ def api_energy_hourly_units():
         for row in forecast_rows
     ]
 
-    return jsonify({
+    historic = _downsample_points_by_sdid(historic, max_points)
+    forecast = _downsample_points_by_sdid(forecast, max_points)
+
+    if response_format == "columnar":
+        return {
+            "dam": dam,
+            "date": selected_date,
+            "as_of": latest_accessed,
+            "format": "columnar",
+            "units": unit_rows,
+            "historic": _columnar_series_by_sdid(historic),
+            "forecast": _columnar_series_by_sdid(forecast)
+        }
+
+    return {
         "dam": dam,
         "date": selected_date,
         "as_of": latest_accessed,
         "units": unit_rows,
         "historic": historic,
         "forecast": forecast
-    })
+    }
 
 # ==============================
-# 24 MONTH STUDY (24MS) API
+# HOURLY ROLLUP API
 # ==============================
+# Historic hourly data over arbitrary date ranges, one row per day, week
+# (starting Monday) or month, read from hourly_daily_rollup.
 
-# Hardcoded SDID map
-SDID_MAP = {
-    "hoover": {
-        "elevation": 1930,
-        "release": 1863,
-        "energy": 2070
-    },
-    "davis": {
-        "elevation": 2100,
-        "release": 2166,
-        "energy": 2071
-    },
-    "parker": {
-        "elevation": 2101,
-        "release": 2146,
-        "energy": 2072
-    }
+ROLLUP_PERIOD_SQL = {
+    "day": "date",
+    "week": "date(date, '-6 days', 'weekday 1')",
+    "month": "substr(date, 1, 7) || '-01'",
 }
 
 
+def _parse_rollup_args(args):
+    period = (args.get("period") or "day").strip().lower()
+    if period not in ROLLUP_PERIOD_SQL:
+        raise ValueError(f"period must be one of: {', '.join(ROLLUP_PERIOD_SQL)}")
+
+    try:
+        start_date = datetime.strptime((args.get("start") or "").strip(), "%Y-%m-%d")
+        end_date = datetime.strptime((args.get("end") or "").strip(), "%Y-%m-%d")
+    except ValueError:
+        raise ValueError("start and end must be YYYY-MM-DD")
+
+    if start_date > end_date:
+        raise ValueError("start must be on or before end")
+
+    return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"), period
+
+
+def _query_hourly_rollup(cursor, sd_ids, start, end, period):
+    """
+    Rollup rows per (sd_id, period start) for days start..end inclusive.
+    Aggregates historic_hourly_data directly when the rollup table has not
+    been created yet (fresh DB that has not seen an hourly update job).
+    """
+    statement = "hourly_rollup.by_period"
+    try:
+        cursor.execute(_sql("hourly_rollup.exists"))
+    except sqlite3.OperationalError:
+        statement = "hourly_rollup.by_period_unrolled"
+
+    cursor.execute(_sql(statement, period, len(sd_ids)), list(sd_ids) + [start, end])
+
+    return [
+        {
+            "sd_id": int(row["sd_id"]),
+            "t": row["period_start"],
+            "hours": row["hours"],
+            "min": row["min_value"],
+            "mean": row["sum_value"] / row["hours"] if row["hours"] else None,
+            "max": row["max_value"],
+            "sum": row["sum_value"]
+        }
+        for row in cursor.fetchall()
+    ]
+
+
+@app.route("/api/release/hourly/rollup", methods=["GET"])
+def api_release_hourly_rollup():
+    dam = (request.args.get("dam") or "").lower().strip()
+
+    if dam not in HOURLY_DAMS:
+        return jsonify({"error": "Hourly release is only available for Davis and Parker"}), 400
+
+    try:
+        start, end, period = _parse_rollup_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(_release_hourly_rollup_body(dam, start, end, period))
+
+
+def _release_hourly_rollup_body(dam, start, end, period):
+    conn = get_db_connection(readonly=True)
+    cursor = conn.cursor()
+
+    rows = _query_hourly_rollup(cursor, [sdid_registry().sd_id(dam, "release")], start, end, period)
+    conn.close()
+
+    for row in rows:
+        del row["sd_id"]
+
+    return {
+        "dam": dam,
+        "start": start,
+        "end": end,
+        "period": period,
+        "source_table": "historic_hourly_data",
+        "rollup": rows
+    }
+
+
+@app.route("/api/energy/hourly/units/rollup", methods=["GET"])
+def api_energy_hourly_units_rollup():
+    dam = (request.args.get("dam") or "").lower().strip()
+
+    if dam not in HOURLY_DAMS:
+        return jsonify({"error": "Unit energy is only available for Davis and Parker"}), 400
+
+    try:
+        start, end, period = _parse_rollup_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(_energy_units_rollup_body(dam, start, end, period))
+
+
+def _energy_units_rollup_body(dam, start, end, period):
+    unit_rows = sdid_registry().units(dam)
+    rows = []
+    if unit_rows:
+        conn = get_db_connection(readonly=True)
+        rows = _query_hourly_rollup(conn.cursor(), [unit["sd_id"] for unit in unit_rows], start, end, period)
+        conn.close()
+
+    # Dam-wide generation per period is the sum over its units.
+    totals = {}
+    for row in rows:
+        total = totals.setdefault(row["t"], {"t": row["t"], "hours": 0, "sum": 0.0})
+        total["hours"] += row["hours"]
+        total["sum"] += row["sum"] or 0.0
+
+    return {
+        "dam": dam,
+        "start": start,
+        "end": end,
+        "period": period,
+        "source_table": "historic_hourly_data",
+        "units": unit_rows,
+        "rollup": rows,
+        "totals": [totals[t] for t in sorted(totals)]
+    }
+
+# ==============================
+# 24 MONTH STUDY (24MS) API
+# ==============================
+
+
 # --------------------------------
 # Get Available 24MS Months
 # --------------------------------
 @app.route("/api/24ms/months", methods=["GET"])
 def get_24ms_months():
+    snapshot = _snapshot_response(_snapshot_key("/api/24ms/months"))
+    if snapshot is not None:
+        return snapshot
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    return jsonify(_query_24ms_months())
 
-    cursor.execute("""
-        SELECT DISTINCT
-            substr(run_name, 1, instr(run_name, ' 24MS') - 1) AS month_label
-        FROM mrid_mapping
-        WHERE run_name LIKE '%24MS%'
-    """)
 
-    rows = cursor.fetchall()
-    conn.close()
+def _query_24ms_months():
+    """
+    Study month labels, newest first so Chart #2 defaults to the most
+    recent study. Cached per data version.
+    """
+    cache_key = ("study_months",)
+    version = _current_data_version()
 
-    months = [row["month_label"] for row in rows if row["month_label"]]
+    months = _stitched_cache_get(cache_key)
+    if months is not None:
+        return months
 
-    # Sort newest -> oldest so Chart #2 defaults to the most recent study.
-    months.sort(
-        key=lambda label: _parse_24ms_month_label(label) or datetime.min,
-        reverse=True
-    )
+    conn = get_db_connection(readonly=True)
+    try:
+        rows = conn.execute(_sql("24ms.months")).fetchall()
+    except sqlite3.OperationalError:
+        # study_runs is created at startup; a read-only deploy may lack it.
+        rows = []
+    finally:
+        conn.close()
 
-    return jsonify(months)
+    months = [datetime.strptime(row["study_month"], "%Y-%m-%d").strftime("%B %Y") for row in rows]
+    _stitched_cache_put(cache_key, version, months)
+    return months
 
 # --------------------------------
 # Get 24MS Data
@@ -962,66 +3543,50 @@ def get_24ms_data():
     variable = request.args.get("variable", "").lower()
     month = request.args.get("month", "")
 
-    if dam not in SDID_MAP:
+    registry = sdid_registry()
+    if dam not in registry.dams:
         return jsonify({"error": "Invalid dam"}), 400
 
-    if variable not in SDID_MAP[dam]:
+    if registry.sd_id(dam, variable) is None:
         return jsonify({"error": "Invalid variable"}), 400
 
     if not month:
         return jsonify({"error": "Month required"}), 400
 
-    sd_id = SDID_MAP[dam][variable]
+    body, status = _24ms_response_body(dam, variable, month)
+    return jsonify(body), status
 
-    conn = get_db_connection()
+
+def _24ms_response_body(dam, variable, month):
+    sd_id = sdid_registry().sd_id(dam, variable)
+
+    study_month = _parse_24ms_month_label(month)
+    if not study_month:
+        return {"error": "No runs found for month"}, 404
+
+    conn = get_db_connection(readonly=True)
     cursor = conn.cursor()
 
     # Get MRIDs for selected month
-    cursor.execute("""
-        SELECT mr_id, run_name
-        FROM mrid_mapping
-        WHERE run_name LIKE ?
-    """, (f"{month} 24MS%",))
-
-    mr_rows = cursor.fetchall()
+    try:
+        cursor.execute(_sql("24ms.runs_for_month"), (study_month.strftime("%Y-%m-01"),))
+        mr_rows = cursor.fetchall()
+    except sqlite3.OperationalError:
+        mr_rows = []
 
     if not mr_rows:
         conn.close()
-        return jsonify({"error": "No runs found for month"}), 404
-
-    mrid_to_label = {}
-
-    for row in mr_rows:
-        run_name = row["run_name"]
-
-        if "Min" in run_name:
-            label = "Min"
-        elif "Most" in run_name:
-            label = "Most"
-        elif "Max" in run_name:
-            label = "Max"
-        else:
-            continue
+        return {"error": "No runs found for month"}, 404
 
-        mrid_to_label[row["mr_id"]] = label
+    mrid_to_label = {row["mr_id"]: row["scenario"] for row in mr_rows if row["scenario"]}
 
     mr_ids = list(mrid_to_label.keys())
 
     if not mr_ids:
         conn.close()
-        return jsonify({"error": "No valid scenarios found"}), 404
-
-    placeholders = ",".join("?" for _ in mr_ids)
-
-    query = f"""
-        SELECT forecasted_datetime, value, mr_id
-        FROM forecasted_24ms_data
-        WHERE sd_id = ?
-        AND mr_id IN ({placeholders})
-        ORDER BY forecasted_datetime
-    """
+        return {"error": "No valid scenarios found"}, 404
 
-    cursor.execute(query, [sd_id] + mr_ids)
+    cursor.execute(_sql("24ms.data", len(mr_ids)), [sd_id] + mr_ids)
 
     data_rows = cursor.fetchall()
     conn.close()
@@ -1052,25 +3617,283 @@ def get_24ms_data():
             "data": data
         })
 
-    return jsonify({
+    return {
         "dam": dam,
         "variable": variable,
         "month": month,
         "traces": formatted_traces
+    }, 200
+
+# ==============================
+# DASHBOARD BATCH API
+# ==============================
+# One request per lake subpage: every chart body the page renders on load,
+# keyed the way dashboard.js consumes them. Each entry is exactly what the
+# matching single-chart endpoint returns (errors included), and all of them
+# are built on this thread's connection, with the shorter daily ranges
+# sliced from the shared 5y payload.
+
+@app.route("/api/dashboard", methods=["GET"])
+def api_dashboard():
+    lake_slug = (request.args.get("lake") or "").lower().strip()
+    subpage = (request.args.get("subpage") or "overview").lower().strip()
+    subpage = LEGACY_SUBPAGES.get(subpage, subpage)
+    range_key = (request.args.get("range") or "30d").lower().strip()
+    selected_date = (request.args.get("date") or "").strip()
+
+    lake_data = LAKES.get(lake_slug)
+    if not lake_data:
+        return jsonify({"error": "Invalid lake"}), 400
+    if subpage not in SUBPAGES:
+        return jsonify({"error": "Invalid subpage"}), 400
+    if range_key not in DAILY_RANGE_DAYS:
+        return jsonify({"error": "Invalid range"}), 400
+    if selected_date and not re.match(r"^\d{4}-\d{2}-\d{2}$", selected_date):
+        return jsonify({"error": "date must be YYYY-MM-DD"}), 400
+
+    response_format = _response_format()
+    if response_format is None:
+        return jsonify({"error": "Invalid format"}), 400
+
+    max_points = _max_points()
+    if max_points is None:
+        return jsonify({"error": "Invalid max_points"}), 400
+
+    dam = lake_data["dam"]
+
+    return jsonify({
+        "lake": lake_slug,
+        "dam": dam,
+        "subpage": subpage,
+        "range": range_key,
+        "series": _dashboard_series(
+            lake_slug, dam, subpage, range_key, selected_date, response_format, max_points
+        )
     })
 
+
+def _dashboard_series(lake_slug, dam, subpage, range_key, selected_date, response_format, max_points=0):
+    series = {}
+
+    if subpage == "elevation":
+        series["elevation"], _ = _elevation_response_body(dam, range_key, response_format, max_points)
+        series["elevation_5y"], _ = _elevation_response_body(dam, "5y", response_format, max_points)
+
+    elif subpage == "releases":
+        series["release_daily"], _ = _release_daily_response_body(dam, range_key, response_format, max_points)
+        if dam in HOURLY_DAMS:
+            dates_body = _release_hourly_dates_body(dam)
+            series["release_hourly_dates"] = dates_body
+            hourly_date = _dashboard_hourly_date(dates_body["dates"], selected_date)
+            if hourly_date:
+                series["release_hourly"] = _release_hourly_response_body(dam, hourly_date, response_format, max_points)
+
+    elif subpage == "energy":
+        energy_route = LAKE_DAILY_METRIC_ROUTES.get(f"/api/{lake_slug}/energy")
+        if energy_route:
+            series["energy_daily"], _ = _daily_metric_response_body(*energy_route, range_key, response_format, max_points)
+        elif dam in HOURLY_DAMS:
+            dates_body = _energy_unit_dates_body(dam)
+            series["energy_unit_dates"] = dates_body
+            hourly_date = _dashboard_hourly_date(dates_body["dates"], selected_date)
+            if hourly_date:
+                series["energy_units"] = _energy_units_response_body(dam, hourly_date, response_format, max_points)
+
+    elif subpage == "24-month-study":
+        months = _query_24ms_months()
+        series["24ms_months"] = months
+        if months:
+            series["24ms"], _ = _24ms_response_body(dam, "elevation", months[0])
+
+    return series
+
+
+def _dashboard_hourly_date(dates, selected_date):
+    """
+    The hourly charts open on the requested date when it has data,
+    otherwise on the latest available one.
+    """
+    if selected_date in dates:
+        return selected_date
+    return dates[-1] if dates else None
+
+
+# ==============================
+# HTTP CACHING
+# ==============================
+# GET /api/* responses carry a weak ETag and Last-Modified built from
+# table_versions for the tables each route reads, plus a Cache-Control
+# max-age that runs until the next scheduled update in
+# .github/workflows/update.yml or AZ midnight, whichever is sooner.
+# Revalidations are answered with 304 before any route code runs.
+
+DAILY_SERIES_TABLES = ("historic_daily_data", "forecasted_daily_data")
+HOURLY_SERIES_TABLES = ("historic_hourly_data", "forecasted_hourly_data")
+STUDY_TABLES = ("forecasted_24ms_data", "mrid_mapping", "study_runs")
+
+API_ROUTE_TABLES = {
+    "/api/elevation": DAILY_SERIES_TABLES,
+    "/api/release/daily": DAILY_SERIES_TABLES,
+    **{path: DAILY_SERIES_TABLES for path in LAKE_DAILY_METRIC_ROUTES},
+    "/api/release/hourly": HOURLY_SERIES_TABLES,
+    "/api/release/hourly/dates": HOURLY_SERIES_TABLES,
+    "/api/energy/hourly/units": HOURLY_SERIES_TABLES + ("sdid_mapping",),
+    "/api/energy/hourly/units/dates": HOURLY_SERIES_TABLES + ("sdid_mapping",),
+    "/api/release/hourly/rollup": ("historic_hourly_data",),
+    "/api/energy/hourly/units/rollup": ("historic_hourly_data", "sdid_mapping"),
+    "/api/24ms/months": STUDY_TABLES,
+    "/api/24ms": STUDY_TABLES,
+    "/api/dashboard": DAILY_SERIES_TABLES + HOURLY_SERIES_TABLES + ("sdid_mapping",) + STUDY_TABLES,
+}
+
+# Cron hours of the update workflow. For UPDATE_SETTLE_SECONDS after each
+# one (Actions start late and the jobs take a while) responses only get a
+# short max-age, so browsers pick up the new data soon after it lands.
+UPDATE_SCHEDULE_UTC_HOURS = tuple(
+    int(hour) for hour in os.environ.get("LAKEPROJECTIONS_UPDATE_HOURS_UTC", "10,17,22").split(",")
+)
+UPDATE_SETTLE_SECONDS = int(os.environ.get("LAKEPROJECTIONS_UPDATE_SETTLE_SECONDS", "2700"))
+UPDATE_SETTLE_MAX_AGE = int(os.environ.get("LAKEPROJECTIONS_UPDATE_SETTLE_MAX_AGE", "60"))
+
+_table_versions_memory = {"version": None, "versions": {}}
+_table_versions_lock = threading.Lock()
+
+
+def _table_versions():
+    """
+    {table_name: updated_at}, re-read from SQLite only when the data
+    version moves, so a revalidation normally costs a couple of stat calls.
+    """
+    version = _current_data_version()
+
+    with _table_versions_lock:
+        if _table_versions_memory["version"] != version:
+            conn = get_db_connection(readonly=True)
+            try:
+                rows = conn.execute(_sql("table_versions.all")).fetchall()
+            except sqlite3.OperationalError:
+                rows = []
+            finally:
+                conn.close()
+            _table_versions_memory["version"] = version
+            _table_versions_memory["versions"] = {row[0]: row[1] for row in rows}
+        return _table_versions_memory["versions"]
+
+
+def _db_file_identity():
+    # Swapping in a different DB file (a restore or a fresh upload) must
+    # change every ETag even if table_versions happens to match.
+    try:
+        stat = os.stat(DB_PATH)
+    except OSError:
+        return None
+    return (stat.st_dev, stat.st_ino)
+
+
+def _api_validators(path):
+    """
+    (etag, last_modified) for an /api path, or None for routes we do not cache.
+    """
+    tables = API_ROUTE_TABLES.get(path)
+    if tables is None:
+        return None
+
+    versions = _table_versions()
+    stamps = [versions.get(table_name) for table_name in tables]
+    az_today_start = _az_today_start_naive()
+
+    # Stitched daily payloads move at AZ midnight even without an update.
+    etag_source = repr((stamps, az_today_start.date().isoformat(), _db_file_identity()))
+    etag = hashlib.sha1(etag_source.encode("utf-8")).hexdigest()[:20]
+
+    az_midnight_utc = az_today_start.replace(tzinfo=ZoneInfo("America/Phoenix")).astimezone(timezone.utc)
+    modified = [az_midnight_utc] + [
+        datetime.fromisoformat(stamp).replace(tzinfo=timezone.utc)
+        for stamp in stamps
+        if stamp
+    ]
+    return etag, max(modified).replace(microsecond=0)
+
+
+def _api_max_age(now=None):
+    now = now or datetime.now(timezone.utc)
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    slots = [
+        day_start + timedelta(days=day_offset, hours=hour)
+        for day_offset in (-1, 0, 1)
+        for hour in UPDATE_SCHEDULE_UTC_HOURS
+    ]
+    for slot in slots:
+        if slot <= now < slot + timedelta(seconds=UPDATE_SETTLE_SECONDS):
+            return UPDATE_SETTLE_MAX_AGE
+
+    az_now = now.astimezone(ZoneInfo("America/Phoenix"))
+    next_az_midnight = datetime.combine(
+        az_now.date() + timedelta(days=1), datetime.min.time(), tzinfo=ZoneInfo("America/Phoenix")
+    )
+    next_change = min([slot for slot in slots if slot > now] + [next_az_midnight])
+    return max(UPDATE_SETTLE_MAX_AGE, int((next_change - now).total_seconds()))
+
+
+def _apply_api_cache_headers(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = _api_max_age()
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+@app.before_request
+def _answer_api_revalidation():
+    if request.method not in ("GET", "HEAD"):
+        return None
+
+    validators = _api_validators(request.path)
+    if validators is None:
+        return None
+    g.api_validators = validators
+    etag, last_modified = validators
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since:
+        not_modified = last_modified <= request.if_modified_since
+    else:
+        return None
+
+    _record_cache_lookup("http_revalidation", not_modified)
+
+    if not not_modified:
+        return None
+
+    return _apply_api_cache_headers(app.response_class(status=304), etag, last_modified)
+
+
+@app.after_request
+def _add_api_cache_headers(response):
+    validators = g.get("api_validators")
+    if validators is not None and response.status_code == 200:
+        _apply_api_cache_headers(response, *validators)
+    return response
+
 # ==============================
 # HISTORIC DAILY UPDATE
 # ==============================
 
 @app.route("/internal/update/historic", methods=["POST"])
 def update_historic():
-
-    print("=== HISTORIC DAILY UPDATE STARTED ===")
-
     if not authorize(request):
         return jsonify({"error": "Unauthorized"}), 403
 
+    return _submit_job("update_historic", request.args)
+
+
+def _run_update_historic(args):
+
+    print("=== HISTORIC DAILY UPDATE STARTED ===")
+
     az = ZoneInfo("America/Phoenix")
 
     conn = get_db_connection()
@@ -1080,13 +3903,13 @@ def update_historic():
     now_az = datetime.now(az)
     today_az = now_az.date()
 
-    end_date_param = (request.args.get("end_date") or "").strip()
+    end_date_param = (args.get("end_date") or "").strip()
     if end_date_param:
         try:
             end_date = datetime.strptime(end_date_param, "%Y-%m-%d").date()
         except ValueError:
             conn.close()
-            return jsonify({"error": "Invalid end_date format. Use YYYY-MM-DD."}), 400
+            return {"error": "Invalid end_date format. Use YYYY-MM-DD."}, 400
     else:
         end_date = today_az - timedelta(days=1)
 
@@ -1104,62 +3927,41 @@ def update_historic():
     print("Historic end date:", end_date)
     print("Requesting range:", t1, "to", t2)
 
-    api_url = (
-        "https://www.usbr.gov/pn-bin/hdb/hdb.pl"
-        f"?svr=lchdb"
-        f"&sdi=1930%2C1863%2C2070%2C2100%2C2166%2C2071%2C2101%2C2146%2C2072"
-        f"&tstp=DY"
-        f"&t1={t1}"
-        f"&t2={t2}"
-        f"&table=R"
-        f"&mrid=4"
-        f"&format=json"
+    hdb_request = HdbRequest(
+        sdis=DAILY_SDIS,
+        tstp="DY",
+        t1=t1,
+        t2=t2,
+        table="R",
+        mrid=4,
     )
 
+    stats = {"skipped": 0}
     try:
-        response = requests.get(api_url, timeout=60)
-        response.raise_for_status()
-        data = response.json()
+        # Upserts only, so an unchanged window can safely be skipped.
+        points = hdb_client.stream_points(hdb_request, conditional=True)
+        print("HDB request:", hdb_client.last_metric())
+        if points is None:
+            print("HDB data not modified since the last update.")
+            print("=== HISTORIC DAILY UPDATE COMPLETE ===")
+            conn.close()
+            return {"status": "HDB data not modified", "range_start": t1, "range_end": t2}, 200
+        inserted, updated = _stream_upsert_historic(
+            cursor, "historic_daily_data", _iter_hdb_rows(points, stats, log_skips=True)
+        )
     except Exception as e:
+        conn.rollback()
         conn.close()
-        return jsonify({"error": "API failure", "details": str(e)}), 500
-
-    inserted = 0
-    updated = 0
-    skipped = 0
+        return {"error": "API failure", "details": str(e)}, 500
 
-    for series in data.get("Series", []):
-        sd_id = int(series["SDI"])
-        for point in series.get("Data", []):
-            try:
-                dt = datetime.strptime(point["t"], "%m/%d/%Y %I:%M:%S %p")
-                iso_dt = dt.strftime("%Y-%m-%dT%H:%M:%S")
-                raw_value = point.get("v")
-                if raw_value in (None, ""):
-                    raise ValueError("blank value")
-                value = float(raw_value)
-
-                action = _upsert_historic_value(
-                    cursor,
-                    "historic_daily_data",
-                    "historic_datetime",
-                    iso_dt,
-                    sd_id,
-                    value,
-                )
-
-                if action == "inserted":
-                    inserted += 1
-                else:
-                    updated += 1
-
-            except Exception as e:
-                print("Row skipped due to error:", e)
-                skipped += 1
+    skipped = stats["skipped"]
 
+    _record_table_update(cursor, "historic_daily_data")
     conn.commit()
+    hdb_client.confirm(hdb_request)
+    invalidate_data_caches()
 
-    cursor.execute("SELECT MAX(historic_datetime) FROM historic_daily_data")
+    cursor.execute(_sql("historic.max_datetime", "historic_daily_data"))
     new_max = cursor.fetchone()[0]
 
     print("Inserted:", inserted)
@@ -1170,13 +3972,16 @@ def update_historic():
 
     conn.close()
 
-    return jsonify({
+    snapshots_written = _refresh_response_snapshots()
+
+    return {
         "historic_inserted": inserted,
         "historic_updated": updated,
         "historic_skipped": skipped,
+        "snapshots_written": snapshots_written,
         "range_start": t1,
         "range_end": t2
-    })
+    }, 200
 
 # ==============================
 # HISTORIC HOURLY UPDATE
@@ -1184,12 +3989,16 @@ def update_historic():
 
 @app.route("/internal/update/historic/daily/requery-7d", methods=["POST"])
 def requery_historic_daily_7d():
-
-    print("=== HISTORIC DAILY 7D REQUERY STARTED ===")
-
     if not authorize(request):
         return jsonify({"error": "Unauthorized"}), 403
 
+    return _submit_job("requery_historic_daily_7d", request.args)
+
+
+def _run_requery_historic_daily_7d(args):
+
+    print("=== HISTORIC DAILY 7D REQUERY STARTED ===")
+
     az = ZoneInfo("America/Phoenix")
 
     conn = get_db_connection()
@@ -1213,64 +4022,38 @@ def requery_historic_daily_7d():
     print("Requesting range:", t1, "to", t2)
 
     cursor.execute(
-        """
-        DELETE FROM historic_daily_data
-        WHERE historic_datetime >= ?
-          AND historic_datetime <= ?
-        """,
-        (delete_start_iso, delete_end_iso),
+        _sql("historic_daily.delete_range"),
+        (_ts_param(delete_start_iso), _ts_param(delete_end_iso)),
     )
     deleted = cursor.rowcount
 
-    api_url = (
-        "https://www.usbr.gov/pn-bin/hdb/hdb.pl"
-        f"?svr=lchdb"
-        f"&sdi=1930%2C1863%2C2070%2C2100%2C2166%2C2071%2C2101%2C2146%2C2072"
-        f"&tstp=DY"
-        f"&t1={t1}"
-        f"&t2={t2}"
-        f"&table=R"
-        f"&mrid=4"
-        f"&format=json"
+    hdb_request = HdbRequest(
+        sdis=DAILY_SDIS,
+        tstp="DY",
+        t1=t1,
+        t2=t2,
+        table="R",
+        mrid=4,
     )
 
+    stats = {"skipped": 0}
     try:
-        response = requests.get(api_url, timeout=60)
-        response.raise_for_status()
-        data = response.json()
+        points = hdb_client.stream_points(hdb_request)
+        print("HDB request:", hdb_client.last_metric())
+        inserted, updated = _stream_upsert_historic(
+            cursor, "historic_daily_data", _iter_hdb_rows(points, stats, log_skips=True)
+        )
     except Exception as e:
         conn.rollback()
         conn.close()
-        return jsonify({"error": "API failure", "details": str(e)}), 500
+        return {"error": "API failure", "details": str(e)}, 500
 
-    inserted = 0
-    skipped = 0
-
-    for series in data.get("Series", []):
-        sd_id = int(series["SDI"])
-        for point in series.get("Data", []):
-            try:
-                dt = datetime.strptime(point["t"], "%m/%d/%Y %I:%M:%S %p")
-                iso_dt = dt.strftime("%Y-%m-%dT%H:%M:%S")
-                raw_value = point.get("v")
-                if raw_value in (None, ""):
-                    raise ValueError("blank value")
-                value = float(raw_value)
-
-                cursor.execute(
-                    """
-                    INSERT INTO historic_daily_data
-                    (historic_datetime, sd_id, value)
-                    VALUES (?, ?, ?)
-                    """,
-                    (iso_dt, sd_id, value),
-                )
-                inserted += 1
-            except Exception as e:
-                print("Row skipped due to error:", e)
-                skipped += 1
+    # The range was just cleared, so a repeat key is a duplicate point in the payload.
+    skipped = stats["skipped"] + updated
 
+    _record_table_update(cursor, "historic_daily_data")
     conn.commit()
+    invalidate_data_caches()
 
     print("Deleted:", deleted)
     print("Inserted:", inserted)
@@ -1279,44 +4062,51 @@ def requery_historic_daily_7d():
 
     conn.close()
 
-    return jsonify({
+    snapshots_written = _refresh_response_snapshots()
+
+    return {
         "historic_daily_deleted": deleted,
         "historic_daily_inserted": inserted,
         "historic_daily_skipped": skipped,
+        "snapshots_written": snapshots_written,
         "range_start": t1,
         "range_end": t2,
-    })
+    }, 200
 
 
 @app.route("/internal/update/historic/hourly", methods=["POST"])
 def update_historic_hourly():
-
-    print("=== HISTORIC HOURLY UPDATE STARTED ===")
-
     if not authorize(request):
         return jsonify({"error": "Unauthorized"}), 403
 
+    return _submit_job("update_historic_hourly", request.args)
+
+
+def _run_update_historic_hourly(args):
+
+    print("=== HISTORIC HOURLY UPDATE STARTED ===")
+
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    cursor.execute("SELECT MAX(historic_datetime) FROM historic_hourly_data")
+    cursor.execute(_sql("historic.max_datetime", "historic_hourly_data"))
     max_dt = cursor.fetchone()[0]
     print("Max datetime before update:", max_dt)
 
     if not max_dt:
         conn.close()
-        return jsonify({"error": "No existing historic hourly data found"}), 400
+        return {"error": "No existing historic hourly data found"}, 400
 
     last_dt = _parse_db_datetime(max_dt)
     start_dt = last_dt + timedelta(hours=1)
 
-    end_date_param = (request.args.get("end_date") or "").strip()
+    end_date_param = (args.get("end_date") or "").strip()
     if end_date_param:
         try:
             end_date = datetime.strptime(end_date_param, "%Y-%m-%d").date()
         except ValueError:
             conn.close()
-            return jsonify({"error": "Invalid end_date format. Use YYYY-MM-DD."}), 400
+            return {"error": "Invalid end_date format. Use YYYY-MM-DD."}, 400
     else:
         end_date = datetime.utcnow().date() - timedelta(days=1)
 
@@ -1325,64 +4115,48 @@ def update_historic_hourly():
     if start_dt >= end_dt:
         print("Historic hourly already up to date.")
         conn.close()
-        return jsonify({"status": "No historic hourly update needed"})
+        return {"status": "No historic hourly update needed"}, 200
 
     t1 = start_dt.strftime("%Y-%m-%dT%H:%M")
     t2 = end_dt.strftime("%Y-%m-%dT%H:%M")
 
     print("Requesting range:", t1, "to", t2)
 
-    api_url = (
-        "https://www.usbr.gov/pn-bin/hdb/hdb.pl"
-        f"?svr=lchdb"
-        f"&sdi=2166%2C2146%2C14163%2C14164%2C14165%2C14166%2C14167%2C14168%2C14169%2C14170%2C14171"
-        f"&tstp=HR"
-        f"&t1={t1}"
-        f"&t2={t2}"
-        f"&table=R"
-        f"&mrid=2"
-        f"&format=json"
+    hdb_request = HdbRequest(
+        sdis=HOURLY_SDIS,
+        tstp="HR",
+        t1=t1,
+        t2=t2,
+        table="R",
+        mrid=2,
     )
 
+    ensure_hourly_rollups(conn)
+    ensure_hourly_available_dates(conn)
+
+    stats = {"skipped": 0}
+    touched_days = {}
     try:
-        response = requests.get(api_url, timeout=60)
-        response.raise_for_status()
-        data = response.json()
+        points = hdb_client.stream_points(hdb_request)
+        print("HDB request:", hdb_client.last_metric())
+        inserted, updated = _stream_upsert_historic(
+            cursor, "historic_hourly_data",
+            _track_hourly_days(_iter_hdb_rows(points, stats), touched_days)
+        )
     except Exception as e:
-        conn.close()
-        return jsonify({"error": "API failure", "details": str(e)}), 500
-
-    inserted = 0
-    updated = 0
-    skipped = 0
+        conn.rollback()
+        conn.close()
+        return {"error": "API failure", "details": str(e)}, 500
 
-    for series in data.get("Series", []):
-        sd_id = int(series["SDI"])
-        for point in series.get("Data", []):
-            try:
-                dt = datetime.strptime(point["t"], "%m/%d/%Y %I:%M:%S %p")
-                iso_dt = dt.strftime("%Y-%m-%dT%H:%M:%S")
-                value = float(point["v"])
-
-                action = _upsert_historic_value(
-                    cursor,
-                    "historic_hourly_data",
-                    "historic_datetime",
-                    iso_dt,
-                    sd_id,
-                    value,
-                )
-
-                if action == "inserted":
-                    inserted += 1
-                else:
-                    updated += 1
-            except Exception:
-                skipped += 1
+    skipped = stats["skipped"]
 
+    _record_hourly_rollups(cursor, touched_days)
+    _record_hourly_dates(cursor, "historic_hourly_data", touched_days)
+    _record_table_update(cursor, "historic_hourly_data")
     conn.commit()
+    invalidate_data_caches()
 
-    cursor.execute("SELECT MAX(historic_datetime) FROM historic_hourly_data")
+    cursor.execute(_sql("historic.max_datetime", "historic_hourly_data"))
     new_max = cursor.fetchone()[0]
 
     print("Inserted:", inserted)
@@ -1393,13 +4167,13 @@ def update_historic_hourly():
 
     conn.close()
 
-    return jsonify({
+    return {
         "historic_hourly_inserted": inserted,
         "historic_hourly_updated": updated,
         "historic_hourly_skipped": skipped,
         "range_start": t1,
         "range_end": t2
-    })
+    }, 200
 
 
 # ==============================
@@ -1408,12 +4182,16 @@ def update_historic_hourly():
 
 @app.route("/internal/update/forecast/daily", methods=["POST"])
 def update_forecast_daily():
-
-    print("=== FORECAST DAILY UPDATE STARTED ===")
-
     if not authorize(request):
         return jsonify({"error": "Unauthorized"}), 403
 
+    return _submit_job("update_forecast_daily", request.args)
+
+
+def _run_update_forecast_daily(args):
+
+    print("=== FORECAST DAILY UPDATE STARTED ===")
+
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -1424,60 +4202,46 @@ def update_forecast_daily():
 
     print("Requesting range:", start_date, "to", end_date)
 
-    SDI_LIST = "1930,1863,2070,2100,2166,2071,2101,2146,2072"
-
-    api_url = (
-        "https://www.usbr.gov/pn-bin/hdb/hdb.pl"
-        f"?svr=lchdb"
-        f"&sdi={SDI_LIST}"
-        f"&tstp=DY"
-        f"&t1={start_date}"
-        f"&t2={end_date}"
-        f"&table=M"
-        f"&mrid=4"
-        f"&format=json"
+    hdb_request = HdbRequest(
+        sdis=DAILY_SDIS,
+        tstp="DY",
+        t1=start_date,
+        t2=end_date,
+        table="M",
+        mrid=4,
     )
 
-    try:
-        response = requests.get(api_url, timeout=60)
-        response.raise_for_status()
-        data = response.json()
-    except Exception as e:
-        conn.close()
-        return jsonify({"error": "API failure", "details": str(e)}), 500
-
-    cursor.execute("SELECT sd_id FROM sdid_mapping")
+    cursor.execute(_sql("sdid_mapping.ids"))
     valid_sdids = {row[0] for row in cursor.fetchall()}
 
-    inserted = 0
-    skipped = 0
-
-    for series in data.get("Series", []):
-        sd_id = int(series["SDI"])
-        if sd_id not in valid_sdids:
-            continue
-        for point in series.get("Data", []):
-            try:
-                dt = datetime.strptime(point["t"], "%m/%d/%Y %I:%M:%S %p")
-                iso_dt = dt.strftime("%Y-%m-%dT%H:%M:%S")
-                value = float(point["v"])
+    ensure_forecast_vintages(conn)
 
-                cursor.execute("""
-                    INSERT OR IGNORE INTO forecasted_daily_data
-                    (forecasted_datetime, sd_id, datetime_accessed, value)
-                    VALUES (?, ?, ?, ?)
-                """, (iso_dt, sd_id, datetime_accessed, value))
+    stats = {"skipped": 0}
+    try:
+        points = hdb_client.stream_points(hdb_request)
+        print("HDB request:", hdb_client.last_metric())
+        inserted, inserted_by_sdid = _stream_insert_forecast(
+            cursor,
+            "forecasted_daily_data",
+            datetime_accessed,
+            _iter_hdb_rows(points, stats, valid_sdids=valid_sdids),
+        )
+    except Exception as e:
+        conn.rollback()
+        conn.close()
+        return {"error": "API failure", "details": str(e)}, 500
 
-                inserted += cursor.rowcount
-            except:
-                skipped += 1
+    skipped = stats["skipped"]
 
+    _record_forecast_vintage(cursor, "forecasted_daily_data", datetime_accessed, inserted_by_sdid)
+    _record_table_update(cursor, "forecasted_daily_data")
     conn.commit()
+    invalidate_data_caches()
 
-    cursor.execute("SELECT MAX(forecasted_datetime) FROM forecasted_daily_data")
+    cursor.execute(_sql("forecast.max_forecasted_for_vintage", "forecasted_daily_data"), (_ts_param(datetime_accessed),))
     max_forecast = cursor.fetchone()[0]
 
-    cursor.execute("SELECT MAX(datetime_accessed) FROM forecasted_daily_data")
+    cursor.execute(_sql("forecast_vintages.latest_for_table"), ("forecasted_daily_data",))
     max_accessed = cursor.fetchone()[0]
 
     print("Inserted:", inserted)
@@ -1488,12 +4252,15 @@ def update_forecast_daily():
 
     conn.close()
 
-    return jsonify({
+    snapshots_written = _refresh_response_snapshots()
+
+    return {
         "forecast_daily_inserted": inserted,
         "forecast_daily_skipped": skipped,
+        "snapshots_written": snapshots_written,
         "range_start": start_date,
         "range_end": end_date
-    })
+    }, 200
 
 
 # ==============================
@@ -1502,12 +4269,16 @@ def update_forecast_daily():
 
 @app.route("/internal/update/forecast", methods=["POST"])
 def update_forecast():
-
-    print("=== FORECAST HOURLY UPDATE STARTED ===")
-
     if not authorize(request):
         return jsonify({"error": "Unauthorized"}), 403
 
+    return _submit_job("update_forecast", request.args)
+
+
+def _run_update_forecast(args):
+
+    print("=== FORECAST HOURLY UPDATE STARTED ===")
+
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -1520,53 +4291,44 @@ def update_forecast():
 
     print("Requesting range:", t1, "to", t2)
 
-    api_url = (
-        "https://www.usbr.gov/pn-bin/hdb/hdb.pl"
-        f"?svr=lchdb"
-        f"&sdi=2166%2C2146%2C14163%2C14164%2C14165%2C14166%2C14167%2C14168%2C14169%2C14170%2C14171"
-        f"&tstp=HR"
-        f"&t1={t1}"
-        f"&t2={t2}"
-        f"&table=M"
-        f"&mrid=2"
-        f"&format=json"
+    hdb_request = HdbRequest(
+        sdis=HOURLY_SDIS,
+        tstp="HR",
+        t1=t1,
+        t2=t2,
+        table="M",
+        mrid=2,
     )
 
+    ensure_forecast_vintages(conn)
+    ensure_hourly_available_dates(conn)
+
+    stats = {"skipped": 0}
+    touched_days = {}
     try:
-        response = requests.get(api_url, timeout=60)
-        response.raise_for_status()
-        data = response.json()
+        points = hdb_client.stream_points(hdb_request)
+        print("HDB request:", hdb_client.last_metric())
+        inserted, inserted_by_sdid = _stream_insert_forecast(
+            cursor, "forecasted_hourly_data", now_accessed,
+            _track_hourly_days(_iter_hdb_rows(points, stats), touched_days)
+        )
     except Exception as e:
+        conn.rollback()
         conn.close()
-        return jsonify({"error": "API failure", "details": str(e)}), 500
-
-    inserted = 0
-    skipped = 0
-
-    for series in data.get("Series", []):
-        sd_id = int(series["SDI"])
-        for point in series.get("Data", []):
-            try:
-                dt = datetime.strptime(point["t"], "%m/%d/%Y %I:%M:%S %p")
-                iso_dt = dt.strftime("%Y-%m-%dT%H:%M:%S")
-                value = float(point["v"])
+        return {"error": "API failure", "details": str(e)}, 500
 
-                cursor.execute("""
-                    INSERT OR IGNORE INTO forecasted_hourly_data
-                    (forecasted_datetime, sd_id, datetime_accessed, value)
-                    VALUES (?, ?, ?, ?)
-                """, (iso_dt, sd_id, now_accessed, value))
-
-                inserted += cursor.rowcount
-            except:
-                skipped += 1
+    skipped = stats["skipped"]
 
+    _record_forecast_vintage(cursor, "forecasted_hourly_data", now_accessed, inserted_by_sdid)
+    _record_hourly_dates(cursor, "forecasted_hourly_data", touched_days)
+    _record_table_update(cursor, "forecasted_hourly_data")
     conn.commit()
+    invalidate_data_caches()
 
-    cursor.execute("SELECT MAX(forecasted_datetime) FROM forecasted_hourly_data")
+    cursor.execute(_sql("forecast.max_forecasted_for_vintage", "forecasted_hourly_data"), (_ts_param(now_accessed),))
     max_forecast = cursor.fetchone()[0]
 
-    cursor.execute("SELECT MAX(datetime_accessed) FROM forecasted_hourly_data")
+    cursor.execute(_sql("forecast_vintages.latest_for_table"), ("forecasted_hourly_data",))
     max_accessed = cursor.fetchone()[0]
 
     print("Inserted:", inserted)
@@ -1577,12 +4339,683 @@ def update_forecast():
 
     conn.close()
 
-    return jsonify({
+    return {
         "forecast_inserted": inserted,
         "forecast_skipped": skipped,
         "range_start": t1,
         "range_end": t2
-    })
+    }, 200
+
+# ==============================
+# FORECAST VINTAGE RETENTION
+# ==============================
+
+def _plan_forecast_retention(vintages, now, policy, protected):
+    """
+    Split datetime_accessed values into (keep, drop) per the retention policy.
+    Vintages in `protected` (the latest per sd_id) are always kept.
+    """
+    keep = set(protected)
+    bucket_winner = {}
+
+    for accessed in vintages:
+        accessed_dt = _parse_db_datetime(accessed)
+        age_days = (now - accessed_dt).total_seconds() / 86400
+
+        if age_days <= policy["keep_all_days"]:
+            keep.add(accessed)
+            continue
+
+        if age_days <= policy["keep_daily_days"]:
+            bucket = ("day", accessed_dt.date())
+        elif age_days <= policy["keep_weekly_days"]:
+            bucket = ("week",) + tuple(accessed_dt.isocalendar()[:2])
+        else:
+            continue
+
+        if bucket not in bucket_winner or accessed > bucket_winner[bucket]:
+            bucket_winner[bucket] = accessed
+
+    keep.update(bucket_winner.values())
+    drop = sorted(v for v in vintages if v not in keep)
+    return keep, drop
+
+
+def _delete_forecast_vintage(conn, table_name, accessed, batch_size):
+    """
+    Delete one vintage in key batches, committing between batches so the
+    write lock is never held for long while readers are active.
+    """
+    deleted = 0
+    while True:
+        cursor = conn.execute(_sql("retention.delete_batch", table_name), (_ts_param(accessed), batch_size))
+        conn.commit()
+        deleted += cursor.rowcount
+        if cursor.rowcount < batch_size:
+            return deleted
+
+
+def _parse_retention_args(args):
+    policy = dict(FORECAST_RETENTION_DEFAULTS)
+    for name in policy:
+        raw_value = (args.get(name) or "").strip()
+        if not raw_value:
+            continue
+        try:
+            policy[name] = int(raw_value)
+        except ValueError:
+            raise ValueError(f"{name} must be an integer")
+
+    if policy["batch_size"] <= 0:
+        raise ValueError("batch_size must be positive")
+
+    dry_run = (args.get("dry_run") or "").strip().lower() in {"1", "true", "yes", "on"}
+    vacuum = (args.get("vacuum") or "").strip().lower() in {"1", "true", "yes", "on"}
+    return policy, dry_run, vacuum
+
+
+@app.route("/internal/maintenance/forecast-retention", methods=["POST"])
+def forecast_retention():
+    if not authorize(request):
+        return jsonify({"error": "Unauthorized"}), 403
+
+    # Validate up front so bad parameters fail the request, not the job.
+    try:
+        _parse_retention_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return _submit_job("forecast_retention", request.args)
+
+
+def _run_forecast_retention(args):
+
+    print("=== FORECAST RETENTION STARTED ===")
+
+    try:
+        policy, dry_run, vacuum = _parse_retention_args(args)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    t0 = time.time()
+    now = datetime.utcnow()
+
+    conn = get_db_connection()
+    ensure_forecast_vintages(conn)
+    ensure_hourly_available_dates(conn)
+    conn.commit()
+
+    tables = {}
+    for table_name in FORECAST_TABLES:
+        vintages = [
+            row[0] for row in conn.execute(_sql("retention.vintages", table_name)).fetchall()
+        ]
+        protected = {
+            row[0] for row in conn.execute(_sql("forecast_vintages.for_table"), (table_name,)).fetchall()
+        }
+        if vintages:
+            protected.add(max(vintages))
+
+        keep, drop = _plan_forecast_retention(vintages, now, policy, protected)
+
+        deleted = 0
+        if not dry_run:
+            for accessed in drop:
+                deleted += _delete_forecast_vintage(conn, table_name, accessed, policy["batch_size"])
+            if deleted:
+                if table_name in HOURLY_DATE_FLAGS:
+                    _rebuild_hourly_date_flag(conn, table_name)
+                _record_table_update(conn, table_name)
+                conn.commit()
+
+        print(table_name, "vintages:", len(vintages), "kept:", len(keep), "dropped:", len(drop), "rows deleted:", deleted)
+
+        tables[table_name] = {
+            "vintages_found": len(vintages),
+            "vintages_kept": len(vintages) - len(drop),
+            "vintages_dropped": len(drop),
+            "rows_deleted": deleted,
+        }
+
+    vacuum_result = None
+    if vacuum and not dry_run:
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if auto_vacuum == 2:
+            conn.execute("PRAGMA incremental_vacuum").fetchall()
+            conn.commit()
+        free_after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        vacuum_result = {
+            "incremental": auto_vacuum == 2,
+            "free_pages_before": free_before,
+            "free_pages_after": free_after,
+        }
+        if auto_vacuum != 2:
+            vacuum_result["note"] = (
+                "auto_vacuum is not INCREMENTAL; run `flask enable-incremental-vacuum` once to "
+                "hand freed pages back to the filesystem"
+            )
+
+    conn.close()
+
+    print("=== FORECAST RETENTION COMPLETE ===")
+
+    return {
+        "policy": policy,
+        "dry_run": dry_run,
+        "tables": tables,
+        "vacuum": vacuum_result,
+        "elapsed_seconds": round(time.time() - t0, 3)
+    }, 200
+
+
+@app.cli.command("enable-incremental-vacuum")
+def enable_incremental_vacuum_command():
+    """Switch the database to auto_vacuum=INCREMENTAL.
+
+    Takes one full VACUUM, which rewrites the file and holds the write lock
+    throughout: stop the web service first. Afterwards forecast retention
+    with ?vacuum=1 truncates the pages it frees.
+    """
+    conn = get_db_connection()
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        click.echo("auto_vacuum is already INCREMENTAL.")
+        return
+
+    size_before = os.path.getsize(DB_PATH)
+    t0 = time.time()
+
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    click.echo(json.dumps({
+        "auto_vacuum": conn.execute("PRAGMA auto_vacuum").fetchone()[0],
+        "size_before_bytes": size_before,
+        "size_after_bytes": os.path.getsize(DB_PATH),
+        "elapsed_seconds": round(time.time() - t0, 3),
+    }, indent=2))
+
+# ==============================
+# HISTORIC BACKFILL
+# ==============================
+
+BACKFILL_TARGETS = {
+    "historic_daily": {
+        "table_name": "historic_daily_data",
+        "tstp": "DY",
+        "mrid": 4,
+        "sdis": DAILY_SDIS,
+        "chunk_days": 365,
+    },
+    "historic_hourly": {
+        "table_name": "historic_hourly_data",
+        "tstp": "HR",
+        "mrid": 2,
+        "sdis": HOURLY_SDIS,
+        "chunk_days": 31,
+    },
+}
+
+def _backfill_chunks(start_date, end_date, sdis, chunk_days, sdi_chunk_size):
+    """
+    Split [start_date, end_date] x sdis into HDB request windows.
+    """
+    sdi_groups = [sdis[i:i + sdi_chunk_size] for i in range(0, len(sdis), sdi_chunk_size)]
+
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+        for group in sdi_groups:
+            yield chunk_start, chunk_end, group
+        chunk_start = chunk_end + timedelta(days=1)
+
+
+def run_historic_backfill(target, start_date, end_date, sdis=None, chunk_days=None,
+                          sdi_chunk_size=None, workers=4, retries=3, backoff_seconds=2.0):
+    """
+    Fetch a historic date range from HDB in parallel chunks and upsert each
+    chunk as soon as it arrives. Only the calling thread touches SQLite.
+    """
+    config = BACKFILL_TARGETS[target]
+    sdis = list(sdis or config["sdis"])
+    chunk_days = chunk_days or config["chunk_days"]
+    sdi_chunk_size = sdi_chunk_size or len(sdis)
+
+    chunks = list(_backfill_chunks(start_date, end_date, sdis, chunk_days, sdi_chunk_size))
+
+    def fetch(chunk):
+        chunk_start, chunk_end, group = chunk
+        hdb_request = HdbRequest(
+            sdis=group,
+            tstp=config["tstp"],
+            t1=chunk_start.strftime("%Y-%m-%dT00:00"),
+            t2=chunk_end.strftime("%Y-%m-%dT23:59"),
+            table="R",
+            mrid=config["mrid"],
+        )
+        return hdb_client.fetch(hdb_request, retries=retries, backoff_seconds=backoff_seconds)
+
+    inserted = 0
+    updated = 0
+    skipped = 0
+    failed = []
+
+    hourly = config["table_name"] == "historic_hourly_data"
+
+    conn = get_db_connection()
+    ensure_core_schema(conn)
+    ensure_indexes(conn)
+    if hourly:
+        ensure_hourly_rollups(conn)
+        ensure_hourly_available_dates(conn)
+    conn.commit()
+    cursor = conn.cursor()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {executor.submit(fetch, chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                chunk_start, chunk_end, group = futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    print("Backfill chunk failed:", chunk_start, chunk_end, group, e)
+                    failed.append({
+                        "start": chunk_start.isoformat(),
+                        "end": chunk_end.isoformat(),
+                        "sdis": group,
+                        "error": str(e),
+                    })
+                    continue
+
+                stats = {"skipped": 0}
+                touched_days = {}
+                rows = _iter_hdb_rows(iter_document_points(data), stats)
+                if hourly:
+                    rows = _track_hourly_days(rows, touched_days)
+                chunk_inserted, chunk_updated = _stream_upsert_historic(cursor, config["table_name"], rows)
+                if hourly:
+                    _record_hourly_rollups(cursor, touched_days)
+                    _record_hourly_dates(cursor, config["table_name"], touched_days)
+                _record_table_update(cursor, config["table_name"])
+                conn.commit()
+
+                inserted += chunk_inserted
+                updated += chunk_updated
+                skipped += stats["skipped"]
+    finally:
+        conn.close()
+
+    invalidate_data_caches()
+
+    return {
+        "target": target,
+        "table": config["table_name"],
+        "range_start": start_date.isoformat(),
+        "range_end": end_date.isoformat(),
+        "chunks_total": len(chunks),
+        "chunks_failed": failed,
+        "inserted": inserted,
+        "updated": updated,
+        "skipped": skipped,
+    }
+
+
+def _parse_backfill_args(args):
+    target = (args.get("target") or "").strip().lower()
+    if target not in BACKFILL_TARGETS:
+        raise ValueError(f"target must be one of: {', '.join(BACKFILL_TARGETS)}")
+
+    try:
+        start_date = datetime.strptime((args.get("start") or "").strip(), "%Y-%m-%d").date()
+        end_date = datetime.strptime((args.get("end") or "").strip(), "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError("start and end must be YYYY-MM-DD")
+
+    if start_date > end_date:
+        raise ValueError("start must be on or before end")
+
+    options = {}
+    for name in ("chunk_days", "sdi_chunk_size", "workers", "retries"):
+        raw_value = (args.get(name) or "").strip()
+        if raw_value:
+            try:
+                options[name] = int(raw_value)
+            except ValueError:
+                raise ValueError(f"{name} must be an integer")
+            if options[name] < (0 if name == "retries" else 1):
+                raise ValueError(f"{name} is out of range")
+
+    sdi_param = (args.get("sdi") or "").strip()
+    if sdi_param:
+        try:
+            options["sdis"] = [int(part) for part in sdi_param.split(",") if part.strip()]
+        except ValueError:
+            raise ValueError("sdi must be a comma-separated list of integers")
+
+    return target, start_date, end_date, options
+
+
+@app.route("/internal/backfill", methods=["POST"])
+def backfill_historic():
+    if not authorize(request):
+        return jsonify({"error": "Unauthorized"}), 403
+
+    # Validate up front so bad parameters fail the request, not the job.
+    try:
+        _parse_backfill_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return _submit_job("backfill_historic", request.args)
+
+
+def _run_backfill_historic(args):
+
+    print("=== HISTORIC BACKFILL STARTED ===")
+
+    try:
+        target, start_date, end_date, options = _parse_backfill_args(args)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    t0 = time.time()
+    result = run_historic_backfill(target, start_date, end_date, **options)
+    if target == "historic_daily":
+        result["snapshots_written"] = _refresh_response_snapshots()
+    result["elapsed_seconds"] = round(time.time() - t0, 3)
+
+    print("=== HISTORIC BACKFILL COMPLETE ===", result)
+
+    return result, 200
+
+
+@app.cli.command("backfill")
+@click.option("--target", required=True, type=click.Choice(sorted(BACKFILL_TARGETS)))
+@click.option("--start", required=True, help="First day, YYYY-MM-DD.")
+@click.option("--end", required=True, help="Last day, YYYY-MM-DD.")
+@click.option("--sdi", default="", help="Comma-separated SDIs (defaults to the target's list).")
+@click.option("--chunk-days", default="", help="Days per HDB request.")
+@click.option("--sdi-chunk-size", default="", help="SDIs per HDB request.")
+@click.option("--workers", default="4", help="Concurrent HDB requests.")
+@click.option("--retries", default="3", help="Retries per chunk.")
+def backfill_command(**kwargs):
+    """Seed or repair historic tables from HDB, e.g. on a fresh database."""
+    try:
+        target, start_date, end_date, options = _parse_backfill_args(kwargs)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    result = run_historic_backfill(target, start_date, end_date, **options)
+    if target == "historic_daily":
+        result["snapshots_written"] = _refresh_response_snapshots()
+    click.echo(app.json.dumps(result, indent=2))
+
+# ==============================
+# BACKGROUND JOBS
+# ==============================
+# Update and maintenance endpoints enqueue a row in `jobs` (in JOBS_DB_PATH,
+# apart from the data) and return at once; a daemon
+# thread in each web process claims queued jobs and runs them. Jobs run
+# one at a time across all processes so ingests never fight over the
+# SQLite write lock. A running job refreshes heartbeat_at every
+# JOB_HEARTBEAT_SECONDS; one whose heartbeat is older than
+# JOB_STALE_SECONDS lost its worker and is failed so the queue moves on.
+# Pass ?wait=1 to enqueue and hold the request until the job finishes.
+
+JOB_POLL_SECONDS = float(os.environ.get("LAKEPROJECTIONS_JOB_POLL_SECONDS", "5"))
+JOB_HEARTBEAT_SECONDS = float(os.environ.get("LAKEPROJECTIONS_JOB_HEARTBEAT_SECONDS", "30"))
+JOB_STALE_SECONDS = int(os.environ.get("LAKEPROJECTIONS_JOB_STALE_SECONDS", "300"))
+
+JOB_HANDLERS = {
+    "update_historic": _run_update_historic,
+    "requery_historic_daily_7d": _run_requery_historic_daily_7d,
+    "update_historic_hourly": _run_update_historic_hourly,
+    "update_forecast_daily": _run_update_forecast_daily,
+    "update_forecast": _run_update_forecast,
+    "backfill_historic": _run_backfill_historic,
+    "forecast_retention": _run_forecast_retention,
+}
+
+_job_wakeup = threading.Event()
+_job_finished = threading.Condition()
+_job_worker_lock = threading.Lock()
+_job_worker_thread = None
+
+
+def ensure_jobs_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_type TEXT NOT NULL,
+            params TEXT NOT NULL,
+            status TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT,
+            elapsed_seconds REAL,
+            http_status INTEGER,
+            result TEXT,
+            error TEXT,
+            worker TEXT,
+            heartbeat_at TEXT
+        )
+    """)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)").fetchall()}
+    if "heartbeat_at" not in columns:
+        conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, job_id)")
+
+
+def _utc_now_iso():
+    return datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def enqueue_job(job_type, params):
+    conn = get_jobs_connection()
+    try:
+        ensure_jobs_table(conn)
+        cursor = conn.execute(_sql("jobs.insert"), (job_type, app.json.dumps(params), _utc_now_iso()))
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+
+def _claim_next_job(conn, worker_id):
+    """
+    Atomically move the oldest queued job to running, unless another job
+    is already running anywhere. Returns the job row or None.
+    """
+    now = datetime.utcnow()
+    stale_cutoff = (now - timedelta(seconds=JOB_STALE_SECONDS)).strftime("%Y-%m-%dT%H:%M:%S")
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(_sql("jobs.fail_stale"), (now.strftime("%Y-%m-%dT%H:%M:%S"), stale_cutoff))
+
+        row = None
+        running = conn.execute(_sql("jobs.any_running")).fetchone()
+        if not running:
+            row = conn.execute(_sql("jobs.next_queued")).fetchone()
+            if row:
+                conn.execute(_sql("jobs.start"), (now.strftime("%Y-%m-%dT%H:%M:%S"), worker_id, row["job_id"]))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return row
+
+
+def _job_heartbeat_loop(job_id, stop):
+    while not stop.wait(JOB_HEARTBEAT_SECONDS):
+        try:
+            conn = get_jobs_connection()
+            try:
+                conn.execute(_sql("jobs.heartbeat"), (_utc_now_iso(), job_id))
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            # Another process may hold the queue's write lock; the next beat retries.
+            print(f"Job {job_id} heartbeat failed:", e)
+
+
+def _run_job(job_id, job_type, params):
+    print(f"=== JOB {job_id} ({job_type}) STARTED ===")
+    t0 = time.time()
+
+    stop_heartbeat = threading.Event()
+    heartbeat = threading.Thread(
+        target=_job_heartbeat_loop, args=(job_id, stop_heartbeat), name=f"job-{job_id}-heartbeat", daemon=True
+    )
+    heartbeat.start()
+
+    try:
+        with app.app_context():
+            body, http_status = JOB_HANDLERS[job_type](params)
+        status = "succeeded" if http_status < 400 else "failed"
+        error = body.get("error") if http_status >= 400 else None
+    except Exception as e:
+        print(f"Job {job_id} crashed:", e)
+        body, http_status, status, error = None, 500, "failed", str(e)
+    finally:
+        stop_heartbeat.set()
+        heartbeat.join()
+
+    if status == "succeeded":
+        conn = get_db_connection()
+        try:
+            refresh_external_tables(conn)
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Job {job_id}: reference data refresh failed:", e)
+        finally:
+            conn.close()
+
+    conn = get_jobs_connection()
+    try:
+        conn.execute(_sql("jobs.finish"), (
+            status,
+            _utc_now_iso(),
+            round(time.time() - t0, 3),
+            http_status,
+            app.json.dumps(body) if body is not None else None,
+            error,
+            job_id,
+        ))
+        conn.commit()
+    finally:
+        conn.close()
+
+    with _job_finished:
+        _job_finished.notify_all()
+
+    print(f"=== JOB {job_id} ({job_type}) {status.upper()} ===")
+
+
+def _job_worker_loop():
+    worker_id = f"{os.getpid()}:{threading.get_ident()}"
+
+    while True:
+        job = None
+        try:
+            conn = get_jobs_connection()
+            try:
+                ensure_jobs_table(conn)
+                job = _claim_next_job(conn, worker_id)
+            finally:
+                conn.close()
+        except Exception as e:
+            print("Job worker could not claim a job:", e)
+
+        if job is not None:
+            _run_job(job["job_id"], job["job_type"], json.loads(job["params"]))
+            continue
+
+        _job_wakeup.wait(JOB_POLL_SECONDS)
+        _job_wakeup.clear()
+
+
+def _ensure_job_worker():
+    """
+    Start this process's worker thread on first use. Done lazily rather than
+    at import so it also works when gunicorn forks workers after loading.
+    """
+    global _job_worker_thread
+    with _job_worker_lock:
+        if _job_worker_thread is None or not _job_worker_thread.is_alive():
+            _job_worker_thread = threading.Thread(target=_job_worker_loop, name="job-worker", daemon=True)
+            _job_worker_thread.start()
+
+
+def _wait_for_job(job_id):
+    """
+    Block until job_id finishes, on whichever process runs it, and return
+    its (body, http_status). Woken by this process's worker, otherwise
+    polls every JOB_POLL_SECONDS.
+    """
+    # Read under the condition so a finish between the read and the wait
+    # cannot be missed.
+    with _job_finished:
+        while True:
+            conn = get_jobs_connection()
+            try:
+                row = conn.execute(_sql("jobs.status"), (job_id,)).fetchone()
+            finally:
+                conn.close()
+
+            if row["status"] in ("succeeded", "failed"):
+                if row["result"] is not None:
+                    return json.loads(row["result"]), row["http_status"]
+                return {"error": row["error"]}, row["http_status"] or 500
+
+            _job_finished.wait(JOB_POLL_SECONDS)
+
+
+def _submit_job(job_type, args):
+    params = args.to_dict() if hasattr(args, "to_dict") else dict(args)
+    wait = (params.pop("wait", "") or "").strip().lower() in {"1", "true", "yes", "on"}
+
+    job_id = enqueue_job(job_type, params)
+    _ensure_job_worker()
+    _job_wakeup.set()
+
+    if wait:
+        body, http_status = _wait_for_job(job_id)
+        return jsonify(body), http_status
+
+    return jsonify({
+        "job_id": job_id,
+        "job_type": job_type,
+        "status": "queued",
+        "status_url": url_for("job_status", job_id=job_id)
+    }), 202
+
+
+@app.route("/internal/jobs/<int:job_id>", methods=["GET"])
+def job_status(job_id):
+    if not authorize(request):
+        return jsonify({"error": "Unauthorized"}), 403
+
+    _ensure_job_worker()
+
+    conn = get_jobs_connection()
+    try:
+        ensure_jobs_table(conn)
+        row = conn.execute(_sql("jobs.get"), (job_id,)).fetchone()
+    finally:
+        conn.close()
+
+    if not row:
+        return jsonify({"error": "Job not found"}), 404
+
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return jsonify(job)
 
 #debug section
 @app.route("/debug/sql", methods=["POST"])
@@ -1607,7 +5040,7 @@ def debug_sql():
         return jsonify({"error": "Forbidden SQL keyword detected"}), 400
 
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(readonly=True)
         cursor = conn.cursor()
         cursor.execute(data["query"])
         rows = cursor.fetchall()
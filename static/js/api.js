@@ -1,5 +1,5 @@
 async function fetchElevationSeries(dam, range) {
-  const url = `/api/elevation?dam=${encodeURIComponent(dam)}&range=${encodeURIComponent(range)}`;
+  const url = `/api/elevation?dam=${encodeURIComponent(dam)}&range=${encodeURIComponent(range)}&format=columnar`;
   const res = await fetch(url);
   if (!res.ok) {
     const text = await res.text();
@@ -14,7 +14,7 @@ async function fetchReleaseSeries(dam, range) {
     throw new Error(`Unsupported dam for release chart: ${dam}`);
   }
 
-  const url = `/api/release/daily?dam=${encodeURIComponent(dam)}&range=${encodeURIComponent(range)}`;
+  const url = `/api/release/daily?dam=${encodeURIComponent(dam)}&range=${encodeURIComponent(range)}&format=columnar`;
   const res = await fetch(url);
   if (!res.ok) {
     const text = await res.text();
@@ -24,7 +24,7 @@ async function fetchReleaseSeries(dam, range) {
 }
 
 async function fetchLakeMeadEnergySeries(range) {
-  const url = `/api/lake-mead/energy?range=${encodeURIComponent(range)}`;
+  const url = `/api/lake-mead/energy?range=${encodeURIComponent(range)}&format=columnar`;
   const res = await fetch(url);
   if (!res.ok) {
     const text = await res.text();
@@ -45,7 +45,7 @@ async function fetchReleaseHourlyDates(dam) {
 }
 
 async function fetchReleaseHourlySeries(dam, date) {
-  const url = `/api/release/hourly?dam=${encodeURIComponent(dam)}&date=${encodeURIComponent(date)}`;
+  const url = `/api/release/hourly?dam=${encodeURIComponent(dam)}&date=${encodeURIComponent(date)}&format=columnar`;
   const res = await fetch(url);
   if (!res.ok) {
     const text = await res.text();
@@ -65,7 +65,17 @@ async function fetchEnergyUnitHourlyDates(dam) {
 }
 
 async function fetchEnergyUnitHourlySeries(dam, date) {
-  const url = `/api/energy/hourly/units?dam=${encodeURIComponent(dam)}&date=${encodeURIComponent(date)}`;
+  const url = `/api/energy/hourly/units?dam=${encodeURIComponent(dam)}&date=${encodeURIComponent(date)}&format=columnar`;
+  const res = await fetch(url);
+  if (!res.ok) {
+    const text = await res.text();
+    throw new Error(`API error ${res.status}: ${text}`);
+  }
+  return await res.json();
+}
+
+async function fetchDashboard(lake, subpage, range) {
+  const url = `/api/dashboard?lake=${encodeURIComponent(lake)}&subpage=${encodeURIComponent(subpage)}&range=${encodeURIComponent(range)}&format=columnar`;
   const res = await fetch(url);
   if (!res.ok) {
     const text = await res.text();
@@ -12,14 +12,6 @@ const FORECAST_SERIES_COLOR = "#2e8b57";
 const HISTORIC_AREA_COLOR = "rgba(31, 120, 255, 0.35)";
 const FORECAST_AREA_COLOR = "rgba(46, 139, 87, 0.30)";
 
-// ==============================
-// WAIT UNTIL DOM IS READY
-// ==============================
-
-document.addEventListener("DOMContentLoaded", function () {
-  initialize24MS();
-});
-
 // ==============================
 // UTILITIES
 // ==============================
@@ -28,8 +20,41 @@ function isoToMs(iso) {
   return new Date(iso).getTime();
 }
 
+// Columnar series (?format=columnar) carry either parallel t/v arrays or
+// start + step_seconds + v. Timestamps are naive AZ wall time, so the step
+// is applied in UTC and turned back into naive ISO text; that keeps DST in
+// the viewer's own time zone from shifting points.
+function columnarTimestamps(series) {
+  if (Array.isArray(series.t)) return series.t;
+
+  const startMs = Date.parse(`${series.start}Z`);
+  const stepMs = Number(series.step_seconds) * 1000;
+  return series.v.map((_, idx) => new Date(startMs + idx * stepMs).toISOString().slice(0, 19));
+}
+
+function seriesRows(series) {
+  if (!series) return [];
+  if (Array.isArray(series)) return series;
+
+  const times = columnarTimestamps(series);
+  return series.v.map((v, idx) => ({ t: times[idx], v }));
+}
+
+// Hourly unit series arrive as one columnar entry per sd_id.
+function unitSeriesRows(seriesList) {
+  return (seriesList || []).flatMap(entry =>
+    Array.isArray(entry.v)
+      ? seriesRows(entry).map(row => ({ ...row, sd_id: entry.sd_id }))
+      : [entry]
+  );
+}
+
+function rowHour(row) {
+  return row.hour !== undefined ? Number(row.hour) : Number(row.t.slice(11, 13));
+}
+
 function buildSeriesPoints(rows) {
-  return rows
+  return seriesRows(rows)
     .filter(r => r.t && r.v !== null && r.v !== undefined)
     .map(r => [isoToMs(r.t), Number(r.v)]);
 }
@@ -381,7 +406,8 @@ function getSdIdForDam(dam, variable) {
   return map[dam][variable];
 }
 
-async function initialize24MS() {
+// preloaded, when given, is the {months, data} pair from /api/dashboard.
+async function initialize24MS(preloaded) {
 
   const monthSelect = document.getElementById("g2-month");
   const variableSelect = document.getElementById("g2-variable");
@@ -389,8 +415,13 @@ async function initialize24MS() {
   if (!monthSelect || !variableSelect) return;
 
   try {
-    const response = await fetch("/api/24ms/months");
-    const months = await response.json();
+    let months;
+    if (preloaded) {
+      months = preloaded.months;
+    } else {
+      const response = await fetch("/api/24ms/months");
+      months = await response.json();
+    }
 
     if (!months || months.length === 0) return;
 
@@ -408,7 +439,7 @@ async function initialize24MS() {
 
     monthSelect.value = months[0];
 
-    await load24MSData(months[0]);
+    await load24MSData(months[0], preloaded ? preloaded.data : null);
 
     variableSelect.addEventListener("change", () => {
       load24MSData(monthSelect.value);
@@ -438,15 +469,19 @@ function parse24MSMonthLabel(label) {
   return Number.isNaN(fallback) ? Number.NEGATIVE_INFINITY : fallback;
 }
 
-async function load24MSData(month) {
+async function load24MSData(month, preloaded) {
 
   const dam = getActiveDam();
   const variable = document.getElementById("g2-variable").value;
 
-  const url = `/api/24ms?dam=${dam}&variable=${variable}&month=${encodeURIComponent(month)}`;
-
-  const response = await fetch(url);
-  const payload = await response.json();
+  let payload;
+  if (preloaded && preloaded.month === month && preloaded.variable === variable) {
+    payload = preloaded;
+  } else {
+    const url = `/api/24ms?dam=${dam}&variable=${variable}&month=${encodeURIComponent(month)}`;
+    const response = await fetch(url);
+    payload = await response.json();
+  }
 
   if (!payload.traces) return;
 
@@ -608,8 +643,8 @@ function renderReleaseHourlyChart(payload) {
   const hours = Array.from({ length: 24 }, (_, idx) => idx);
   const hourLabels = hours.map(formatHourLabel);
 
-  const historicMap = new Map((payload.historic || []).map(row => [Number(row.hour), Math.round(Number(row.v))]));
-  const forecastMap = new Map((payload.forecast || []).map(row => [Number(row.hour), Math.round(Number(row.v))]));
+  const historicMap = new Map(seriesRows(payload.historic).map(row => [rowHour(row), Math.round(Number(row.v))]));
+  const forecastMap = new Map(seriesRows(payload.forecast).map(row => [rowHour(row), Math.round(Number(row.v))]));
 
   const historicData = hours.map(hour => historicMap.has(hour) ? historicMap.get(hour) : null);
   const forecastData = hours.map(hour => forecastMap.has(hour) ? forecastMap.get(hour) : null);
@@ -657,8 +692,10 @@ function renderReleaseHourlyChart(payload) {
   }, true);
 }
 
-async function loadReleaseHourlyDataForDate(dam, date) {
-  const payload = await fetchReleaseHourlySeries(dam, date);
+async function loadReleaseHourlyDataForDate(dam, date, preloaded) {
+  const payload = preloaded && preloaded.date === date
+    ? preloaded
+    : await fetchReleaseHourlySeries(dam, date);
   renderReleaseHourlyChart(payload);
 
   const dateInput = document.getElementById("g3-date");
@@ -672,7 +709,8 @@ async function loadReleaseHourlyDataForDate(dam, date) {
   setReleaseMessage(`Showing ${formattedDam} release for ${formatDateWithDay(payload.date)}. As of ${formatAsOfDateTime(payload.as_of)}.`);
 }
 
-async function initializeReleaseHourlyChart(dam) {
+// preloaded, when given, is the {dates, series} pair from /api/dashboard.
+async function initializeReleaseHourlyChart(dam, preloaded) {
   const dateInput = document.getElementById("g3-date");
   const prevButton = document.getElementById("g3-prev-day");
   const nextButton = document.getElementById("g3-next-day");
@@ -699,7 +737,7 @@ async function initializeReleaseHourlyChart(dam) {
     return;
   }
 
-  const datesPayload = await fetchReleaseHourlyDates(dam);
+  const datesPayload = preloaded ? preloaded.dates : await fetchReleaseHourlyDates(dam);
   releaseAvailableDates = (datesPayload.dates || []).slice().sort();
   releaseDateSet = new Set(releaseAvailableDates);
 
@@ -789,7 +827,7 @@ async function initializeReleaseHourlyChart(dam) {
     nextButton.dataset.boundReleaseListener = "true";
   }
 
-  await loadReleaseHourlyDataForDate(dam, selectedDate);
+  await loadReleaseHourlyDataForDate(dam, selectedDate, preloaded ? preloaded.series : null);
 }
 
 // ==============================
@@ -860,11 +898,11 @@ function renderEnergyUnitHourlyChart(payload) {
   const unitIndexBySdId = new Map((payload.units || []).map((row, idx) => [Number(row.sd_id), idx]));
   const cellByUnitAndHour = new Map();
 
-  (payload.historic || []).forEach(row => {
+  unitSeriesRows(payload.historic).forEach(row => {
     const unitIndex = unitIndexBySdId.get(Number(row.sd_id));
     if (unitIndex === undefined) return;
 
-    const hour = Number(row.hour);
+    const hour = rowHour(row);
     const key = `${unitIndex}-${hour}`;
     cellByUnitAndHour.set(key, {
       x: hour,
@@ -874,11 +912,11 @@ function renderEnergyUnitHourlyChart(payload) {
     });
   });
 
-  (payload.forecast || []).forEach(row => {
+  unitSeriesRows(payload.forecast).forEach(row => {
     const unitIndex = unitIndexBySdId.get(Number(row.sd_id));
     if (unitIndex === undefined) return;
 
-    const hour = Number(row.hour);
+    const hour = rowHour(row);
     const key = `${unitIndex}-${hour}`;
     cellByUnitAndHour.set(key, {
       x: hour,
@@ -967,8 +1005,10 @@ function renderEnergyUnitHourlyChart(payload) {
   }, true);
 }
 
-async function loadEnergyUnitHourlyDataForDate(dam, date) {
-  const payload = await fetchEnergyUnitHourlySeries(dam, date);
+async function loadEnergyUnitHourlyDataForDate(dam, date, preloaded) {
+  const payload = preloaded && preloaded.date === date
+    ? preloaded
+    : await fetchEnergyUnitHourlySeries(dam, date);
   renderEnergyUnitHourlyChart(payload);
 
   const dateInput = document.getElementById("g4-date");
@@ -982,7 +1022,8 @@ async function loadEnergyUnitHourlyDataForDate(dam, date) {
   setEnergyUnitMessage(`Showing ${formattedDam} unit energy for ${formatDateWithDay(payload.date)}. As of ${formatAsOfDateTime(payload.as_of)}.`);
 }
 
-async function initializeEnergyUnitHourlyChart(dam) {
+// preloaded, when given, is the {dates, series} pair from /api/dashboard.
+async function initializeEnergyUnitHourlyChart(dam, preloaded) {
   const dateInput = document.getElementById("g4-date");
   const prevButton = document.getElementById("g4-prev-day");
   const nextButton = document.getElementById("g4-next-day");
@@ -1009,7 +1050,7 @@ async function initializeEnergyUnitHourlyChart(dam) {
     return;
   }
 
-  const datesPayload = await fetchEnergyUnitHourlyDates(dam);
+  const datesPayload = preloaded ? preloaded.dates : await fetchEnergyUnitHourlyDates(dam);
   energyUnitAvailableDates = (datesPayload.dates || []).slice().sort();
   energyUnitDateSet = new Set(energyUnitAvailableDates);
 
@@ -1099,5 +1140,5 @@ async function initializeEnergyUnitHourlyChart(dam) {
     nextButton.dataset.boundEnergyUnitListener = "true";
   }
 
-  await loadEnergyUnitHourlyDataForDate(dam, selectedDate);
+  await loadEnergyUnitHourlyDataForDate(dam, selectedDate, preloaded ? preloaded.series : null);
 }
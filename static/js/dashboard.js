@@ -2,17 +2,42 @@ document.addEventListener("DOMContentLoaded", () => {
   const page = document.body.dataset.page;
   const dam = document.body.dataset.dam;
   const subpage = document.body.dataset.subpage;
+  const lake = document.body.dataset.lake;
 
   if (page !== "dam" || !dam || !subpage) return;
 
   let elevationSummaryPayload = null;
 
-  async function loadElevation() {
-    const activeButton = document.querySelector(".range-btn.active");
-    const activeRange = activeButton ? activeButton.dataset.range : "30d";
+  function activeRangeFor(selector) {
+    const activeButton = document.querySelector(`${selector}.active`);
+    return activeButton ? activeButton.dataset.range : "30d";
+  }
+
+  // Initial page load asks /api/dashboard for every chart at once; the
+  // per-chart fetches remain for range/date changes and as a fallback.
+  async function fetchInitialSeries(rangeSelector) {
+    try {
+      const payload = await fetchDashboard(lake, subpage, activeRangeFor(rangeSelector));
+      return payload.series || {};
+    } catch (err) {
+      console.error(err);
+      return {};
+    }
+  }
+
+  function usable(body) {
+    return body && !body.error ? body : null;
+  }
+
+  async function loadElevation(series = {}) {
+    const activeRange = activeRangeFor(".range-btn");
+    const preloaded = usable(series.elevation);
+    if (usable(series.elevation_5y)) {
+      elevationSummaryPayload = series.elevation_5y;
+    }
 
     const [payload, summaryPayload] = await Promise.all([
-      fetchElevationSeries(dam, activeRange),
+      preloaded ? Promise.resolve(preloaded) : fetchElevationSeries(dam, activeRange),
       elevationSummaryPayload
         ? Promise.resolve(elevationSummaryPayload)
         : fetchElevationSeries(dam, "5y")
@@ -22,37 +47,45 @@ document.addEventListener("DOMContentLoaded", () => {
     renderElevationChart("chartElevation", payload, elevationSummaryPayload);
   }
 
-  async function loadDailyRelease() {
-    const activeButton = document.querySelector(".range-btn-release.active");
-    const activeRange = activeButton ? activeButton.dataset.range : "30d";
-    const payload = await fetchReleaseSeries(dam, activeRange);
+  async function loadDailyRelease(series = {}) {
+    const payload = usable(series.release_daily)
+      || await fetchReleaseSeries(dam, activeRangeFor(".range-btn-release"));
     renderLakeMeadReleaseChart(payload);
   }
 
-  async function loadLakeMeadEnergy() {
-    const activeButton = document.querySelector(".range-btn-energy.active");
-    const activeRange = activeButton ? activeButton.dataset.range : "30d";
-    const payload = await fetchLakeMeadEnergySeries(activeRange);
+  async function loadLakeMeadEnergy(series = {}) {
+    const payload = usable(series.energy_daily)
+      || await fetchLakeMeadEnergySeries(activeRangeFor(".range-btn-energy"));
     renderLakeMeadEnergyChart(payload);
   }
 
-  async function loadReleases() {
-    await loadDailyRelease();
+  async function loadReleases(series = {}) {
+    await loadDailyRelease(series);
 
     if (dam === "hoover") return;
     if (typeof initializeReleaseHourlyChart !== "function") return;
 
-    await initializeReleaseHourlyChart(dam);
+    await initializeReleaseHourlyChart(
+      dam,
+      series.release_hourly_dates
+        ? { dates: series.release_hourly_dates, series: usable(series.release_hourly) }
+        : null
+    );
   }
 
-  async function loadEnergy() {
+  async function loadEnergy(series = {}) {
     if (dam === "hoover") {
-      await loadLakeMeadEnergy();
+      await loadLakeMeadEnergy(series);
       return;
     }
 
     if (typeof initializeEnergyUnitHourlyChart !== "function") return;
-    await initializeEnergyUnitHourlyChart(dam);
+    await initializeEnergyUnitHourlyChart(
+      dam,
+      series.energy_unit_dates
+        ? { dates: series.energy_unit_dates, series: usable(series.energy_units) }
+        : null
+    );
   }
 
   if (subpage === "elevation") {
@@ -65,7 +98,9 @@ document.addEventListener("DOMContentLoaded", () => {
       });
     });
 
-    loadElevation().catch((err) => console.error(err));
+    fetchInitialSeries(".range-btn")
+      .then((series) => loadElevation(series))
+      .catch((err) => console.error(err));
   }
 
   if (subpage === "releases") {
@@ -78,7 +113,9 @@ document.addEventListener("DOMContentLoaded", () => {
       });
     });
 
-    loadReleases().catch((err) => console.error(err));
+    fetchInitialSeries(".range-btn-release")
+      .then((series) => loadReleases(series))
+      .catch((err) => console.error(err));
   }
 
   if (subpage === "energy") {
@@ -93,6 +130,18 @@ document.addEventListener("DOMContentLoaded", () => {
       });
     }
 
-    loadEnergy().catch((err) => console.error(err));
+    fetchInitialSeries(".range-btn-energy")
+      .then((series) => loadEnergy(series))
+      .catch((err) => console.error(err));
+  }
+
+  if (subpage === "24-month-study" && typeof initialize24MS === "function") {
+    fetchInitialSeries(".range-btn")
+      .then((series) => initialize24MS(
+        Array.isArray(series["24ms_months"])
+          ? { months: series["24ms_months"], data: series["24ms"] }
+          : null
+      ))
+      .catch((err) => console.error(err));
   }
 });
@@ -0,0 +1,144 @@
+"""
+Local stand-in for the USBR HDB web service (hdb.pl).
+
+Answers the same query parameters main.py sends (sdi, tstp, t1, t2, ...)
+with deterministic synthetic values in HDB's JSON shape, so the update
+handlers and the backfill can run without network access:
+
+    python tools/fake_hdb.py --port 8765
+    HDB_BASE_URL=http://127.0.0.1:8765/pn-bin/hdb/hdb.pl flask --app main backfill ...
+"""
+import argparse
+import json
+import math
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+HDB_PATH = "/pn-bin/hdb/hdb.pl"
+
+
+def _parse_hdb_time(value):
+    for fmt in ("%Y-%m-%dT%H:%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Unsupported time value: {value}")
+
+
+def _format_hdb_time(dt):
+    # HDB writes unpadded month/day/hour, e.g. "2/19/2026 1:00:00 AM".
+    hour_12 = dt.hour % 12 or 12
+    meridiem = "AM" if dt.hour < 12 else "PM"
+    return f"{dt.month}/{dt.day}/{dt.year} {hour_12}:{dt.minute:02d}:{dt.second:02d} {meridiem}"
+
+
+def synthetic_value(sd_id, dt, table="R"):
+    """
+    Smooth, repeatable value for (sd_id, dt); forecasts drift slightly.
+    """
+    day_of_year = dt.timetuple().tm_yday
+    base = 500 + (sd_id % 97) * 10
+    seasonal = 25 * math.sin(2 * math.pi * day_of_year / 365.25)
+    diurnal = 5 * math.sin(2 * math.pi * dt.hour / 24)
+    drift = 1.5 if table == "M" else 0.0
+    return round(base + seasonal + diurnal + drift, 2)
+
+
+def build_payload(query):
+    sdis = [int(part) for part in query["sdi"].split(",") if part.strip()]
+    step = timedelta(hours=1) if query.get("tstp", "DY").upper() == "HR" else timedelta(days=1)
+    start = _parse_hdb_time(query["t1"])
+    end = _parse_hdb_time(query["t2"])
+    table = query.get("table", "R").upper()
+
+    if step == timedelta(days=1):
+        start = start.replace(hour=0, minute=0)
+    else:
+        start = start.replace(minute=0)
+
+    series = []
+    for sd_id in sdis:
+        points = []
+        current = start
+        while current <= end:
+            points.append({
+                "t": _format_hdb_time(current),
+                "v": f"{synthetic_value(sd_id, current, table):.2f}",
+            })
+            current += step
+        series.append({"SDI": str(sd_id), "TimeStep": query.get("tstp", "DY"), "Data": points})
+
+    return {"Series": series}
+
+
+class FakeHdbHandler(BaseHTTPRequestHandler):
+    # Set by the server owner to simulate flaky upstreams: the first N
+    # requests return HTTP 503.
+    fail_first = 0
+    request_count = 0
+    count_lock = threading.Lock()
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path != HDB_PATH:
+            self.send_error(404)
+            return
+
+        with FakeHdbHandler.count_lock:
+            FakeHdbHandler.request_count += 1
+            request_number = FakeHdbHandler.request_count
+
+        if request_number <= FakeHdbHandler.fail_first:
+            self.send_error(503)
+            return
+
+        query = {name: values[-1] for name, values in parse_qs(parsed.query).items()}
+        try:
+            body = json.dumps(build_payload(query)).encode("utf-8")
+        except (KeyError, ValueError) as e:
+            self.send_error(400, str(e))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_hdb(host="127.0.0.1", port=0, fail_first=0):
+    """
+    Start the fake server on a background thread.
+    Returns (server, base_url); call server.shutdown() when done.
+    """
+    FakeHdbHandler.fail_first = fail_first
+    FakeHdbHandler.request_count = 0
+    server = ThreadingHTTPServer((host, port), FakeHdbHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}{HDB_PATH}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-first", type=int, default=0,
+                        help="Return HTTP 503 for the first N requests.")
+    args = parser.parse_args()
+
+    server, base_url = start_fake_hdb(args.host, args.port, args.fail_first)
+    print(f"Fake HDB listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()